@@ -29,12 +29,14 @@ from helpers.gdboutput import GdbOutput
 import logging
 from helpers.configstore import ConfigSet, ConfigItem
 from helpers.gdbinit import GDBInit
+from helpers.eventloopmonitor import EventLoopMonitor
 
 
 class DebugConfig(ConfigSet):
     def __init__(self):
         ConfigSet.__init__(self, "Debugging", "Debugging Options")
         self.breakAtMain = ConfigItem(self, "Break at main function", True)
+        self.monitorEventLoop = ConfigItem(self, "Log blocking of the GUI thread", False)
 
 
 class DebugController(QObject):
@@ -65,16 +67,32 @@ class DebugController(QObject):
         
         self.toggleBeautify = True
 
-        self.connector.reader.asyncRecordReceived.connect(self.handleAsyncRecord, Qt.QueuedConnection)
+        self.connector.reader.asyncRecordsReceived.connect(self.handleAsyncRecords, Qt.QueuedConnection)
 
         self.__config = DebugConfig()
         self.distributedObjects.configStore.registerConfigSet(self.__config)
         self.__config.itemsHaveChanged.connect(self.updateConfig)
 
+        # measures how long gdb commands block the GUI; see report()
+        self.eventLoopMonitor = EventLoopMonitor()
+        self.__config.monitorEventLoop.valueChanged.connect(self.updateEventLoopMonitor)
+        self.updateEventLoopMonitor()
+
     def updateConfig(self):
         if self.executableName:
             logging.warning("Please reload executable for changes to take effect!")
 
+    def updateEventLoopMonitor(self):
+        if self.__config.monitorEventLoop.value:
+            self.eventLoopMonitor.reset()
+            self.eventLoopMonitor.start()
+        elif self.eventLoopMonitor.isActive():
+            self.eventLoopMonitor.stop()
+            logging.info("GUI thread: %s", self.eventLoopMonitor.report())
+            logging.info("Result cache: %s", self.connector.resultCache.report())
+            logging.info("Child prefetch: %s",
+                    self.distributedObjects.variablePool.prefetcher.report())
+
     def openExecutable(self, filename):
         # make sure we only open absolute paths, otherwise eg. RecentFileHandler
         # will not know _where_ the file was we opened and store different
@@ -156,29 +174,63 @@ class DebugController(QObject):
     def evaluateExpression(self, exp):
         if exp == "":
             return None
-        exp = exp.replace('"', '\"')
-        return self.connector.evaluate("\"" + exp + "\"")
+        return self.connector.evaluate(self.__quote(exp))
+
+    def evaluateExpressions(self, exps):
+        """Evaluate all expressions with a single round trip to gdb.
+        @return list of the values, None for expressions that failed
+        """
+        quoted = [self.__quote(exp) for exp in exps if exp != ""]
+        values = iter(self.connector.evaluateBatch(quoted))
+        return [next(values) if exp != "" else None for exp in exps]
+
+    def __quote(self, exp):
+        """Return exp as a quoted MI argument, eg. for string literals."""
+        return "\"" + exp.replace('\\', '\\\\').replace('"', '\\"') + "\""
 
     def executeCliCommand(self, cmd):
         return self.connector.executeCliCommand(cmd)
 
+    def handleAsyncRecords(self, recs):
+        """Handle a batch of async records. Thread notifications are passed
+        on in groups; they are flushed before every exec record so that
+        listeners see the threads in the state gdb reported at that time.
+        """
+        created = []
+        exited = []
+
+        for rec in recs:
+            if rec.type_ == GdbOutput.EXEC_ASYN:
+                self.__flushThreadRecords(created, exited)
+                if rec.class_ == GdbOutput.STOPPED:
+                    self.handleStoppedRecord(rec)
+                elif rec.class_ == GdbOutput.RUNNING:
+                    self.signalProxy.emitInferiorIsRunning(rec)
+            elif rec.type_ == GdbOutput.NOTIFY_ASYN:
+                if rec.class_ == GdbOutput.THREAD_CREATED:
+                    created.append(rec)
+                elif rec.class_ == GdbOutput.THREAD_EXITED:
+                    exited.append(rec)
+
+        self.__flushThreadRecords(created, exited)
+
+    def __flushThreadRecords(self, created, exited):
+        if created:
+            self.signalProxy.emitThreadsCreated(created[:])
+            del created[:]
+        if exited:
+            self.signalProxy.emitThreadsExited(exited[:])
+            del exited[:]
+
     def handleAsyncRecord(self, rec):
-        if rec.type_ == GdbOutput.EXEC_ASYN:
-            if rec.class_ == GdbOutput.STOPPED:
-                self.handleStoppedRecord(rec)
-            elif rec.class_ == GdbOutput.RUNNING:
-                self.signalProxy.emitInferiorIsRunning(rec)
-        elif rec.type_ == GdbOutput.NOTIFY_ASYN:
-            if rec.class_ == GdbOutput.THREAD_CREATED:
-                self.signalProxy.emitThreadCreated(rec)
-            elif rec.class_ == GdbOutput.THREAD_EXITED:
-                self.signalProxy.emitThreadExited(rec)
+        self.handleAsyncRecords([rec])
 
     def handleStoppedRecord(self, rec):
         # With reverse debugging, some stopped records might not contain a
         # reason. Predefine it as None, since all unknown reasons will be
         # handled as the inferior having stopped normally.
         reason = None
+        thread = 0
 
         for r in rec.results:
             if r.dest == 'reason':
@@ -191,6 +243,8 @@ class DebugController(QObject):
                 signal_meaning = r.src
             if r.dest == "bkptno":
                 bkptno = int(r.src)
+            if r.dest == "thread-id":
+                thread = int(r.src)
 
         if reason in ['exited-normally', 'exited']:
             self.signalProxy.emitInferiorHasExited(rec)
@@ -202,8 +256,9 @@ class DebugController(QObject):
                     self.signalProxy.emitInferiorStoppedNormally(rec)
                     stop = True
                     self.lastCmdWasStep = False
-                if tp != None:
-                    tp.tracePointOccurred(stop)
+                # collecting tracepoints do not stop the inferior
+                if tp != None and not tp.collecting:
+                    tp.tracePointOccurred(stop, thread)
                     self.distributedObjects.signalProxy.emitTracepointOccurred()
         elif reason == "signal-received":
             logging.warning("Signal received: %s (%s) in %s:%s", signal_name, signal_meaning, frame.file, frame.line)
@@ -22,26 +22,108 @@
 #
 # For further information see <http://syscdbg.hagenberg.servus.at/>.
 
+import logging
+from collections import OrderedDict
 from models.localsmodel import LocalsModel
+from variables.variablelist import VariableList
 from .treeitemcontroller import TreeItemController
 
 
 class LocalsController(TreeItemController):
+    # number of frames whose locals are kept when another frame is shown
+    FRAME_CACHE_SIZE = 8
+
     def __init__(self, distributedObjects, view):
         TreeItemController.__init__(self, distributedObjects, "Locals", view, LocalsModel, True)
+        self.connector = distributedObjects.gdb_connector
+        # VariableLists with the locals by frame key (see
+        # GdbConnector.getFrameKey), least recently shown first
+        self.__frames = OrderedDict()
+
         self.distributedObjects.signalProxy.inferiorStoppedNormally.connect(self.getLocals)
+        self.distributedObjects.signalProxy.inferiorHasExited.connect(self.clear)
         self.distributedObjects.stackController.stackFrameSelected.connect(self.getLocals)
 
     def getLocals(self):
-        self.clear()
-        self.variableList.addLocals()
+        """ show the locals of the selected frame
+            the varobjs of a frame that was shown before are reused; only the
+            locals that came into or went out of scope are created or deleted
+        """
+        count = self.connector.commandCount
+        frame = self.distributedObjects.variablePool.frameKey()
 
-        for vw in self.variableList.list:
-            self.add(vw)
+        varList = self.__frames.pop(frame, None)
+        if varList is None:
+            varList = VariableList(self.vwFactory, self.distributedObjects)
+            varList.setActive(self.variablesActive)
+            varList.addLocals()
+            for vw in varList.list:
+                self.__watch(vw)
+            changed = True
+        else:
+            changed = self.__updateLocals(varList)
+        self.__frames[frame] = varList
+
+        if varList is not self.variableList:
+            self.variableList.setActive(False)
+            varList.setActive(self.variablesActive)
+            self.variableList = varList
+            changed = True
+
+        if changed:
+            self.model.clear()
+            for vw in self.variableList.list:
+                self.add(vw)
+
+        while len(self.__frames) > self.FRAME_CACHE_SIZE:
+            self.__frames.popitem(last=False)[1].clear()
+
+        logging.debug("Locals of frame %s refreshed with %d MI commands",
+                frame, self.connector.commandCount - count)
+
+    def __updateLocals(self, varList):
+        """ bring the locals in varList in line with the locals gdb reports
+        @return    bool, True if locals were added or removed
+        """
+        names = [v.name for v in reversed(self.connector.getLocals())]
+
+        old = {}
+        for vw in varList.list:
+            if vw.inScope:
+                old.setdefault(vw.exp, []).append(vw)
+
+        current = []
+        changed = False
+        for name in names:
+            if old.get(name):
+                current.append(old[name].pop(0))
+            else:
+                current.append(self.__watch(varList.addVarByName(name)))
+                changed = True
+
+        for vw in varList.list[:]:
+            if vw not in current:
+                varList.removeVar(vw)
+                changed = True
+
+        varList.list = current
+        return changed
+
+    def __watch(self, vw):
+        # mark the locals that changed since the last stop
+        vw.dataChanged.connect(vw.hasChanged)
+        return vw
+
+    def clear(self):
+        for varList in self.__frames.values():
+            varList.clear()
+        self.__frames.clear()
+        TreeItemController.clear(self)
 
     def reloadLocals(self):
         self.clear()
         self.variableList.reloadLocals()
+        self.__frames[self.distributedObjects.variablePool.frameKey()] = self.variableList
 
         for vw in self.variableList.list:
-            self.add(vw)
+            self.add(self.__watch(vw))
@@ -30,9 +30,16 @@ from helpers.excep import VariableNotFoundException
 class ToolTipController(TreeItemController):
     def __init__(self, distributedObjects, view):
         TreeItemController.__init__(self, distributedObjects, "Tooltip", view, VariableModel, False)
+        # the variable of a hidden tool tip is kept until the next tool tip
+        # is shown, but it does not need to be updated
+        self.view.hidden.connect(self.__hidden)
+
+    def __hidden(self):
+        self.variableList.setActive(False)
 
     def __setVar(self, watch):
         self.clear()
+        self.variableList.setActive(True)
         try:
             self.add(self.variableList.addVarByName(watch))
         except VariableNotFoundException:
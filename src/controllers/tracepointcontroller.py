@@ -28,8 +28,20 @@
 
 from PyQt4.QtCore import QObject, Qt
 from PyQt4.QtGui import QDockWidget
+import os
 from models.tracepointmodel import TracepointModel
+from models.tracefile import TraceReader
+from models.vcdexport import writeVcd
 from views.tracepointview import TracepointView
+from helpers.configstore import ConfigSet, ConfigItem
+
+
+class TracepointConfig(ConfigSet):
+    def __init__(self):
+        ConfigSet.__init__(self, "Tracepoints", "Tracepoint Options")
+        self.collectInGdb = ConfigItem(self, "Collect traced values inside gdb without stopping", False)
+        self.traceDirectory = ConfigItem(self, "Write traces to files in this directory (empty: keep them in memory)", "")
+        self.samplesInMemory = ConfigItem(self, "Samples kept in memory per tracepoint when writing traces", 1000000)
 
 
 class TracepointController(QObject):
@@ -51,17 +63,38 @@ class TracepointController(QObject):
         """@var self.tracepointView: (TracepointView), this class presents data from _model"""
         self.tracepointView = TracepointView()
         self.tracepointView.tracepointView.setModel(self._model)
+        # traces opened from files, list of (name, SampleStore)
+        self.openedTraces = []
 
         #register with session manager to save Tracepoints
         self.distributedObjects.signalProxy.emitRegisterWithSessionManager(self, "Tracepoints")
 
+        self.__config = TracepointConfig()
+        self.distributedObjects.configStore.registerConfigSet(self.__config)
+        self.__config.itemsHaveChanged.connect(self.updateConfig)
+        self.updateConfig()
+
         self.tracepointView.tracepointView.clicked.connect(self.updateWaveforms)
+        # fetch the values of collecting tracepoints before the waveforms are updated
+        self.distributedObjects.signalProxy.inferiorStoppedNormally.connect(self._model.pullCollectedData)
+        self.distributedObjects.signalProxy.inferiorReceivedSignal.connect(self._model.pullCollectedData)
+        self.distributedObjects.signalProxy.inferiorHasExited.connect(self._model.pullCollectedData)
+        self.distributedObjects.signalProxy.inferiorStoppedNormally.connect(self._model.writeTraces)
+        self.distributedObjects.signalProxy.inferiorReceivedSignal.connect(self._model.writeTraces)
+        self.distributedObjects.signalProxy.inferiorHasExited.connect(self._model.writeTraces)
         self.distributedObjects.signalProxy.inferiorStoppedNormally.connect(self.updateWaveforms)
+        self.distributedObjects.signalProxy.inferiorHasExited.connect(self.updateWaveforms)
         self.distributedObjects.signalProxy.cleanupModels.connect(self._model.clearTracepoints)
         self.distributedObjects.signalProxy.runClicked.connect(self._model.clearTracepointData)
 
         self.distributedObjects.mainwindow.insertDockWidget(self.tracepointView, "Tracepoints", Qt.BottomDockWidgetArea, True)
 
+    def updateConfig(self):
+        """ new tracepoints use the mode set in the configuration """
+        self._model.collectInGdb = self.__config.collectInGdb.value
+        self._model.traceDirectory = self.__config.traceDirectory.value or None
+        self._model.samplesInMemory = self.__config.samplesInMemory.value
+
     def updateWaveforms(self):
         '''update tracepoint waveforms'''
         index = self.tracepointView.getSelectedRow()
@@ -84,7 +117,11 @@ class TracepointController(QObject):
         """Insert session info to xml file"""
         tpparent = xmlHandler.createNode("Tracepoints")
         for tp in self._model.getTracepoints():
-            tpnode = xmlHandler.createNode("Tracepoint", tpparent, {"file": tp.file, "line": tp.line})
+            attr = {"file": tp.file, "line": tp.line}
+            if tp.traceWriter is not None:
+                tp.traceWriter.write(tp.samples)
+                attr["trace"] = tp.traceWriter.fileName
+            tpnode = xmlHandler.createNode("Tracepoint", tpparent, attr)
             for var in tp.wave:
                 xmlHandler.createNode("TracepointVariable", tpnode, {"name": var.name})
 
@@ -96,10 +133,41 @@ class TracepointController(QObject):
             for i in range(childnodes.size()):
                 attr = xmlHandler.getAttributes(childnodes.at(i))
                 self._model.insertTracepoint(attr["file"], attr["line"])
+                tp = self._model.getTracepoints()[i]
+                trace = attr.get("trace")
+
+                tpvars = childnodes.at(i).childNodes()
+                for j in range(tpvars.size()):
+                    attr = xmlHandler.getAttributes(tpvars.at(j))
+                    tp.addVar(attr["name"])
 
-                for j in range(vars.size()):
-                    attr = xmlHandler.getAttributes(vars.at(j))
-                    self._model.getTracepoints()[i].addVar(attr["name"])
+                if trace and os.path.exists(trace):
+                    # show the samples of the saved run without re-running
+                    tp.samples.extend(self.readTrace(trace))
 
     def model(self):
         return self._model
+
+    def readTrace(self, fileName):
+        """return the samples of a trace file as SampleStore"""
+        reader = TraceReader(fileName)
+        try:
+            return reader.read()
+        finally:
+            reader.close()
+
+    def openTrace(self, fileName):
+        """show the samples of a trace file in the waveform dock
+        @param fileName: (str), file written while tracing, see models/tracefile.py
+        """
+        store = self.readTrace(fileName)
+        self.openedTraces.append((os.path.splitext(os.path.basename(fileName))[0], store))
+        self.distributedObjects.tracepointwaveModel.updateTracepointWave(store.columns)
+
+    def exportVcd(self, fileName):
+        """write the samples of all tracepoints and opened traces to a VCD file
+        @param fileName: (str), name of the VCD file
+        """
+        stores = [(tp.name, self._model.readTrace(tp)) for tp in self._model.getTracepoints()]
+        with open(fileName, "w") as f:
+            writeVcd(f, stores + self.openedTraces)
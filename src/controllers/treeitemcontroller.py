@@ -23,6 +23,7 @@
 # For further information see <http://syscdbg.hagenberg.servus.at/>.
 
 from PyQt4.QtCore import QObject, Qt
+from PyQt4.QtGui import QTreeView
 from models.variablemodel import TreeItem
 from variables.varwrapperfactory import VarWrapperFactory
 from variables.variablelist import VariableList
@@ -33,6 +34,128 @@ from variables.variablewrapper import VariableWrapper
 #####################################################################################
 
 
+class TreeChildList(object):
+    """ Sparse list of the wrappers for the children of a variable. <br>
+        A wrapper is only created when its row is accessed by the model, the
+        children themselves are paged in by the variable's ChildStore.
+        Iterating the list yields only the wrappers created so far.
+    """
+
+    def __init__(self, parent, variable, factory):
+        """ Constructor
+        @param parent     TreeItem, the item owning the list
+        @param variable   Variable, the variable whose children are shown
+        @param factory    derived from VarWrapperFactory, factory for the child wrappers
+        """
+        self.parent = parent
+        self.variable = variable
+        self.factory = factory
+        self.__wrappers = {}
+
+    def __len__(self):
+        return len(self.variable.childs)
+
+    def __getitem__(self, row):
+        child = self.variable.childs[row]
+        vw = self.__wrappers.get(row)
+        if vw is None:
+            vw = child.makeWrapper(self.factory)
+            vw.parent = self.parent
+            vw.dataChanged.connect(vw.hasChanged)
+            self.__wrappers[row] = vw
+        elif vw._v is not child:
+            # the child's page was dropped and loaded again; keep the wrapper
+            # since the view might still reference it
+            vw.setVariable(child)
+            vw.removeChildren()
+            vw.childItems = []
+        return vw
+
+    def __iter__(self):
+        return iter([self.__wrappers[row] for row in sorted(self.__wrappers)])
+
+    def __delitem__(self, key):
+        assert key == slice(None)
+        self.__wrappers = {}
+
+    def index(self, vw):
+        for row, w in self.__wrappers.items():
+            if w is vw:
+                return row
+        raise ValueError("wrapper is not in the list")
+
+
+class TreeArrayElementItem(TreeItem):
+    """ Item for an element of an array of a scalar type; its value is taken
+        from the buffer returned by Variable.getData, no varobj is created """
+
+    def __init__(self, parent, variable, row):
+        """ Constructor
+        @param parent     TreeItem, the item of the array
+        @param variable   Variable, the array
+        @param row        int, index of the element
+        """
+        TreeItem.__init__(self)
+        self.parent = parent
+        self.variable = variable
+        self.row = row
+        self.exp = "[%d]" % row
+        self.type = variable.typeInfo.scalarArray[0]
+        self.access = None
+        self.inScope = True
+        self.__lastValue = None
+
+    def __getValue(self):
+        data = self.variable.getData()
+        if data is None or self.row >= len(data):
+            return ""
+        return str(data[self.row])
+    value = property(__getValue)
+    unfilteredValue = value
+
+    uniqueName = property(lambda self: "%s[%d]" % (self.variable.uniqueName, self.row))
+
+    def getChanged(self):
+        # compare with the value seen when the model was updated last time
+        value = self.value
+        changed = self.__lastValue is not None and value != self.__lastValue
+        self.__lastValue = value
+        return changed
+
+    def assignValue(self, value):
+        self.variable._vp.assignExpression(self.uniqueName, value)
+
+
+class TreeArrayElementList(object):
+    """ Sparse list of the items of an array of a scalar type, see TreeChildList """
+
+    def __init__(self, parent, variable):
+        self.parent = parent
+        self.variable = variable
+        self.__items = {}
+
+    def __len__(self):
+        data = self.variable.getData()
+        return len(data) if data is not None else 0
+
+    def __getitem__(self, row):
+        item = self.__items.get(row)
+        if item is None:
+            item = TreeArrayElementItem(self.parent, self.variable, row)
+            self.__items[row] = item
+        return item
+
+    def __iter__(self):
+        return iter([self.__items[row] for row in sorted(self.__items)])
+
+    def __delitem__(self, key):
+        assert key == slice(None)
+        self.__items = {}
+
+    def index(self, item):
+        return item.row
+
+
 class TreePtrVarWrapper(VariableWrapper, TreeItem):
     """ VariableWrapper for Pointer-Variables """
 
@@ -58,11 +181,7 @@ class TreePtrVarWrapper(VariableWrapper, TreeItem):
                     vwChild.dataChanged.connect(vwChild.hasChanged)
                     self.addChild(vwChild)
                 else:
-                    for child in variable.childs:
-                        vwChild = child.makeWrapper(factory)
-                        vwChild.parent = self
-                        vwChild.dataChanged.connect(vwChild.hasChanged)
-                        self.addChild(vwChild)
+                    self.childItems = TreeChildList(self, variable, factory)
         return self.childItems
 
     def hasChanged(self):
@@ -71,6 +190,7 @@ class TreePtrVarWrapper(VariableWrapper, TreeItem):
             this function is connected to the signal SignalProxy::changed()
         """
         self.removeChildren()
+        self.childItems = []
         self.setChanged(True)
 
 
@@ -90,14 +210,12 @@ class TreeStructVarWrapper(VariableWrapper, TreeItem):
             Get Children from VariableList for StructVariable
         @param factory   derived from VarWrapperFactory, factory to look in VariableList for children
         """
-        if (len(self.childItems) == 0) or (self._v.numChild != len(self.childItems)):
-            self.removeChildren()
-            for child in self._v.childs:
-                vwChild = child.makeWrapper(factory)
-                vwChild.parent = self
-                vwChild.dataChanged.connect(vwChild.hasChanged)                    
-                self.addChild(vwChild)
-                self._v.numChild = len(self.childItems)
+        if not isinstance(self.childItems, (TreeChildList, TreeArrayElementList)):
+            if self._v.isScalarArray() and self._v.getData() is not None:
+                # show the elements from memory instead of creating varobjs
+                self.childItems = TreeArrayElementList(self, self._v)
+            else:
+                self.childItems = TreeChildList(self, self._v, factory)
 
         return self.childItems
 
@@ -163,11 +281,22 @@ class TreeItemController(QObject):
         self.view.controller = self
         self.view.setModel(self.model)
         self.variableList = VariableList(self.vwFactory, self.distributedObjects)
+        self.variablesActive = True
+        # wrappers of the expanded items, their children are prefetched
+        self.expandedItems = set()
 
         self.distributedObjects.signalProxy.cleanupModels.connect(self.clear)
+        self.distributedObjects.signalProxy.variableUpdateCompleted.connect(self.prefetchChildren)
 
         if addDockWidget:
-            self.distributedObjects.mainwindow.insertDockWidget(self.view, name, Qt.BottomDockWidgetArea, True)
+            dock = self.distributedObjects.mainwindow.insertDockWidget(self.view, name, Qt.BottomDockWidgetArea, True)
+            # only keep the variables of a visible dock up to date
+            dock.visibilityChanged.connect(self.setVariablesActive)
+
+        # freeze the children of collapsed items, they are not visible anyway
+        if isinstance(self.view, QTreeView):
+            self.view.collapsed.connect(self.itemCollapsed)
+            self.view.expanded.connect(self.itemExpanded)
 
     def clear(self):
         """ clears the TreeView and the VariableList <br>
@@ -176,6 +305,43 @@ class TreeItemController(QObject):
         # clear lists
         self.variableList.clear()
         self.model.clear()
+        self.expandedItems = set()
+
+    def setVariablesActive(self, active):
+        """ (un)subscribe the shown variables, see VariableList.setActive """
+        self.variablesActive = active
+        self.variableList.setActive(active)
+
+    def itemCollapsed(self, index):
+        """ freeze the variables of the children of the collapsed item """
+        self.expandedItems.discard(index.internalPointer())
+        self.__setChildrenFrozen(index, True)
+
+    def itemExpanded(self, index):
+        """ thaw (and update) the variables of the children of the expanded item """
+        if isinstance(index.internalPointer(), VariableWrapper):
+            self.expandedItems.add(index.internalPointer())
+        self.__setChildrenFrozen(index, False)
+
+    def prefetchChildren(self):
+        """ load the children of the items that were expanded at the previous
+            stop, and of their children, in the background
+        """
+        if not self.variablesActive or not self.expandedItems:
+            return
+        pool = self.distributedObjects.variablePool
+        # forget the items of variables that were removed meanwhile
+        self.expandedItems = set(vw for vw in self.expandedItems
+                                 if vw._v._gdbName in pool.variables)
+        pool.prefetchChildren([vw._v for vw in self.expandedItems])
+
+    def __setChildrenFrozen(self, index, frozen):
+        vw = index.internalPointer()
+        if vw is None:
+            return
+        variables = [child._v for child in vw.childItems
+                     if isinstance(child, VariableWrapper)]
+        self.distributedObjects.variablePool.setFrozen(variables, frozen)
 
     def add(self, vw):
         vw.setParent(self.model.root)
@@ -112,7 +112,8 @@ class ArrayVariableTemplateHandler(ComplexTemplateHandler):
     def prepareContextMenu(self, menu):
         ComplexTemplateHandler.prepareContextMenu(self, menu)
 
-        graphicalViewPossible = all(isinstance(var, StdDataGraphVW) for var in self.varWrapper.childrenWrapper)
+        graphicalViewPossible = self.varWrapper.getData() is not None or \
+                all(isinstance(var, StdDataGraphVW) for var in self.varWrapper.childrenWrapper)
 
         # we only allow the graphical view if all contained elements are standard variables; also,
         # do not show the menu if the variable view is collapsed
@@ -131,7 +132,10 @@ class ArrayVariableTemplateHandler(ComplexTemplateHandler):
 
     def plot(self, output):
         _importMatplotlib()        # only import matplotlib if we really need it
-        data = [float(var.unfilteredValue) for var in self.varWrapper.childrenWrapper]
+        # arrays of scalars are plotted from a single memory read
+        data = self.varWrapper.getData()
+        if data is None:
+            data = [float(var.unfilteredValue) for var in self.varWrapper.childrenWrapper]
 
         fig = plt.figure(figsize=(4, 3))
         ax = fig.add_subplot(111)
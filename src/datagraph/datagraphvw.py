@@ -27,6 +27,7 @@ from mako.lookup import TemplateLookup
 import sys
 from PyQt4.QtCore import QObject
 from variables.variablewrapper import VariableWrapper
+from variables.childstore import ChildStore
 from .htmlvariableview import HtmlVariableView
 from PyQt4 import QtCore, QtGui
 from PyQt4.QtGui import QWidgetAction, QLabel, QIcon
@@ -126,6 +127,23 @@ class ComplexTemplateHandler(HtmlTemplateHandler):
             action.setCheckable(True)
             action.setChecked(self.vertical)
 
+            start = self.varWrapper.childWindowStart
+            size = self.varWrapper.childWindowSize
+            if start > 0:
+                menu.addAction("Show children %d to %d" % (max(0, start - size), start - 1), self.showPreviousChildren)
+            if start + size < len(self.varWrapper.childs):
+                menu.addAction("Show children %d to %d" % (start + size, start + 2 * size - 1), self.showNextChildren)
+
+    @QtCore.pyqtSlot()
+    def showPreviousChildren(self):
+        vw = self.varWrapper
+        vw.setChildWindow(vw.childWindowStart - vw.childWindowSize)
+
+    @QtCore.pyqtSlot()
+    def showNextChildren(self):
+        vw = self.varWrapper
+        vw.setChildWindow(vw.childWindowStart + vw.childWindowSize)
+
     def render(self, role, **kwargs):
         self.varWrapper.getChildren()
         return HtmlTemplateHandler.render(self, role, vertical=self.vertical, **kwargs)
@@ -218,6 +236,9 @@ class ComplexDataGraphVW(DataGraphVW):
         self.vwFactory = vwFactory
         self.childrenWrapper = None        # will be lazily evaluated once we need them
         self.templateHandler = templateHandler
+        # only the children in this window are shown (and loaded)
+        self.childWindowStart = 0
+        self.childWindowSize = ChildStore.PAGE_SIZE
 
     def setOpen(self, open_):
         self.isOpen = open_
@@ -227,8 +248,14 @@ class ComplexDataGraphVW(DataGraphVW):
         """ returns list of children as DataGraphVWs; creates the wrappers if they haven't yet been
         @return    list of datagraph.datagraphvw.DataGraphVW """
         self.childrenWrapper = []
-        for childVar in self.childs:
+        for childVar in self._v.getChildRange(self.childWindowStart,
+                self.childWindowStart + self.childWindowSize):
             wrapper = childVar.makeWrapper(self.vwFactory)
             wrapper.setExistingView(self.getView(), self)
             self.childrenWrapper.append(wrapper)
-        return self.childrenWrapper
\ No newline at end of file
+        return self.childrenWrapper
+
+    def setChildWindow(self, start):
+        """ show the children beginning at start """
+        self.childWindowStart = max(0, start)
+        self.setDirty(True)
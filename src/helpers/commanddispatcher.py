@@ -0,0 +1,92 @@
+# ricodebug - A GDB frontend which focuses on visually supported
+# debugging using data structure graphs and SystemC features.
+#
+# Copyright (C) 2011  The ricodebug project team at the
+# Upper Austrian University Of Applied Sciences Hagenberg,
+# Department Embedded Systems Design
+#
+# This file is part of ricodebug.
+#
+# ricodebug is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For further information see <http://syscdbg.hagenberg.servus.at/>.
+
+"""CommandDispatcher that executes gdb commands off the GUI thread
+"""
+
+from PyQt4.QtCore import QThread, QMutex, QSemaphore, Qt, pyqtSignal
+from collections import deque
+
+
+class CommandDispatcher(QThread):
+    """Worker thread that executes queued command batches with the connector
+    and hands the results to the requester's callback in the thread the
+    dispatcher was created in (ie. the GUI thread).
+    """
+    requestFinished = pyqtSignal('PyQt_PyObject', 'PyQt_PyObject')
+
+    def __init__(self, connector, parent=None):
+        QThread.__init__(self, parent)
+        self.connector = connector
+
+        self.requestQueue = deque()
+        self.requestMutex = QMutex()
+        self.requestSem = QSemaphore(0)
+
+        self.requestFinished.connect(self.__deliver, Qt.QueuedConnection)
+
+    def enqueue(self, cmds, callback, cached=False):
+        """Queue a batch of commands for execution.
+        @param cmds        list of commands, executed with a single write
+        @param callback    function called with the list of result records in
+                           the dispatcher's thread, may be None
+        @param cached      if True, results are taken from the connector's
+                           result cache where possible
+        """
+        m = self.requestMutex
+        m.lock()
+        self.requestQueue.append((cmds, callback, cached))
+        m.unlock()
+        self.requestSem.release()
+
+    def pending(self):
+        """Return the number of batches that have not been executed yet."""
+        m = self.requestMutex
+        m.lock()
+        n = len(self.requestQueue)
+        m.unlock()
+        return n
+
+    def run(self):
+        """Pre defined method by QThread to start the thread
+        """
+        q = self.requestQueue
+        m = self.requestMutex
+        s = self.requestSem
+
+        while True:
+            s.acquire()
+            m.lock()
+            cmds, callback, cached = q.popleft()
+            m.unlock()
+
+            if cached:
+                results = self.connector.executeBatchCached(cmds)
+            else:
+                results = self.connector.executeBatch(cmds)
+            if callback is not None:
+                self.requestFinished.emit(callback, results)
+
+    def __deliver(self, callback, results):
+        callback(results)
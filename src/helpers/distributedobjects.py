@@ -53,6 +53,7 @@ from views.pyioview import PyIoView
 from views.threadview import ThreadView
 from models.threadmodel import ThreadModel
 from views.mitraceview import MiTraceView
+from views.tracepointwaveview import TracepointWaveView
 from helpers.gdbinit import GDBInit
 
 class DistributedObjects:
@@ -89,6 +90,7 @@ class DistributedObjects:
         self.datagraphController = DataGraphController(self)
         self.stlvectorParser = StlVectorParser(self)
         self.tracepointwaveModel = TracepointWaveModel(self)
+        self.tracepointwaveView = self.buildView(TracepointWaveView, "Waveforms")
 
         self.miView = self.buildView(MiTraceView, "MI Trace")
 
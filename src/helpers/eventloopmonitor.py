@@ -0,0 +1,86 @@
+# ricodebug - A GDB frontend which focuses on visually supported
+# debugging using data structure graphs and SystemC features.
+#
+# Copyright (C) 2011  The ricodebug project team at the
+# Upper Austrian University Of Applied Sciences Hagenberg,
+# Department Embedded Systems Design
+#
+# This file is part of ricodebug.
+#
+# ricodebug is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For further information see <http://syscdbg.hagenberg.servus.at/>.
+
+"""Measures how long the Qt event loop of the GUI thread is blocked
+"""
+
+import logging
+import time
+from PyQt4.QtCore import QObject, QTimer
+
+
+class EventLoopMonitor(QObject):
+    """Fires a short timer in the GUI thread and records how much later than
+    expected it is delivered. Every delay longer than the threshold is
+    counted as a stall of the event loop, eg. caused by a synchronous gdb
+    command.
+    """
+
+    def __init__(self, interval=10, threshold=50, parent=None):
+        """ Constructor
+        @param interval     int, timer interval in ms
+        @param threshold    int, delays longer than this (in ms) are stalls
+        """
+        QObject.__init__(self, parent)
+        self.interval = interval
+        self.threshold = threshold
+
+        self.__timer = QTimer(self)
+        self.__timer.setInterval(interval)
+        self.__timer.timeout.connect(self.__tick)
+        self.__last = None
+
+        self.reset()
+
+    def reset(self):
+        """Forget all measurements."""
+        self.stalls = 0
+        self.blockedTime = 0.0
+        self.longestStall = 0.0
+
+    def start(self):
+        self.__last = time.time()
+        self.__timer.start()
+
+    def stop(self):
+        self.__timer.stop()
+
+    def isActive(self):
+        return self.__timer.isActive()
+
+    def __tick(self):
+        now = time.time()
+        delay = (now - self.__last) * 1000 - self.interval
+        self.__last = now
+
+        if delay > self.threshold:
+            self.stalls += 1
+            self.blockedTime += delay
+            self.longestStall = max(self.longestStall, delay)
+            logging.debug("GUI thread was blocked for %d ms", delay)
+
+    def report(self):
+        """Return a summary of the measurements."""
+        return "%d stalls, %d ms blocked in total, longest stall %d ms" % \
+                (self.stalls, self.blockedTime, self.longestStall)
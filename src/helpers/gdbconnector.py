@@ -26,19 +26,90 @@ import subprocess
 import signal
 import logging
 import os
+import json
+import copy
 from .gdbreader import GdbReader
+from .commanddispatcher import CommandDispatcher
+from .resultcache import ResultCache
 from .gdboutput import GdbOutput
-from PyQt4.QtCore import QObject, pyqtSignal
+from PyQt4.QtCore import QObject, QMutex, QSemaphore, Qt, pyqtSignal
 import helpers
 
 
+class CommandFuture(object):
+    """A command that has been sent to gdb, but whose result record might not
+    have arrived yet. The result is matched to the command by the token the
+    command was sent with.
+    """
+
+    def __init__(self, connector, cmd, token, callback=None, error_msg=None):
+        self.connector = connector
+        self.cmd = cmd
+        self.token = token
+        self.callback = callback
+        self.error_msg = error_msg
+        # notify records (eg. =breakpoint-created) caused by the command,
+        # valid once the result has arrived
+        self.notifications = []
+        self.__result = None
+        # result() may be called from several threads at once, the result
+        # is reported only by the first one
+        self.__reported = False
+        self.__reportedMutex = QMutex()
+        self.__sem = QSemaphore(0)
+
+    def setResult(self, res):
+        """Called by the reader when the result record has arrived."""
+        self.__result = res
+        self.__sem.release()
+
+    def done(self):
+        """Return True if the result record has arrived."""
+        return self.__result is not None
+
+    def result(self):
+        """Wait for the result record of the command and return it."""
+        self.__sem.acquire()
+        self.__sem.release()
+
+        self.__reportedMutex.lock()
+        report = not self.__reported
+        self.__reported = True
+        self.__reportedMutex.unlock()
+
+        if report:
+            res = self.__result
+            if res.class_ == GdbOutput.ERROR:
+                logging.debug("Command '%s' failed with %s (%s, '%s')",
+                        self.cmd, res.msg, res.raw, self.error_msg)
+            # commandExecuted is emitted in the connector's thread
+            self.connector.commandReported.emit(self.cmd, res)
+
+        return self.__result
+
+
 class GdbConnector(QObject):
     commandExecuted = pyqtSignal('PyQt_PyObject', 'PyQt_PyObject')
+    # emitted by CommandFuture in any thread, forwarded to commandExecuted
+    commandReported = pyqtSignal('PyQt_PyObject', 'PyQt_PyObject')
 
     def __init__(self):
         QObject.__init__(self)
         self.gdb = None
+        # results of queries that stay valid until the inferior runs again
+        self.resultCache = ResultCache()
         self.reader = GdbReader(self)
+        self.reader.commandCompleted.connect(self.__commandCompleted,
+                                             Qt.QueuedConnection)
+        self.commandReported.connect(self.commandExecuted,
+                                     Qt.QueuedConnection)
+
+        self.__lastToken = 0
+        self.__writeMutex = QMutex()
+        # number of commands sent to gdb, for measurements
+        self.commandCount = 0
+
+        self.dispatcher = CommandDispatcher(self)
 
     def start(self):
         try:
@@ -47,19 +118,95 @@ class GdbConnector(QObject):
         except OSError as e:
             logging.critical("Could not start gdb. Error message: %s", e)
         self.reader.startReading(self.gdb.stdout)
+        self.dispatcher.start()
+
+    def __send(self, cmds, callback=None, error_msg=None):
+        """Write cmds to gdb with a single write and return their futures."""
+        futures = []
+        self.__writeMutex.lock()
+        try:
+            for cmd in cmds:
+                self.__lastToken += 1
+                future = CommandFuture(self, cmd, self.__lastToken, callback,
+                                       error_msg)
+                self.reader.registerCommand(future)
+                logging.debug("Running command %s", cmd)
+                futures.append(future)
+            self.commandCount += len(futures)
+            self.gdb.stdin.write("".join("%d%s\n" % (f.token, f.cmd)
+                                         for f in futures))
+            self.gdb.stdin.flush()
+        finally:
+            self.__writeMutex.unlock()
+
+        return futures
+
+    def submit(self, cmd, callback=None, error_msg=None):
+        """Send cmd to gdb without waiting for its result. Any number of
+        commands may be in flight at the same time; gdb answers them in
+        order and the results are matched by the command's token.
+        @param callback    function that is called with the result record in
+                           the connector's thread once it has arrived
+        @return CommandFuture, its result() blocks until the result arrived
+        """
+        return self.__send([cmd], callback, error_msg)[0]
+
+    def __commandCompleted(self, future):
+        future.callback(future.result())
 
     def execute(self, cmd, error_msg=None):
-        logging.debug("Running command %s", cmd)
-        self.gdb.stdin.write(cmd + "\n")
-        res = self.reader.getResult(GdbOutput.RESULT_RECORD)
+        return self.submit(cmd, None, error_msg).result()
 
-        if res.class_ == GdbOutput.ERROR:
-            logging.debug("Command '%s' failed with %s (%s, '%s')",
-                    cmd, res.msg, res.raw, error_msg)
+    def executeBatch(self, cmds, error_msg=None):
+        """Send all cmds to gdb with a single write and wait for their results.
+        @return list of the result records in the order of cmds; each failed
+                command is logged and its record has class_ GdbOutput.ERROR
+        """
+        return [f.result() for f in self.__send(cmds, None, error_msg)]
 
-        self.commandExecuted.emit(cmd, res)
+    def executeCached(self, cmd, error_msg=None):
+        """Like execute, but the result is taken from the result cache if cmd
+        has been executed since the inferior stopped. Must only be used for
+        commands without side effects whose result only depends on the
+        state of the stopped inferior.
+        """
+        return self.executeBatchCached([cmd], error_msg)[0]
 
-        return res
+    def executeBatchCached(self, cmds, error_msg=None):
+        """Like executeBatch, but uses the result cache (see executeCached).
+        Only the commands that are not cached are sent to gdb.
+        """
+        cache = self.resultCache
+        results = [cache.lookup(cmd) for cmd in cmds]
+        missing = [i for i, res in enumerate(results) if res is None]
+
+        if missing:
+            generation = cache.generation
+            for i, res in zip(missing, self.executeBatch(
+                    [cmds[i] for i in missing], error_msg)):
+                results[i] = res
+                if res.class_ != GdbOutput.ERROR:
+                    cache.store(cmds[i], res, generation)
+
+        return results
+
+    def executeAsync(self, cmd, callback=None, cached=False):
+        """Execute cmd in the dispatcher thread without blocking the caller.
+        @param callback    function called with the result record in the
+                           connector's thread (ie. the GUI thread)
+        @param cached      if True, use the result cache (see executeCached)
+        """
+        if callback is not None:
+            self.dispatcher.enqueue([cmd], lambda results: callback(results[0]),
+                                    cached)
+        else:
+            self.dispatcher.enqueue([cmd], None, cached)
+
+    def executeBatchAsync(self, cmds, callback=None, cached=False):
+        """Like executeBatch, but the commands are executed in the dispatcher
+        thread and the list of results is passed to callback.
+        """
+        self.dispatcher.enqueue(cmds, callback, cached)
 
     def executeAndRaiseIfFailed(self, cmd, error_msg=None):
         res = self.execute(cmd, error_msg)
@@ -72,11 +219,28 @@ class GdbConnector(QObject):
 
         return res
 
+    def __executeChanging(self, cmd, error_msg=None, raiseIfFailed=False):
+        """Execute a command that changes the state cached results depend on,
+        eg. the selected frame or the value of a variable. The cache is
+        invalidated before the command is sent and again after its result
+        arrived, so that a query running concurrently cannot leave a stale
+        result in the cache under the new generation.
+        """
+        self.resultCache.invalidate()
+        try:
+            if raiseIfFailed:
+                return self.executeAndRaiseIfFailed(cmd, error_msg)
+            else:
+                return self.execute(cmd, error_msg)
+        finally:
+            self.resultCache.invalidate()
+
     def setTty(self, tty):
         self.executeAndRaiseIfFailed("-inferior-tty-set " + tty,
                 "Could not set target's TTY!")
 
     def openFile(self, filename):
+        self.resultCache.invalidate()
         self.executeAndRaiseIfFailed("-file-exec-and-symbols " + filename,
                 "Could not open file!")
 
@@ -85,9 +249,25 @@ class GdbConnector(QObject):
                      "Enable MI PrettyPrint")
 
     def getSources(self):
-        res = self.executeAndRaiseIfFailed("-file-list-exec-source-files",
-                "Could not get files.")
+        res = self.executeCached("-file-list-exec-source-files")
+        if res.class_ == GdbOutput.ERROR:
+            logging.error("Could not get files.\n%s", res.msg)
+            raise helpers.excep.GdbError(res.msg)
+        return self.__sourcesFromResult(res)
 
+    def getSourcesAsync(self, callback):
+        """Like getSources, but does not block; callback is called with the
+        list of files (or None if gdb failed) in the GUI thread.
+        """
+        def f(res):
+            if res.class_ == GdbOutput.ERROR:
+                logging.error("Could not get files.\n%s", res.msg)
+                callback(None)
+            else:
+                callback(self.__sourcesFromResult(res))
+        self.executeAsync("-file-list-exec-source-files", f, cached=True)
+
+    def __sourcesFromResult(self, res):
         files = []
         for f in res.files:
             if hasattr(f, "fullname"):
@@ -110,8 +290,8 @@ class GdbConnector(QObject):
 
         breakpoints = []
         for bp in res.BreakpointTable.body:
-            if not hasattr(bp, "fullname"):
-                bp.fullname = "n/a"
+            if not hasattr(bp.src, "fullname"):
+                bp.src.fullname = "n/a"
             breakpoints.append(bp.src)
 
         return breakpoints
@@ -146,17 +326,38 @@ class GdbConnector(QObject):
 
     def getStack(self, thread_id=None):
         if thread_id:
-            res = self.executeAndRaiseIfFailed("-stack-list-frames --thread %s" % thread_id)
+            res = self.executeCached("-stack-list-frames --thread %s" % thread_id)
         else:
-            res = self.executeAndRaiseIfFailed("-stack-list-frames")
+            res = self.executeCached("-stack-list-frames")
+        if res.class_ == GdbOutput.ERROR:
+            logging.error(res.msg)
+            raise helpers.excep.GdbError(res.msg)
+
+        return self.__stackFromResult(res)
 
+    def getStackAsync(self, callback):
+        """Like getStack, but does not block; callback is called with the list
+        of frames in the GUI thread.
+        """
+        def f(res):
+            if res.class_ == GdbOutput.ERROR:
+                logging.error(res.msg)
+                callback([])
+            else:
+                callback(self.__stackFromResult(res))
+        self.executeAsync("-stack-list-frames", f, cached=True)
+
+    def __stackFromResult(self, res):
         stack = []
 
         if not hasattr(res, "stack"):
             return stack
 
+        # the frames may be cached, so work on copies
         for f in res.stack:
-            stack.append(f.src)
+            frame = copy.copy(f.src)
+            frame.level = int(frame.level)
+            stack.append(frame)
 
         return stack
 
@@ -166,6 +367,69 @@ class GdbConnector(QObject):
         return self.executeAndRaiseIfFailed("-break-insert " + loc,
                 "Could not create breakpoint " + loc + ".")
 
+    def insertBreakpoints(self, locations):
+        """Insert a breakpoint for each (loc, line) pair in locations.
+        @return list of the result records in the order of locations
+        """
+        cmds = []
+        for loc, line in locations:
+            if line is not None:
+                loc = "%s:%s" % (loc, str(line))
+            cmds.append("-break-insert " + loc)
+        results = self.executeBatch(cmds)
+        for cmd, res in zip(cmds, results):
+            if res.class_ == GdbOutput.ERROR:
+                logging.error("Could not create breakpoint (%s): %s", cmd, res.msg)
+        return results
+
+    def insertCollectingTracepoint(self, loc, line):
+        """Insert a tracepoint that collects values inside gdb without
+        stopping the inferior, see helpers/gdbtracecollector.py.
+        @return the bkpt record of the new breakpoint as with insertBreakpoint
+        """
+        loc = "%s:%s" % (loc, str(line))
+        error_msg = "Could not create tracepoint " + loc + "."
+        future = self.submit(self.__collectorCmd("insert " + loc), None, error_msg)
+        res = future.result()
+        if res.class_ == GdbOutput.ERROR:
+            logging.error("%s\n%s", error_msg, res.msg)
+            raise helpers.excep.GdbError(res.msg)
+        # the breakpoint created by this very command
+        for rec in future.notifications:
+            if rec.class_ == GdbOutput.BREAKPOINT_CREATED:
+                for r in rec.results:
+                    if r.dest == "bkpt":
+                        return r.src
+        logging.error(error_msg)
+        raise helpers.excep.GdbError(error_msg)
+
+    def hasTraceCollector(self):
+        """Return True if gdb loaded the collector for tracepoints, see
+        helpers/gdbtracecollector.py."""
+        res = self.execute("-interpreter-exec console \"help rico-trace\"")
+        return res.class_ != GdbOutput.ERROR
+
+    def setCollectedExpressions(self, number, expressions):
+        """Set the expressions the collecting tracepoint number records."""
+        self.__collectorCommand("expressions %s %s" % (number, json.dumps(expressions)),
+                "Could not set the traced expressions.")
+
+    def flushCollectedTraces(self, fileName):
+        """Write the values the collecting tracepoints recorded since the last
+        flush as JSON to fileName."""
+        self.__collectorCommand("flush " + fileName,
+                "Could not read the collected traces.")
+
+    def clearCollectedTraces(self):
+        self.__collectorCommand("clear", "Could not clear the collected traces.")
+
+    def __collectorCmd(self, cmd):
+        cmd = ("rico-trace " + cmd).replace("\\", "\\\\").replace("\"", "\\\"")
+        return "-interpreter-exec console \"" + cmd + "\""
+
+    def __collectorCommand(self, cmd, error_msg):
+        return self.executeAndRaiseIfFailed(self.__collectorCmd(cmd), error_msg)
+
     def deleteBreakpoint(self, number):
         return self.executeAndRaiseIfFailed("-break-delete " + str(number))
 
@@ -256,51 +520,118 @@ class GdbConnector(QObject):
         else:
             return res.value
 
+    def evaluateBatch(self, exps):
+        """Evaluate all expressions in exps with one write to gdb.
+        @return list of the values, None for expressions that failed
+        """
+        return self.__values(self.executeBatch(
+                ["-data-evaluate-expression " + exp for exp in exps]))
+
+    def evaluateCached(self, exp):
+        """Like evaluate, but uses the result cache. Only for expressions
+        without side effects, eg. sizeof() or addresses, never for
+        expressions entered by the user.
+        """
+        return self.evaluateBatchCached([exp])[0]
+
+    def evaluateBatchCached(self, exps):
+        """Like evaluateBatch, but uses the result cache, see evaluateCached.
+        """
+        return self.__values(self.executeBatchCached(
+                ["-data-evaluate-expression " + exp for exp in exps]))
+
+    def __values(self, results):
+        return [None if res.class_ == GdbOutput.ERROR else res.value
+                for res in results]
+
     def executeCliCommand(self, cmd):
-        res = self.execute("-interpreter-exec console \"" + cmd + "\"")
+        # the command might change anything, eg. a variable or the frame
+        res = self.__executeChanging("-interpreter-exec console \"" + cmd + "\"")
         if res.class_ == GdbOutput.ERROR:
             return res.msg
         else:
             return None
 
+    def assign(self, exp, value):
+        """Assign value to the expression exp."""
+        return self.__executeChanging("-gdb-set var %s=%s" % (exp, value))
+
     def var_create(self, exp):
         return self.execute("-var-create - * \"" + exp + "\"")
 
     def var_delete(self, exp):
         return self.execute("-var-delete \"" + exp + "\"")
 
+    def var_delete_batch(self, exps):
+        return self.executeBatch(["-var-delete \"" + exp + "\"" for exp in exps])
+
+    def var_delete_children_batch(self, exps):
+        return self.executeBatch(["-var-delete -c \"" + exp + "\"" for exp in exps])
+
     def var_assign(self, exp, value):
-        return self.execute("-var-assign \"" + exp + "\" " + value)
+        return self.__executeChanging("-var-assign \"" + exp + "\" " + value)
+
+    def var_list_children_cmd(self, exp, start=None, end=None):
+        cmd = "-var-list-children --all-values \"" + str(exp) + "\""
+        if start is not None:
+            cmd += " %d %d" % (start, end)
+        return cmd
 
-    def var_list_children(self, exp):
-        return self.execute("-var-list-children --all-values \"" + \
-                str(exp) + "\" 0 100")
+    def var_list_children(self, exp, start=None, end=None):
+        return self.execute(self.var_list_children_cmd(exp, start, end))
 
     def var_update(self, exp):
         return self.execute("-var-update --all-values \"" + exp + "\"")
 
+    def var_update_batch(self, exps):
+        return self.executeBatch(["-var-update --all-values \"" + exp + "\""
+                                  for exp in exps])
+
+    def var_set_frozen_batch(self, exps, frozen):
+        flag = "1" if frozen else "0"
+        return self.executeBatch(["-var-set-frozen \"" + exp + "\" " + flag
+                                  for exp in exps])
+
     def getStackDepth(self):
-        res = self.execute("-stack-info-depth")
+        res = self.executeCached("-stack-info-depth")
         if res.class_ == GdbOutput.ERROR:
             return None
         else:
             return int(res.depth)
 
+    def getFrameKey(self):
+        """Return a key identifying the selected frame of the selected thread
+        within one stop, or None if there is no frame (eg. if the inferior
+        is not running).
+        """
+        ids, res, fp = self.executeBatchCached(["-thread-list-ids",
+                                                "-stack-info-frame",
+                                                "-data-evaluate-expression $fp"])
+        if res.class_ == GdbOutput.ERROR:
+            return None
+        # $fp is gdb's frame base if the target has no fp register
+        return (getattr(ids, "current-thread-id", None), res.frame.level,
+                getattr(res.frame, "func", None), getattr(fp, "value", None))
+
     def selectStackFrame(self, exp):
-        return self.executeAndRaiseIfFailed("-stack-select-frame " + str(exp))
+        # expressions are evaluated in the selected frame
+        return self.__executeChanging("-stack-select-frame " + str(exp),
+                                      raiseIfFailed=True)
 
     def threadInfo(self):
         return self.executeAndRaiseIfFailed("-thread-info")
 
     def selectThread(self, id_):
-        return self.executeAndRaiseIfFailed("-thread-select %s" % id_)
+        return self.__executeChanging("-thread-select %s" % id_,
+                                      raiseIfFailed=True)
 
     def initPrettyPrinter(self,path):
         command = "source" + path
-        self.executeAndRaiseIfFailed(command,"Can not load pretty printer module!")
+        # the printers change how values are displayed
+        self.__executeChanging(command, "Can not load pretty printer module!", True)
        
     def enablePrettyPrinter(self):
-        return self.executeAndRaiseIfFailed("enable pretty-printer", "Enables Initialized Printers")
+        return self.__executeChanging("enable pretty-printer", "Enables Initialized Printers", True)
        
     def disablePrettyPrinter(self):
-        return self.executeAndRaiseIfFailed("disable pretty-printer", "Disables Initialized Printers")
+        return self.__executeChanging("disable pretty-printer", "Disables Initialized Printers", True)
@@ -37,6 +37,17 @@ class GDBInit(QObject):
         init = path + fileName
         
         file_content = []
+        # the collector for tracepoints, see helpers/gdbtracecollector.py; first
+        # and in its own block, gdb stops sourcing this file at the first
+        # error, eg. if the printers cannot be loaded
+        file_content.append("python\n")
+        file_content.append("import sys\n")
+        file_content.append("sys.path.append(\"" + os.path.dirname(os.path.abspath(__file__)) + "\")\n")
+        file_content.append("try:\n")
+        file_content.append("    import gdbtracecollector\n")
+        file_content.append("except Exception as e:\n")
+        file_content.append("    print(\"Tracepoint collector not available: %s\" % e)\n")
+        file_content.append("end\n")
         file_content.append("python\n")
         file_content.append("import sys\n")
         file_content.append("path=\"" + path + "pretty_printer\"\n")
@@ -26,24 +26,46 @@ from helpers.excep import GdbError
 """GdbReader that listens to the gnu debugger output
 """
 
-from PyQt4.QtCore import QThread, QMutex, QSemaphore, pyqtSignal
+from PyQt4.QtCore import QThread, QMutex, pyqtSignal
 from .gdbresultparser import GdbResultParser
 from .gdboutput import GdbOutput
-from collections import deque
 import helpers.excep
+import logging
+import os
+import select
+
+# number of bytes read from gdb's output at once
+READ_SIZE = 65536
+# async and stream records arriving within this time (in s) of each other
+# are delivered to the GUI together
+COALESCE_WINDOW = 0.005
+# maximum number of records delivered in one batch
+MAX_BATCH = 256
 
 
 class GdbReader(QThread):
-    asyncRecordReceived = pyqtSignal('PyQt_PyObject')
-    consoleRecordReceived = pyqtSignal('PyQt_PyObject')
+    # both carry a list of records in the order they were received
+    asyncRecordsReceived = pyqtSignal('PyQt_PyObject')
+    consoleRecordsReceived = pyqtSignal('PyQt_PyObject')
     forwardMultipleBreakpointInfo = pyqtSignal('PyQt_PyObject')
+    commandCompleted = pyqtSignal('PyQt_PyObject')
 
     def __init__(self, connector, parent=None):
         QThread.__init__(self, parent)
 
-        self.resultRecordQueue = deque()
-        self.resultRecordMutex = QMutex()
-        self.resultRecordSem = QSemaphore(0)
+        # commands waiting for their result, by token
+        self.pendingCommands = {}
+        self.pendingMutex = QMutex()
+        self.resultCache = connector.resultCache
+        # records not yet handed to the GUI, see flushRecords()
+        self.asyncRecords = []
+        self.consoleRecords = []
+        # notifications since the last result record; gdb executes one
+        # command at a time, so they were caused by the next command
+        self.notifications = []
+
+        # build the ply tables (if needed) now instead of on the first prompt
+        GdbResultParser.build()
 
     def startReading(self, stdout):
         """Intialise and start the gdbreader thread
@@ -60,25 +82,62 @@ class GdbReader(QThread):
 
     def listener(self):
         """Main method for listening to the gdb output
+
+        The output is read in large chunks into a buffer that is split into
+        lines. Every record is parsed and forwarded as soon as its line is
+        complete instead of waiting for the next prompt. Async and stream
+        records are collected and emitted in batches once gdb has been quiet
+        for COALESCE_WINDOW seconds.
         """
-        lines = []
+        fd = self.stdout.fileno()
+        buf = bytearray()
+        # True if the next line is the first one after a prompt
+        firstLine = True
+        # lines of a multiple breakpoint info, forwarded at the next prompt
+        multipleBreak = None
+
         while True:
-            line = self.stdout.readline()
-            if line.startswith("(gdb)"):
+            if (self.asyncRecords or self.consoleRecords) and \
+                    not select.select([fd], [], [], COALESCE_WINDOW)[0]:
+                self.flushRecords()
+            chunk = os.read(fd, READ_SIZE)
+            if not chunk:
+                self.flushRecords()
+                break
+            buf += chunk
+
+            start = 0
+            end = buf.find("\n")
+            while end != -1:
+                line = str(buf[start:end + 1])
+                start = end + 1
+                end = buf.find("\n", start)
+
+                if line.startswith("(gdb)"):
+                    if multipleBreak is not None:
+                        self.forwardMultipleBreakPointInfo(
+                                "<Multiple Break>" + "".join(multipleBreak))
+                        multipleBreak = None
+                    firstLine = True
+                    continue
+
                 # Check if there is a multiple break
-                if lines[0].startswith("&\"info break "):
-                    asString = "<Multiple Break>"
-                    for line in lines:
-                        asString += line
-                    self.forwardMultipleBreakPointInfo(asString)
-                # FIXME: the line below might throw an execption; we should
-                # handle this gracefully
-                results = GdbResultParser.parse(lines)
-                lines = []
-                for res in results:
-                    self.forwardResult(res)
-            else:
-                lines.append(line)
+                if firstLine and line.startswith("&\"info break "):
+                    multipleBreak = []
+                if multipleBreak is not None:
+                    multipleBreak.append(line)
+                firstLine = False
+
+                if not line.strip():
+                    continue
+                try:
+                    res = GdbResultParser.parseRecord(line, lazy=True)
+                except helpers.excep.GdbError as e:
+                    logging.error("Could not parse gdb output: %s", e)
+                    continue
+                self.forwardResult(res)
+
+            del buf[:start]
 
     def forwardMultipleBreakPointInfo(self, lines):
         """Documentation Incomplete for this method!"""
@@ -90,42 +149,70 @@ class GdbReader(QThread):
         """
         type_ = res.type_
         if type_ == GdbOutput.RESULT_RECORD:
-            self.enqueueResult(res)
+            # keep the order of the records as seen by the GUI thread
+            self.flushRecords()
+            self.enqueueResult(res, self.notifications)
+            self.notifications = []
         elif type_ == GdbOutput.EXEC_ASYN or \
              type_ == GdbOutput.STATUS_ASYN or \
              type_ == GdbOutput.NOTIFY_ASYN:
-            self.asyncRecordReceived.emit(res)
+            # drop stale results before anyone can be told about the event
+            self.resultCache.handleAsyncRecord(res)
+            if type_ == GdbOutput.NOTIFY_ASYN:
+                self.notifications.append(res)
+            if self.consoleRecords:
+                self.flushRecords()
+            self.asyncRecords.append(res)
+            if len(self.asyncRecords) >= MAX_BATCH:
+                self.flushRecords()
         elif type_ == GdbOutput.CONSOLE_STREAM or \
              type_ == GdbOutput.TARGET_STREAM or \
              type_ == GdbOutput.LOG_STREAM:
-            self.consoleRecordReceived.emit(res)
+            if self.asyncRecords:
+                self.flushRecords()
+            self.consoleRecords.append(res)
+            if len(self.consoleRecords) >= MAX_BATCH:
+                self.flushRecords()
         else:
             raise helpers.excep.GdbError("Illegal type_!")
 
-    def enqueueResult(self, gdbresult):
-        # enqueueResult will be deprecated for other types
+    def flushRecords(self):
+        """Emit the collected async and stream records as one batch each."""
+        if self.asyncRecords:
+            self.asyncRecordsReceived.emit(self.asyncRecords)
+            self.asyncRecords = []
+        if self.consoleRecords:
+            self.consoleRecordsReceived.emit(self.consoleRecords)
+            self.consoleRecords = []
+
+    def registerCommand(self, future):
+        """Register a command that has been sent with a token. Its result
+        record will be handed to the future. Must be called before the
+        command is written to gdb.
+        """
+        self.pendingMutex.lock()
+        self.pendingCommands[future.token] = future
+        self.pendingMutex.unlock()
+
+    def enqueueResult(self, gdbresult, notifications=()):
+        """Hand a result record to the future of its command.
+        @param notifications    notify records gdb sent while executing the
+                                command, see CommandFuture.notifications
+        """
         assert(gdbresult.type_ == GdbOutput.RESULT_RECORD)
-        q = self.resultRecordQueue
-        m = self.resultRecordMutex
-        s = self.resultRecordSem
 
-        m.lock()
-        q.append(gdbresult)
-        m.unlock()
-        s.release()
+        self.pendingMutex.lock()
+        future = self.pendingCommands.pop(gdbresult.token, None)
+        self.pendingMutex.unlock()
 
-    def getResult(self, type_):
-        """Get the first result in the queue
-        """
-        # getResult will be deprecated for other types
-        assert(type_ == GdbOutput.RESULT_RECORD)
-        q = self.resultRecordQueue
-        m = self.resultRecordMutex
-        s = self.resultRecordSem
-
-        s.acquire()
-        m.lock()
-        res = q.popleft()
-        m.unlock()
-        return res
+        if future is None:
+            # all commands are sent with a token, nobody waits for this one
+            logging.warning("Dropping result with token %s, no command is "
+                            "waiting for it", gdbresult.token)
+            return
+
+        future.notifications = list(notifications)
+        future.setResult(gdbresult)
+        if future.callback is not None:
+            self.commandCompleted.emit(future)
 
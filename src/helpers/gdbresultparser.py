@@ -22,18 +22,23 @@
 #
 # For further information see <http://syscdbg.hagenberg.servus.at/>.
 
-"""Lexical parser for the gdb output
+"""Parser for the gdb output
 
-For futher information see the ply python module documentation.
+Records are decoded by a hand-written recursive descent decoder. The lexical
+rules and the grammar for ply below describe the same language and can be
+switched on to verify the decoder, see GdbResultParser.verify. For futher
+information see the ply python module documentation.
 """
 
 import ply.lex as lex
 import ply.yacc as yacc
 from .gdboutput import GdbOutput
 import helpers.excep
+import logging
+import os
 import re
 from .tools import unBackslashify
-from PyQt4.QtCore import QDir
+from PyQt4.QtCore import QMutex
 
 reserved = {
     "done": "DONE",
@@ -106,12 +111,72 @@ def t_error(t):
     raise TypeError("Unknown text '%s'" % (t.value,))
 
 
-class Result:
+_layouts = {}
+
+
+def _layout(names):
+    """Return the layout (the names and a name -> index mapping) for a tuple
+    of field names. Layouts are shared by all Results with the same fields,
+    eg. all children of a -var-list-children reply.
+    """
+    try:
+        return _layouts[names]
+    except KeyError:
+        l = _layouts[names] = (names, dict((n, i) for i, n in enumerate(names)))
+        return l
+
+
+class Result(object):
+    """A tuple of results. The fields are accessed as attributes; only their
+    values are stored per instance while the field names live in a layout
+    that is shared by all Results with the same fields.
+    """
+    __slots__ = ("_layout", "_values")
+
+    def __init__(self, assignments=()):
+        names = []
+        values = []
+        for a in assignments:
+            if a.dest in names:
+                values[names.index(a.dest)] = a.src
+            else:
+                names.append(a.dest)
+                values.append(a.src)
+        object.__setattr__(self, "_layout", _layout(tuple(names)))
+        object.__setattr__(self, "_values", values)
+
+    def __getattr__(self, name):
+        # only called for the fields, the slots are found before
+        try:
+            return self._values[self._layout[1][name]]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        names, index = self._layout
+        if name in index:
+            self._values[index[name]] = value
+        else:
+            object.__setattr__(self, "_layout", _layout(names + (name,)))
+            self._values.append(value)
+
+    def __copy__(self):
+        r = Result.__new__(Result)
+        object.__setattr__(r, "_layout", self._layout)
+        object.__setattr__(r, "_values", list(self._values))
+        return r
+
+    def _items(self):
+        """Return a list of (name, value) pairs of all fields."""
+        return zip(self._layout[0], self._values)
+
     def __str__(self):
-        return "RESULT(" + self.__dict__.__str__() + ")"
+        return "RESULT(" + dict(self._items()).__str__() + ")"
+
 
+class Assignment(object):
+    __slots__ = ("dest", "src")
 
-class Assignment:
     def __init__(self, dest, src):
         self.dest = dest
         self.src = src
@@ -235,9 +300,7 @@ def p_tuple_(p):
     '''tuple_ : LBRACE RBRACE
               | LBRACE result_list RBRACE'''
     if len(p) > 3:
-        p[0] = Result()
-        for a in p[2]:
-            setattr(p[0], a.dest, a.src)
+        p[0] = Result(p[2])
     else:
         p[0] = []
 #    print "tuple                                       ", p[0]
@@ -314,19 +377,375 @@ def p_top(p):
         p[0].type_ = GdbOutput.LOG_STREAM
 
 
+_TOKEN = re.compile(r'\d*')
+_NAME = re.compile(r'[\w\d_-]+')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_NESTING_SPECIAL = re.compile(r'["{}\[\]]')
+_ESCAPES = {"n": "\n", "t": "\t", "\"": "\"", "\\": "\\"}
+_STRING_END = (",", "}", "]", "")
+
+_RESULT_CLASSES = {
+    "done": GdbOutput.DONE,
+    "running": GdbOutput.RUNNING,
+    "connected": GdbOutput.CONNECTED,
+    "error": GdbOutput.ERROR,
+    "exit": GdbOutput.EXIT
+}
+
+_ASYNC_CLASSES = {
+    "stopped": GdbOutput.STOPPED,
+    "running": GdbOutput.RUNNING,
+    "thread-created": GdbOutput.THREAD_CREATED,
+    "thread-group-created": GdbOutput.THREAD_GROUP_CREATED,
+    "thread-group-added": GdbOutput.THREAD_GROUP_ADDED,
+    "thread-group-started": GdbOutput.THREAD_GROUP_STARTED,
+    "thread-exited": GdbOutput.THREAD_EXITED,
+    "thread-group-exited": GdbOutput.THREAD_GROUP_EXITED,
+    "thread-selected": GdbOutput.THREAD_SELECTED,
+    "library-loaded": GdbOutput.LIBRARY_LOADED,
+    "library-unloaded": GdbOutput.LIBRARY_UNLOADED,
+    "breakpoint-modified": GdbOutput.BREAKPOINT_MODIFIED,
+    "breakpoint-created": GdbOutput.BREAKPOINT_CREATED
+}
+
+_RECORD_TYPES = {
+    "^": GdbOutput.RESULT_RECORD,
+    "*": GdbOutput.EXEC_ASYN,
+    "+": GdbOutput.STATUS_ASYN,
+    "=": GdbOutput.NOTIFY_ASYN,
+    "~": GdbOutput.CONSOLE_STREAM,
+    "@": GdbOutput.TARGET_STREAM,
+    "&": GdbOutput.LOG_STREAM
+}
+
+
+def _syntaxError(line, pos):
+    return helpers.excep.GdbError("Syntax error in input, col %d: %s" %
+                                  (pos, line))
+
+
+def _decodeString(line, pos):
+    """Decode the C string starting at line[pos] and unescape it on the way.
+    Like the C_STRING token above, a quote only terminates the string if it
+    is followed by a delimiter or the end of the line.
+    """
+    chunks = []
+    start = i = pos + 1
+    while True:
+        m = _STRING_SPECIAL.search(line, i)
+        if m is None:
+            raise _syntaxError(line, pos)
+        j = m.start()
+        if line[j] == "\\":
+            chunks.append(line[start:j])
+            c = line[j + 1:j + 2]
+            chunks.append(_ESCAPES.get(c, "\\" + c))
+            start = i = j + 2
+        elif line[j + 1:j + 2] in _STRING_END:
+            chunks.append(line[start:j])
+            return "".join(chunks), j + 1
+        else:
+            i = j + 1
+
+
+def _skipString(line, pos):
+    """Return the position behind the C string starting at line[pos]"""
+    i = pos + 1
+    while True:
+        m = _STRING_SPECIAL.search(line, i)
+        if m is None:
+            raise _syntaxError(line, pos)
+        j = m.start()
+        if line[j] == "\\":
+            i = j + 2
+        elif line[j + 1:j + 2] in _STRING_END:
+            return j + 1
+        else:
+            i = j + 1
+
+
+def _skipValue(line, pos):
+    """Return the position behind the value starting at line[pos] without
+    decoding it.
+    """
+    c = line[pos:pos + 1]
+    if c == '"':
+        return _skipString(line, pos)
+    elif c != "{" and c != "[":
+        raise _syntaxError(line, pos)
+
+    depth = 0
+    i = pos
+    while True:
+        m = _NESTING_SPECIAL.search(line, i)
+        if m is None:
+            raise _syntaxError(line, pos)
+        j = m.start()
+        c = line[j]
+        if c == '"':
+            i = _skipString(line, j)
+            continue
+        elif c == "{" or c == "[":
+            depth += 1
+        else:
+            depth -= 1
+        i = j + 1
+        if depth == 0:
+            return i
+
+
+def _decodeName(line, pos):
+    m = _NAME.match(line, pos)
+    if m is None:
+        raise _syntaxError(line, pos)
+    return m.group(), m.end()
+
+
+def _decodeValue(line, pos):
+    c = line[pos:pos + 1]
+    if c == '"':
+        return _decodeString(line, pos)
+    elif c == "{":
+        if line[pos + 1:pos + 2] == "}":
+            return [], pos + 2
+        results, pos = _decodeResultList(line, pos + 1)
+        if line[pos:pos + 1] != "}":
+            raise _syntaxError(line, pos)
+        return Result(results), pos + 1
+    elif c == "[":
+        if line[pos + 1:pos + 2] == "]":
+            return [], pos + 2
+        if _NAME.match(line, pos + 1):
+            values, pos = _decodeResultList(line, pos + 1)
+        else:
+            values, pos = _decodeValueList(line, pos + 1)
+        if line[pos:pos + 1] != "]":
+            raise _syntaxError(line, pos)
+        return values, pos + 1
+    else:
+        raise _syntaxError(line, pos)
+
+
+def _decodeResultList(line, pos):
+    results = []
+    while True:
+        name, pos = _decodeName(line, pos)
+        if line[pos:pos + 1] != "=":
+            raise _syntaxError(line, pos)
+        value, pos = _decodeValue(line, pos + 1)
+        results.append(Assignment(name, value))
+        if line[pos:pos + 1] != ",":
+            return results, pos
+        pos += 1
+
+
+def _decodeValueList(line, pos):
+    values = []
+    while True:
+        value, pos = _decodeValue(line, pos)
+        values.append(value)
+        if line[pos:pos + 1] != ",":
+            return values, pos
+        pos += 1
+
+
+class LazyGdbOutput(GdbOutput):
+    """A result record that only knows where its top-level fields start in
+    the raw line. A field is decoded (and kept) when it is first accessed, so
+    large replies of which only a few fields are used are cheap.
+    """
+    def __init__(self, line):
+        GdbOutput.__init__(self)
+        self._line = line
+        self._offsets = {}
+
+    def __getattr__(self, name):
+        # only called if the field has not been decoded yet
+        offsets = self.__dict__.get("_offsets")
+        if not offsets or name not in offsets:
+            raise AttributeError(name)
+        value, _ = _decodeValue(self._line, offsets.pop(name))
+        setattr(self, name, value)
+        return value
+
+    def decodeAll(self):
+        """Decode all fields that have not been accessed yet."""
+        for name in list(self._offsets.keys()):
+            getattr(self, name)
+        del self._line
+        del self._offsets
+
+
+def _indexResultList(line, pos, out):
+    """Store the offset of each value in the result list starting at
+    line[pos] in out._offsets.
+    """
+    while True:
+        name, pos = _decodeName(line, pos)
+        if line[pos:pos + 1] != "=":
+            raise _syntaxError(line, pos)
+        out._offsets[name] = pos + 1
+        pos = _skipValue(line, pos + 1)
+        if line[pos:pos + 1] != ",":
+            return pos
+        pos += 1
+
+
+def decodeRecord(line, lazy=False):
+    """Decode a single, stripped line of gdb output in one pass. The returned
+    objects are the same as the ones built by the ply grammar. If lazy is
+    set, the fields of result records are only decoded when accessed, see
+    LazyGdbOutput.
+    """
+    token = _TOKEN.match(line)
+    start = token.end()
+    type_ = _RECORD_TYPES.get(line[start:start + 1])
+    if type_ is None:
+        raise _syntaxError(line, start)
+    if lazy and type_ == GdbOutput.RESULT_RECORD:
+        out = LazyGdbOutput(line)
+    else:
+        out = GdbOutput()
+    out.type_ = type_
+    if start:
+        out.token = int(token.group())
+
+    if type_ >= GdbOutput.CONSOLE_STREAM:
+        if line[start + 1:start + 2] != '"':
+            raise _syntaxError(line, start + 1)
+        out.string, pos = _decodeString(line, start + 1)
+    else:
+        name, pos = _decodeName(line, start + 1)
+        classes = _RESULT_CLASSES if type_ == GdbOutput.RESULT_RECORD \
+                else _ASYNC_CLASSES
+        if name not in classes:
+            raise helpers.excep.GdbError("Got " + name +
+                                         " which cannot occur here!")
+        out.class_ = classes[name]
+
+        if line[pos:pos + 1] == "," and isinstance(out, LazyGdbOutput):
+            pos = _indexResultList(line, pos + 1, out)
+        elif line[pos:pos + 1] == ",":
+            results, pos = _decodeResultList(line, pos + 1)
+            if type_ == GdbOutput.RESULT_RECORD:
+                for a in results:
+                    setattr(out, a.dest, a.src)
+            else:
+                out.results = results
+
+    if pos != len(line):
+        raise _syntaxError(line, pos)
+    return out
+
+
+def sameRecord(a, b):
+    """Compare two (parts of) parsed records structurally."""
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(sameRecord(x, y) for x, y in zip(a, b))
+    elif isinstance(a, Result) and isinstance(b, Result):
+        fieldsA = dict(a._items())
+        fieldsB = dict(b._items())
+        return sorted(fieldsA.keys()) == sorted(fieldsB.keys()) and \
+                all(sameRecord(v, fieldsB[k]) for k, v in fieldsA.items())
+    elif isinstance(a, Assignment) and isinstance(b, Assignment):
+        return a.dest == b.dest and sameRecord(a.src, b.src)
+    elif hasattr(a, "__dict__") and hasattr(b, "__dict__"):
+        if a.__class__ is not b.__class__ or \
+                sorted(a.__dict__.keys()) != sorted(b.__dict__.keys()):
+            return False
+        return all(sameRecord(v, b.__dict__[k]) for k, v in a.__dict__.items())
+    else:
+        return a == b
+
+
 class GdbResultParser:
+    """Parser for gdb's MI output.
+
+    Records are decoded by decodeRecord(). If verify is set, every record is
+    also parsed with the ply grammar; differences are logged and the result
+    of the grammar is used. The lexer and the LALR tables for ply are built
+    only once per process and shared by all callers. The tables are
+    generated into the module gdbresultparsetab next to this file (by make
+    or on the first build), so ply only has to regenerate them if the
+    grammar changes.
+    """
+    verify = False
+
+    __lexer = None
+    __parser = None
+    __mutex = QMutex()
+
     @classmethod
-    def parse(cls, lines):
-        """Parse the lines with the above defined lexical rules
+    def build(cls):
+        """Build the ply lexer and parser if they are needed and that has not
+        happened yet. Call this at startup to avoid paying the cost on the
+        first prompt.
         """
-        lex.lex(reflags=re.DOTALL)
+        if not cls.verify:
+            return
+        cls.__mutex.lock()
+        try:
+            cls.__build()
+        finally:
+            cls.__mutex.unlock()
 
-        parser = yacc.yacc(start='top', debug=0, outputdir=str(QDir.homePath()) + "/.ricodebug")
-        r = []
-        for line in lines:
-            line = line.strip()
-            r.append(parser.parse(line))
-            r[-1].raw = line
+    @classmethod
+    def __build(cls):
+        if cls.__parser is None:
+            cls.__lexer = lex.lex(reflags=re.DOTALL)
+            cls.__parser = yacc.yacc(start='top', debug=0,
+                                     tabmodule="gdbresultparsetab",
+                                     outputdir=os.path.dirname(os.path.abspath(__file__)))
 
+    @classmethod
+    def parseRecordPly(cls, line):
+        """Parse a single line of gdb output with the ply grammar"""
+        line = line.strip()
+        # the grammar does not know about tokens, see decodeRecord()
+        token = _TOKEN.match(line)
+        # ply's lexer and parser keep their state in the objects themselves,
+        # so only one thread may use them at a time
+        cls.__mutex.lock()
+        try:
+            cls.__build()
+            r = cls.__parser.parse(line[token.end():], lexer=cls.__lexer)
+        finally:
+            cls.__mutex.unlock()
+        if token.end():
+            r.token = int(token.group())
+        r.raw = line
         return r
 
+    @classmethod
+    def parseRecord(cls, line, lazy=False):
+        """Parse a single line of gdb output and return the resulting record
+        @param lazy    bool, decode the fields of result records on first
+                       access only, see LazyGdbOutput
+        """
+        line = line.strip()
+        if cls.verify:
+            return cls.__verifyRecord(line)
+        r = decodeRecord(line, lazy)
+        r.raw = line
+        return r
+
+    @classmethod
+    def __verifyRecord(cls, line):
+        try:
+            r = decodeRecord(line)
+        except helpers.excep.GdbError as e:
+            logging.warning("Decoder failed on '%s': %s", line, e)
+            r = None
+        else:
+            r.raw = line
+
+        expected = cls.parseRecordPly(line)
+        if r is not None and not sameRecord(r, expected):
+            logging.warning("Decoder and grammar disagree on '%s'", line)
+        return expected
+
+    @classmethod
+    def parse(cls, lines, lazy=False):
+        """Parse the lines and return a list of records
+        """
+        return [cls.parseRecord(line, lazy) for line in lines]
@@ -0,0 +1,118 @@
+# ricodebug - A GDB frontend which focuses on visually supported
+# debugging using data structure graphs and SystemC features.
+#
+# Copyright (C) 2011  The ricodebug project team at the
+# Upper Austrian University Of Applied Sciences Hagenberg,
+# Department Embedded Systems Design
+#
+# This file is part of ricodebug.
+#
+# ricodebug is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For further information see <http://syscdbg.hagenberg.servus.at/>.
+
+"""Memory and time benchmark for the parsed gdb records
+
+Usage: python -m helpers.gdbresultparserbench [captured_mi_output...]
+
+Each file holds gdb's MI output, one record per line (eg. captured with
+'gdb -i mi | tee'). Prompts and empty lines are skipped. Without files, a
+-var-list-children reply with 1000 children is used. The size of the parsed
+records is compared to the size the same records would have with a
+__dict__ per tuple and assignment.
+"""
+
+import sys
+import time
+from helpers.gdbresultparser import GdbResultParser, Result, Assignment
+
+
+class _DictResult:
+    pass
+
+
+class _DictAssignment:
+    def __init__(self, dest, src):
+        self.dest = dest
+        self.src = src
+
+
+def _sampleReply(n=1000):
+    children = ",".join('child={name="var1.public.array.%d",exp="%d",'
+                        'numchild="0",value="%d",type="int",'
+                        'thread-id="1"}' % (i, i, i * 7) for i in range(n))
+    return '^done,numchild="%d",children=[%s],has_more="0"' % (n, children)
+
+
+def _toDicts(v):
+    """Convert a parsed value to the per-instance __dict__ representation."""
+    if isinstance(v, list):
+        return [_toDicts(x) for x in v]
+    elif isinstance(v, Assignment):
+        return _DictAssignment(v.dest, _toDicts(v.src))
+    elif isinstance(v, Result):
+        r = _DictResult()
+        for name, value in v._items():
+            setattr(r, name, _toDicts(value))
+        return r
+    return v
+
+
+def _sizeOf(v, seen):
+    """Return the bytes used by v and everything it references."""
+    if id(v) in seen:
+        return 0
+    seen.add(id(v))
+    size = sys.getsizeof(v)
+    if isinstance(v, list):
+        size += sum(_sizeOf(x, seen) for x in v)
+    elif isinstance(v, Result):
+        size += _sizeOf(v._values, seen)
+    elif isinstance(v, Assignment):
+        size += _sizeOf(v.dest, seen) + _sizeOf(v.src, seen)
+    elif hasattr(v, "__dict__"):
+        size += sys.getsizeof(v.__dict__)
+        size += sum(_sizeOf(k, seen) + _sizeOf(x, seen)
+                    for k, x in v.__dict__.items())
+    return size
+
+
+def _fields(record):
+    """Return the decoded top-level values of a record."""
+    return [v for k, v in record.__dict__.items()
+            if k not in ("class_", "type_", "string", "raw")]
+
+
+def main(paths):
+    lines = []
+    for path in paths:
+        with open(path) as f:
+            lines += [l for l in f if l.strip() and not l.startswith("(gdb)")]
+    if not lines:
+        lines = [_sampleReply()]
+
+    start = time.time()
+    records = GdbResultParser.parse(lines)
+    elapsed = time.time() - start
+
+    values = [_fields(r) for r in records]
+    slotted = _sizeOf(values, set())
+    dicts = _sizeOf(_toDicts(values), set())
+
+    print("%d records parsed in %.1f ms" % (len(records), elapsed * 1000))
+    print("slotted records:  %10d bytes" % slotted)
+    print("__dict__ records: %10d bytes" % dicts)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,136 @@
+# ricodebug - A GDB frontend which focuses on visually supported
+# debugging using data structure graphs and SystemC features.
+#
+# Copyright (C) 2011  The ricodebug project team at the
+# Upper Austrian University Of Applied Sciences Hagenberg,
+# Department Embedded Systems Design
+#
+# This file is part of ricodebug.
+#
+# ricodebug is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For further information see <http://syscdbg.hagenberg.servus.at/>.
+
+"""Tracepoint collector that runs inside gdb's Python interpreter
+
+This module is not used by the frontend itself; the gdbinit script written by
+helpers.gdbinit.GDBInit imports it into gdb. It adds the command
+'rico-trace', which creates breakpoints whose stop() method reads the traced
+expressions into a buffer and lets the inferior continue at once. The
+frontend fetches the buffer with 'rico-trace flush FILE' whenever the
+inferior stopped, see TracepointModel.pullCollectedData.
+
+The module must run with the Python gdb was built with, Python 2 or 3.
+"""
+
+import json
+import time
+import gdb
+
+# maximum number of hits kept until the buffer is flushed, later hits are
+# only counted
+MAX_HITS = 1000000
+
+
+class _Collector(object):
+    def __init__(self):
+        # collecting breakpoints by number
+        self.tracepoints = {}
+        self.clear()
+
+    def clear(self):
+        # (breakpoint number, time, thread id, values) of each hit
+        self.hits = []
+        self.dropped = 0
+
+    def flush(self, fileName):
+        """Write the buffer as JSON to fileName and clear it."""
+        types = {}
+        for number, tp in list(self.tracepoints.items()):
+            if not tp.is_valid():
+                del self.tracepoints[number]
+            else:
+                types[number] = tp.types
+        with open(fileName, "w") as f:
+            json.dump({"types": types, "hits": self.hits,
+                       "dropped": self.dropped}, f)
+        self.clear()
+
+collector = _Collector()
+
+
+class CollectingTracepoint(gdb.Breakpoint):
+    """Breakpoint that records the values of expressions instead of stopping
+    the inferior."""
+
+    def __init__(self, location):
+        gdb.Breakpoint.__init__(self, location)
+        self.expressions = []
+        # type of each expression, known after the first hit
+        self.types = []
+
+    def setExpressions(self, expressions):
+        self.expressions = expressions
+        self.types = [None] * len(expressions)
+
+    def stop(self):
+        if len(collector.hits) >= MAX_HITS:
+            collector.dropped += 1
+            return False
+
+        values = []
+        for i, exp in enumerate(self.expressions):
+            try:
+                value = gdb.parse_and_eval(exp)
+                if self.types[i] is None:
+                    self.types[i] = str(value.type.strip_typedefs())
+                values.append(str(value))
+            except gdb.error:
+                values.append(None)
+        thread = gdb.selected_thread()
+        collector.hits.append((self.number, time.time(),
+                               thread.num if thread is not None else 0, values))
+        return False
+
+
+class RicoTraceCommand(gdb.Command):
+    """Manage tracepoints that collect values without stopping.
+
+rico-trace insert LOCATION          create a collecting tracepoint
+rico-trace expressions NUMBER JSON  set the expressions (a JSON list) to trace
+rico-trace flush FILE               write the collected values to FILE
+rico-trace clear                    drop the collected values"""
+
+    def __init__(self):
+        gdb.Command.__init__(self, "rico-trace", gdb.COMMAND_BREAKPOINTS)
+
+    def invoke(self, arg, from_tty):
+        cmd, _, arg = arg.strip().partition(" ")
+        if cmd == "insert":
+            tp = CollectingTracepoint(arg.strip())
+            collector.tracepoints[tp.number] = tp
+        elif cmd == "expressions":
+            number, _, expressions = arg.strip().partition(" ")
+            tp = collector.tracepoints.get(int(number))
+            if tp is None:
+                raise gdb.GdbError("No collecting tracepoint %s." % number)
+            tp.setExpressions(json.loads(expressions))
+        elif cmd == "flush":
+            collector.flush(arg.strip())
+        elif cmd == "clear":
+            collector.clear()
+        else:
+            raise gdb.GdbError("Unknown rico-trace command '%s'." % cmd)
+
+RicoTraceCommand()
@@ -0,0 +1,106 @@
+# ricodebug - A GDB frontend which focuses on visually supported
+# debugging using data structure graphs and SystemC features.
+#
+# Copyright (C) 2011  The ricodebug project team at the
+# Upper Austrian University Of Applied Sciences Hagenberg,
+# Department Embedded Systems Design
+#
+# This file is part of ricodebug.
+#
+# ricodebug is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For further information see <http://syscdbg.hagenberg.servus.at/>.
+
+
+"""Cache for the results of gdb queries that do not change while the
+inferior is stopped
+"""
+
+from PyQt4.QtCore import QMutex
+from .gdboutput import GdbOutput
+
+
+class ResultCache:
+    """Maps command strings to their result records. Every entry belongs to
+    the stop generation it was retrieved in; the generation is advanced
+    whenever the inferior runs or stops or the loaded code changes, which
+    drops all entries at once.
+
+    The cache is used from the GUI thread, the dispatcher thread and the
+    reader thread, so all accesses are serialized with a mutex.
+    """
+
+    # async records after which cached results are stale
+    INVALIDATING_RECORDS = (GdbOutput.RUNNING,
+                            GdbOutput.STOPPED,
+                            GdbOutput.LIBRARY_LOADED,
+                            GdbOutput.LIBRARY_UNLOADED,
+                            GdbOutput.THREAD_SELECTED)
+
+    def __init__(self):
+        self.__mutex = QMutex()
+        self.__entries = {}
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def lookup(self, cmd):
+        """Return the cached result of cmd or None. Counts a hit or a miss.
+        """
+        self.__mutex.lock()
+        res = self.__entries.get(cmd)
+        if res is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        self.__mutex.unlock()
+        return res
+
+    def store(self, cmd, res, generation):
+        """Remember res as the result of cmd.
+        @param generation   the generation at the time cmd was sent; if the
+                            cache has been invalidated since, res is dropped
+        """
+        self.__mutex.lock()
+        if generation == self.generation:
+            self.__entries[cmd] = res
+        self.__mutex.unlock()
+
+    def invalidate(self):
+        """Start a new generation and forget all cached results."""
+        self.__mutex.lock()
+        self.generation += 1
+        self.invalidations += 1
+        self.__entries = {}
+        self.__mutex.unlock()
+
+    def handleAsyncRecord(self, rec):
+        """Invalidate the cache if rec tells that cached results are stale.
+        Called by the reader as soon as the record was parsed.
+        """
+        if rec.class_ in self.INVALIDATING_RECORDS:
+            self.invalidate()
+
+    def resetCounters(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def report(self):
+        """Return a summary of the hit/miss counters."""
+        total = self.hits + self.misses
+        rate = 100.0 * self.hits / total if total else 0.0
+        return "%d hits, %d misses (%.1f%% hit rate), %d invalidations" % \
+                (self.hits, self.misses, rate, self.invalidations)
@@ -0,0 +1,92 @@
+import unittest
+from helpers.resultcache import ResultCache
+from helpers.gdboutput import GdbOutput
+from helpers.gdbconnector import GdbConnector
+
+
+class Record:
+    def __init__(self, class_):
+        self.class_ = class_
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResultCache()
+
+    def tearDown(self):
+        pass
+
+    def test1(self):
+        # stored results are found until the cache is invalidated
+        res = Record(GdbOutput.DONE)
+        self.assertEqual(self.cache.lookup("-stack-info-depth"), None)
+        self.cache.store("-stack-info-depth", res, self.cache.generation)
+        self.assertTrue(self.cache.lookup("-stack-info-depth") is res)
+        self.assertEqual(self.cache.lookup("-thread-info"), None)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+        self.cache.invalidate()
+        self.assertEqual(self.cache.lookup("-stack-info-depth"), None)
+        self.assertEqual(self.cache.invalidations, 1)
+
+    def test2(self):
+        # results of an older generation are dropped
+        generation = self.cache.generation
+        self.cache.invalidate()
+        self.assertEqual(self.cache.generation, generation + 1)
+        self.cache.store("-stack-info-depth", Record(GdbOutput.DONE), generation)
+        self.assertEqual(self.cache.lookup("-stack-info-depth"), None)
+
+        self.cache.store("-stack-info-depth", Record(GdbOutput.DONE),
+                         self.cache.generation)
+        self.assertNotEqual(self.cache.lookup("-stack-info-depth"), None)
+
+    def test3(self):
+        # only records that change the state of the inferior invalidate
+        invalidating = [GdbOutput.RUNNING, GdbOutput.STOPPED,
+                        GdbOutput.LIBRARY_LOADED, GdbOutput.LIBRARY_UNLOADED,
+                        GdbOutput.THREAD_SELECTED]
+        classes = [getattr(GdbOutput, name) for name in dir(GdbOutput)
+                   if name.isupper()]
+        self.assertTrue(set(invalidating) <= set(classes))
+        for class_ in classes:
+            self.cache.store("-stack-info-depth", Record(GdbOutput.DONE),
+                             self.cache.generation)
+            generation = self.cache.generation
+            self.cache.handleAsyncRecord(Record(class_))
+            cached = self.cache.lookup("-stack-info-depth")
+            if class_ in invalidating:
+                self.assertEqual(self.cache.generation, generation + 1)
+                self.assertEqual(cached, None)
+            else:
+                self.assertEqual(self.cache.generation, generation)
+                self.assertNotEqual(cached, None)
+
+    def test4(self):
+        self.cache.lookup("-stack-info-depth")
+        self.cache.invalidate()
+        self.cache.resetCounters()
+        self.assertEqual((self.cache.hits, self.cache.misses,
+                          self.cache.invalidations), (0, 0, 0))
+        self.assertEqual(self.cache.report(),
+                         "0 hits, 0 misses (0.0% hit rate), 0 invalidations")
+
+    def test5(self):
+        # a query that runs while the frame is being selected must not leave
+        # its result in the cache
+        class Connector(GdbConnector):
+            def execute(self, cmd, error_msg=None):
+                if cmd.startswith("-stack-select-frame"):
+                    # the result of a concurrent query arrives after the
+                    # invalidation before the command was sent
+                    self.resultCache.store("-stack-info-depth",
+                                           Record(GdbOutput.DONE),
+                                           self.resultCache.generation)
+                return Record(GdbOutput.DONE)
+
+        connector = Connector()
+        connector.selectStackFrame(1)
+        self.assertEqual(connector.resultCache.lookup("-stack-info-depth"), None)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -46,8 +46,8 @@ class SignalProxy(QObject):
     inferiorStoppedNormally = pyqtSignal('PyQt_PyObject')
     inferiorIsRunning = pyqtSignal('PyQt_PyObject')
     executableOpened = pyqtSignal('PyQt_PyObject')
-    threadCreated = pyqtSignal('PyQt_PyObject')
-    threadExited = pyqtSignal('PyQt_PyObject')
+    threadsCreated = pyqtSignal('PyQt_PyObject')
+    threadsExited = pyqtSignal('PyQt_PyObject')
     AddWatch = pyqtSignal('PyQt_PyObject')
 
     def __init__(self, distributedObjects):
@@ -75,11 +75,11 @@ class SignalProxy(QObject):
         '''SLOT is called from signal of main program and passes another signal on to plugins'''
         self.executableOpened.emit(filename)
 
-    def emitThreadCreated(self, rec):
-        self.threadCreated.emit(rec)
+    def emitThreadsCreated(self, recs):
+        self.threadsCreated.emit(recs)
 
-    def emitThreadExited(self, rec):
-        self.threadExited.emit(rec)
+    def emitThreadsExited(self, recs):
+        self.threadsExited.emit(recs)
 
     def emitInferiorIsRunning(self, rec):
         self.inferiorIsRunning.emit(rec)
@@ -181,6 +181,9 @@ class SignalProxy(QObject):
     def gdbEvaluateExpression(self, exp):
         return self.distributedObjects.debugController.evaluateExpression(exp)
 
+    def gdbEvaluateExpressions(self, exps):
+        return self.distributedObjects.debugController.evaluateExpressions(exps)
+
     def gdbGetStackDepth(self):
         return self.distributedObjects.debugController.getStackDepth()
 
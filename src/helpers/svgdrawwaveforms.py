@@ -26,6 +26,63 @@ class SvgDrawWaveform(SvgDraw):
         self.wave_list = [{"values" : [], "position": (5, 1 + (self.waveheight+5)*i)} for i in range(no_waves)]
         SvgDraw.refresh(self, self.pic_width, self.pic_height)
 
+    def refreshWindow(self, no_waves, width):
+        """Start a new picture for no_waves waves that are width px wide
+        (without the name in front of them)."""
+        self.currentX = 0
+        self.no_waves = no_waves
+        self.pic_height = no_waves * (self.waveheight + 5)
+        self.pic_width = 45 + width + 60
+        self.wave_list = [{"values" : [], "position": (5, 1 + (self.waveheight+5)*i)} for i in range(no_waves)]
+        SvgDraw.refresh(self, self.pic_width, self.pic_height)
+
+    def fitsPeriods(self, count, width):
+        """Return True if count values can be drawn one period each."""
+        return count * (self.period + self.distance) <= width
+
+    def drawRanges(self, i, ranges, type_, name, width):
+        """Draw a wave from the minimum and maximum of consecutive parts of
+        the traced values, one part after the other over width px.
+        @param ranges    list of (min, max) tuples, see
+                         wavepyramid.MinMaxPyramid.query()
+        """
+        x, top = self.wave_list[i]["position"]
+        self.drawText(x, top + self.height * 0.6, name)
+        x += 40
+        valid = [r for r in ranges if r[0] == r[0]]
+        if not valid:
+            return
+        if type_ == "bool":
+            lo, hi = 0, 1
+        else:
+            lo = min(r[0] for r in valid)
+            hi = max(r[1] for r in valid)
+            self.drawText(x + width + 5, top + 10, str(hi))
+            self.drawText(x + width + 5, top + self.height, str(lo))
+
+        if hi == lo:
+            y = lambda v: top + self.height / 2
+        else:
+            scale = self.height / float(hi - lo)
+            y = lambda v: top + self.height - (v - lo) * scale
+
+        step = float(width) / len(ranges)
+        drawing = False
+        for mn, mx in ranges:
+            if mn != mn:
+                # no valid value in this part
+                drawing = False
+            elif drawing:
+                self.ctx.line_to(x, y(mn))
+                self.ctx.line_to(x, y(mx))
+            else:
+                self.ctx.move_to(x, y(mn))
+                self.ctx.line_to(x, y(mx))
+                drawing = True
+            x += step
+            if drawing:
+                self.ctx.line_to(x, y(mx))
+
     def setBoolStartLevel(self, level):
         self.currentX += self.distance / 2
         self.ctx.move_to(self.currentX, self.currentY)
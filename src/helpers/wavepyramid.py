@@ -0,0 +1,176 @@
+# ricodebug - A GDB frontend which focuses on visually supported
+# debugging using data structure graphs and SystemC features.
+#
+# Copyright (C) 2011  The ricodebug project team at the
+# Upper Austrian University Of Applied Sciences Hagenberg,
+# Department Embedded Systems Design
+#
+# This file is part of ricodebug.
+#
+# ricodebug is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For further information see <http://syscdbg.hagenberg.servus.at/>.
+
+"""Min/max decimation of traced values for drawing waveforms
+
+Drawing a waveform only needs, for every pixel column, the smallest and the
+largest value of the samples falling into it. MinMaxPyramid keeps the
+minimum and maximum of blocks of FACTOR, FACTOR**2, ... samples, so these can
+be computed for any window of a trace by looking at no more than about FACTOR
+entries per pixel, independent of the length of the trace.
+"""
+
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+NAN = float("nan")
+
+
+def _min(values):
+    """Minimum of values ignoring NaN, NaN if there is none."""
+    values = [v for v in values if v == v]
+    return min(values) if values else NAN
+
+
+def _max(values):
+    values = [v for v in values if v == v]
+    return max(values) if values else NAN
+
+
+class MinMaxPyramid(object):
+    """Minima and maxima of the values of a samplestore.SampleColumn over
+    blocks of increasing size. The pyramid is extended incrementally by
+    update(); only the last, incomplete block of every level is recomputed.
+    """
+
+    # number of entries of a level combined into one of the next level
+    FACTOR = 8
+
+    def __init__(self, column):
+        """ Constructor
+        @param column    models.samplestore.SampleColumn, the traced values
+        """
+        self.column = column
+        self.reset()
+
+    def reset(self):
+        # (minima, maxima) of blocks of FACTOR ** (k + 1) samples for level k
+        self.levels = []
+        # number of complete blocks of each level
+        self.__complete = []
+        self.length = 0
+        # the array the pyramid was built from, replaced by setType()
+        self.__values = self.column.values
+
+    def __len__(self):
+        return self.length
+
+    def update(self):
+        """Add the samples appended to the column since the last update."""
+        n = len(self.column)
+        if n < self.length or self.column.values is not self.__values:
+            # the column was cleared or converted to another type
+            self.reset()
+        if n == self.length:
+            return
+        self.length = n
+
+        srcMin = srcMax = self.column.values
+        srcLen = n
+        k = 0
+        while srcLen > 1:
+            if k == len(self.levels):
+                self.levels.append((array("d"), array("d")))
+                self.__complete.append(0)
+            mins, maxs = self.levels[k]
+            first = self.__complete[k]
+            del mins[first:]
+            del maxs[first:]
+            self.__reduce(srcMin, srcMax, srcLen, first, mins, maxs)
+            self.__complete[k] = srcLen // self.FACTOR
+
+            srcMin, srcMax, srcLen = mins, maxs, len(mins)
+            k += 1
+        del self.levels[k:]
+        del self.__complete[k:]
+
+    def __reduce(self, srcMin, srcMax, srcLen, first, mins, maxs):
+        """Append the minima and maxima of the blocks first, first + 1, ...
+        of FACTOR entries of the source arrays to mins and maxs."""
+        f = self.FACTOR
+        full = srcLen // f
+        if numpy is not None and full > first:
+            # fmin and fmax ignore NaN
+            lo = numpy.frombuffer(srcMin, dtype=srcMin.typecode)[first * f:full * f]
+            hi = numpy.frombuffer(srcMax, dtype=srcMax.typecode)[first * f:full * f]
+            mins.extend(numpy.fmin.reduce(lo.reshape(-1, f), axis=1).astype("d").tolist())
+            maxs.extend(numpy.fmax.reduce(hi.reshape(-1, f), axis=1).astype("d").tolist())
+            first = full
+        for b in xrange(first, (srcLen + f - 1) // f):
+            mins.append(_min(srcMin[b * f:(b + 1) * f]))
+            maxs.append(_max(srcMax[b * f:(b + 1) * f]))
+
+    def query(self, start, end, buckets):
+        """Return the minimum and maximum of the samples start to end - 1
+        split into buckets (at most end - start) parts of equal size.
+        @return    list of (min, max) tuples, (NaN, NaN) for buckets without
+                   valid samples
+        """
+        end = min(end, self.length)
+        start = max(0, start)
+        if end <= start or buckets <= 0:
+            return []
+        buckets = min(buckets, end - start)
+        perBucket = float(end - start) / buckets
+
+        # the coarsest level whose blocks are not larger than a bucket
+        level = -1
+        size = 1
+        while level + 1 < len(self.levels) and size * self.FACTOR <= perBucket:
+            level += 1
+            size *= self.FACTOR
+
+        result = []
+        for i in xrange(buckets):
+            lo = int(start + i * perBucket)
+            hi = max(lo + 1, int(start + (i + 1) * perBucket))
+            mins = []
+            maxs = []
+            self.__collect(lo, hi, level, mins, maxs)
+            result.append((_min(mins), _max(maxs)))
+        return result
+
+    def __collect(self, lo, hi, level, mins, maxs):
+        """Append the minima and maxima covering exactly the samples lo to
+        hi - 1 to mins and maxs: the blocks of level (and the levels below)
+        that lie completely inside, the samples at the borders as they are.
+        """
+        while level >= 0 and lo < hi:
+            size = self.FACTOR ** (level + 1)
+            first = (lo + size - 1) // size
+            last = hi // size
+            if first < last:
+                levelMins, levelMaxs = self.levels[level]
+                mins.extend(levelMins[first:last])
+                maxs.extend(levelMaxs[first:last])
+                self.__collect(last * size, hi, level - 1, mins, maxs)
+                hi = first * size
+            level -= 1
+        values = self.column.values
+        mins.extend(values[lo:hi])
+        maxs.extend(values[lo:hi])
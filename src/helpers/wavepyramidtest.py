@@ -0,0 +1,116 @@
+import random
+import unittest
+from helpers import wavepyramid
+from helpers.wavepyramid import MinMaxPyramid
+from models.samplestore import SampleStore
+
+
+def bruteForce(values, start, end, buckets):
+    """ The minima and maxima of query() computed from the samples. """
+    end = min(end, len(values))
+    buckets = min(buckets, end - start)
+    perBucket = float(end - start) / buckets
+    result = []
+    for i in range(buckets):
+        lo = int(start + i * perBucket)
+        hi = max(lo + 1, int(start + (i + 1) * perBucket))
+        valid = [v for v in values[lo:hi] if v == v]
+        if valid:
+            result.append((min(valid), max(valid)))
+        else:
+            result.append(None)
+    return result
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.random = random.Random(42)
+        self.store = SampleStore()
+        self.column = self.store.addColumn("x", "int")
+        self.pyramid = MinMaxPyramid(self.column)
+
+    def tearDown(self):
+        pass
+
+    def append(self, n, missing=0.0):
+        for _ in range(n):
+            hit = len(self.store) + 1
+            if self.random.random() < missing:
+                value = None
+            else:
+                value = str(self.random.randint(-1000, 1000))
+            self.store.append(hit, 1, float(hit), [value])
+
+    def check(self, start, end, buckets):
+        expected = bruteForce(self.column.values.tolist(), start, end, buckets)
+        result = self.pyramid.query(start, end, buckets)
+        self.assertEqual(len(result), len(expected))
+        for r, e in zip(result, expected):
+            if e is None:
+                self.assertTrue(r[0] != r[0] and r[1] != r[1])
+            else:
+                self.assertEqual(r, e)
+
+    def checkAll(self):
+        n = len(self.column)
+        for buckets in (1, 3, 7, 64, 500, n):
+            self.check(0, n, buckets)
+            self.check(n // 3, n - n // 5, buckets)
+            self.check(13, 13 + 2 * wavepyramid.MinMaxPyramid.FACTOR ** 2 + 5,
+                       buckets)
+
+    def test1(self):
+        # query() against the samples, for all levels
+        self.append(5000)
+        self.pyramid.update()
+        self.assertEqual(len(self.pyramid), 5000)
+        self.assertTrue(len(self.pyramid.levels) >= 3)
+        self.checkAll()
+
+    def test2(self):
+        # update() after appends only extends the pyramid
+        self.append(1000)
+        self.pyramid.update()
+        for n in (1, 7, 8, 63, 1000, 3001):
+            self.append(n)
+            self.pyramid.update()
+            self.assertEqual(len(self.pyramid), len(self.column))
+            self.checkAll()
+
+        # the levels equal those of a pyramid built at once
+        other = MinMaxPyramid(self.column)
+        other.update()
+        self.assertEqual(self.pyramid.levels, other.levels)
+
+    def test3(self):
+        # update() after discard rebuilds the pyramid from the new array
+        self.append(3000)
+        self.pyramid.update()
+        self.store.discard(1000)
+        self.append(200)
+        self.pyramid.update()
+        self.assertEqual(len(self.pyramid), 2200)
+        self.checkAll()
+
+        # also if the column is as long as before
+        self.store.discard(200)
+        self.append(200)
+        self.pyramid.update()
+        self.checkAll()
+
+    def test4(self):
+        # missing values are ignored
+        self.store.columns[0].setType("double")
+        self.append(2000, 0.9)
+        self.pyramid.update()
+        self.checkAll()
+
+    def test5(self):
+        self.append(10)
+        self.pyramid.update()
+        self.assertEqual(self.pyramid.query(5, 5, 10), [])
+        self.assertEqual(self.pyramid.query(0, 10, 0), [])
+        self.assertEqual(len(self.pyramid.query(0, 100, 100)), 10)
+
+if __name__ == "__main__":
+    unittest.main()
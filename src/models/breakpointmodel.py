@@ -81,7 +81,7 @@ class ExtendedBreakpoint(QObject):
             self.disp = breakPoint.disp
             self.enabled = breakPoint.enabled
             self.number = breakPoint.number
-            self.originalLocation = breakPoint.__dict__['original-location']
+            self.originalLocation = getattr(breakPoint, "original-location")
             self.times = breakPoint.times
             self.type = breakPoint.type
             self.name = "Point " + str(counter)
@@ -92,7 +92,7 @@ class ExtendedBreakpoint(QObject):
             if breakPoint.addr == "<MULTIPLE>":
                 """ start special handling"""
                 self.multipleBreakPointInit(breakPoint.number)
-                self.parseOriginalLocation(breakPoint.__dict__['original-location'])
+                self.parseOriginalLocation(getattr(breakPoint, "original-location"))
                 self.func = "unknown"
             else:
                 self.file = getattr(breakPoint, "file", "<unknown>")
@@ -187,6 +187,19 @@ class BreakpointModel(QAbstractTableModel):
 
         return int(extendedBreakpoint.line)
 
+    def insertBreakpoints(self, locations):
+        """ inserts a breakpoint for each (file_, line) pair in locations with
+        a single round trip to gdb; locations gdb refuses are logged and skipped
+        @param locations: list of (string, int) tuples
+        """
+        for res in self.connector.insertBreakpoints(locations):
+            if hasattr(res, "bkpt"):
+                extendedBreakpoint = ExtendedBreakpoint(res.bkpt, len(self.breakpoints), self.connector)
+
+                self.beginInsertRows(QModelIndex(), len(self.breakpoints), len(self.breakpoints))
+                self.breakpoints.append(extendedBreakpoint)
+                self.endInsertRows()
+
     def deleteBreakpoint(self, file_, line):
         """ deletes breakpoint in file file_ on linenumber line
         @param file_: (string), name of file
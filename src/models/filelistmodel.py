@@ -107,6 +107,9 @@ class FileListModel(QAbstractItemModel):
         self.sources = FileListItem(["Sources", ""], 0, self.root)
         self.headers = FileListItem(["Headers", ""], 0, self.root)
         self.others = FileListItem(["Others", ""], 0, self.root)
+        # counts the requests for the list of sources, only the reply to the
+        # latest one is shown
+        self.__request = 0
 
         self.debugController.executableOpened.connect(self.update)
 
@@ -209,10 +212,11 @@ class FileListModel(QAbstractItemModel):
         else:
             return self.root.columnCount()
 
-    def updateData(self):
-        """ Builds the tree model. """
+    def updateData(self, data):
+        """ Builds the tree model.
+        @param data The list of source files.
+        """
 
-        data = self.connector.getSources()
         self.clearData()
 
         for path in data:
@@ -251,6 +255,7 @@ class FileListModel(QAbstractItemModel):
         Please see Qt documentation for further information.
         """
 
+        self.__request += 1
         self.beginResetModel()
         self.clearData()
         self.endResetModel()
@@ -260,6 +265,18 @@ class FileListModel(QAbstractItemModel):
         Please see Qt documentation for further information.
         """
 
+        # the list of sources might take a while on large binaries, so do not
+        # block the GUI while gdb is busy
+        self.__request += 1
+        request = self.__request
+        self.connector.getSourcesAsync(
+                lambda data: self.__sourcesReceived(data, request))
+
+    def __sourcesReceived(self, data, request):
+        # a reply for an executable that has been closed or replaced since
+        if data is None or request != self.__request:
+            return
+
         self.beginResetModel()
-        self.updateData()
+        self.updateData(data)
         self.endResetModel()
@@ -0,0 +1,254 @@
+# ricodebug - A GDB frontend which focuses on visually supported
+# debugging using data structure graphs and SystemC features.
+#
+# Copyright (C) 2011  The ricodebug project team at the
+# Upper Austrian University Of Applied Sciences Hagenberg,
+# Department Embedded Systems Design
+#
+# This file is part of ricodebug.
+#
+# ricodebug is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For further information see <http://syscdbg.hagenberg.servus.at/>.
+
+"""Columnar storage of the samples recorded by tracepoints"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# array.array type codes by traced type
+_TYPECODES = {
+    "bool": "B",
+    "char": "b", "signed char": "b", "unsigned char": "B",
+    "short": "h", "short int": "h", "unsigned short": "H", "short unsigned int": "H",
+    "int": "i", "unsigned int": "I", "unsigned": "I",
+    "long": "l", "long int": "l", "unsigned long": "L", "long unsigned int": "L",
+    "long long": "l", "long long int": "l",
+    "unsigned long long": "L", "long long unsigned int": "L",
+    "float": "f", "double": "d",
+}
+
+
+def _parse(code, value):
+    """Convert gdb's string representation of a value for a column with the
+    type code code, None if it cannot be converted."""
+    try:
+        if code == "B" and value in ("true", "false"):
+            return value == "true"
+        if code in "fd":
+            return float(value)
+        # chars are shown as eg. 65 'A'
+        return int(value.split(" ", 1)[0], 0)
+    except (ValueError, AttributeError):
+        return None
+
+
+class SampleColumn(object):
+    """The values of one traced variable, one per sample of the store.
+    Samples without a (valid) value are stored as 0 (NaN for floating point
+    types) and their indices are kept in missing.
+    """
+    __slots__ = ("name", "type", "values", "missing")
+
+    def __init__(self, name, type_=None):
+        self.name = name
+        self.type = None
+        # array.array, created when the type is known
+        self.values = None
+        self.missing = set()
+        if type_ is not None:
+            self.setType(type_)
+
+    def setType(self, type_):
+        """Set the type of the column, the values stored so far are kept if
+        they fit into the new type."""
+        code = _TYPECODES.get(type_, "d")
+        values = array(code)
+        if self.values is not None:
+            old = self.values.tolist()
+            if code not in "fd" and self.values.typecode in "fd":
+                # NaN marks missing values
+                old = [int(v) if v == v else 0 for v in old]
+            values.fromlist(old)
+        self.type = type_
+        self.values = values
+
+    def _append(self, value, row):
+        values = self.values
+        v = _parse(values.typecode, value) if value is not None else None
+        if v is None:
+            self.missing.add(row)
+            v = float("nan") if values.typecode in "fd" else 0
+        try:
+            values.append(v)
+        except OverflowError:
+            self.missing.add(row)
+            values.append(0)
+
+    def _pad(self, n):
+        """Append n missing values."""
+        if self.values is None:
+            self.setType(None)
+        start = len(self.values)
+        fill = float("nan") if self.values.typecode in "fd" else 0
+        self.values.extend(array(self.values.typecode, [fill]) * n)
+        self.missing.update(xrange(start, start + n))
+
+    def __len__(self):
+        return len(self.values) if self.values is not None else 0
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    def __iter__(self):
+        return iter(self.values if self.values is not None else ())
+
+    def asNumpy(self):
+        """Return the values as a NumPy array sharing the memory of the
+        column, None without NumPy. The array is invalid after appending."""
+        if numpy is None or self.values is None:
+            return None
+        return numpy.frombuffer(self.values, dtype=self.values.typecode)
+
+    def clear(self):
+        if self.values is not None:
+            self.values = array(self.values.typecode)
+        self.missing = set()
+
+
+class SampleStore(object):
+    """Samples of a tracepoint, one per hit, stored column-wise in typed
+    arrays. Every sample has a hit number, the id of the thread it was taken
+    in and the time (in seconds since the epoch) it was taken at, plus a
+    value for each traced variable (see SampleColumn). Hit numbers and times
+    are increasing, so ranges of samples can be found by bisection.
+    """
+
+    def __init__(self):
+        self.hits = array("L")
+        self.threads = array("l")
+        self.times = array("d")
+        # SampleColumn of each traced variable
+        self.columns = []
+
+    def __len__(self):
+        return len(self.hits)
+
+    def addColumn(self, name, type_=None):
+        """Add a column for a traced variable, the samples taken before get
+        a missing value."""
+        column = SampleColumn(name, type_)
+        if len(self):
+            column._pad(len(self))
+        self.columns.append(column)
+        return column
+
+    def append(self, hit, thread, time, values, types=None):
+        """Append a sample.
+        @param hit      int, number of the hit
+        @param thread   int, id of the thread, 0 if unknown
+        @param time     float, time of the hit
+        @param values   list of the values (as reported by gdb, or None) in the
+                        order of the columns; columns without a value (eg.
+                        added after the sample was taken) get a missing value
+        @param types    list of the types of the values; sets the type of
+                        columns whose type is not known yet
+        """
+        row = len(self.hits)
+        self.hits.append(hit)
+        self.threads.append(thread)
+        self.times.append(time)
+        types = types or ()
+        for i, column in enumerate(self.columns):
+            value = values[i] if i < len(values) else None
+            type_ = types[i] if i < len(types) else None
+            if column.values is None or (column.type is None and type_ is not None):
+                column.setType(type_)
+            column._append(value, row)
+
+    def extend(self, other):
+        """Append the samples of another store. Its columns are matched by
+        name, columns not known yet are added."""
+        known = set(c.name for c in self.columns)
+        for c in other.columns:
+            if c.name not in known:
+                self.addColumn(c.name)
+        row = len(self)
+        n = len(other)
+        self.hits.extend(other.hits)
+        self.threads.extend(other.threads)
+        self.times.extend(other.times)
+        others = dict((c.name, c) for c in other.columns)
+        for column in self.columns:
+            c = others.get(column.name)
+            if c is None or c.values is None:
+                column._pad(n)
+                continue
+            if column.values is None or (column.type is None and c.type is not None):
+                column.setType(c.type)
+            if column.values.typecode == c.values.typecode:
+                column.values.extend(c.values)
+            else:
+                column.values.fromlist(c.values.tolist())
+            column.missing.update(row + i for i in c.missing)
+
+    def discard(self, n):
+        """Remove the n oldest samples. The arrays are replaced, so views of
+        the columns (eg. a wavepyramid.MinMaxPyramid) notice the change."""
+        self.hits = self.hits[n:]
+        self.threads = self.threads[n:]
+        self.times = self.times[n:]
+        for column in self.columns:
+            if column.values is not None:
+                column.values = column.values[n:]
+            column.missing = set(i - n for i in column.missing if i >= n)
+
+    def clear(self):
+        """Remove all samples, the columns are kept."""
+        self.hits = array("L")
+        self.threads = array("l")
+        self.times = array("d")
+        for column in self.columns:
+            column.clear()
+
+    def rowsForHits(self, first, last):
+        """Return (start, end) of the samples of the hits first to last."""
+        return bisect_left(self.hits, first), bisect_right(self.hits, last)
+
+    def rowsForTime(self, start, end):
+        """Return (start, end) of the samples taken between start and end."""
+        return bisect_left(self.times, start), bisect_right(self.times, end)
+
+    def __getitem__(self, key):
+        """Return a store with the samples of the slice key."""
+        if not isinstance(key, slice):
+            raise TypeError("SampleStore indices must be slices")
+        store = SampleStore()
+        store.hits = self.hits[key]
+        store.threads = self.threads[key]
+        store.times = self.times[key]
+        rows = range(*key.indices(len(self)))
+        for column in self.columns:
+            c = SampleColumn(column.name)
+            c.type = column.type
+            c.values = column.values[key] if column.values is not None else None
+            if column.missing:
+                c.missing = set(i for i, row in enumerate(rows) if row in column.missing)
+            store.columns.append(c)
+        return store
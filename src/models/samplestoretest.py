@@ -0,0 +1,130 @@
+import math
+import unittest
+from models.samplestore import SampleStore
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.store = SampleStore()
+        self.store.addColumn("i", "int")
+        self.store.addColumn("d", "double")
+
+    def tearDown(self):
+        pass
+
+    def fill(self, n):
+        for hit in range(1, n + 1):
+            self.store.append(hit, 1, 10.0 + hit, [str(hit), "%d.5" % hit])
+
+    def test1(self):
+        # values are parsed by the type of their column
+        s = self.store
+        s.append(1, 2, 10.0, ["65 'A'", "1.5"])
+        s.append(2, 2, 11.0, ["0x10", "nan"])
+        s.append(3, 3, 12.0, ["<optimized out>", None])
+        self.assertEqual(len(s), 3)
+        self.assertEqual(list(s.hits), [1, 2, 3])
+        self.assertEqual(list(s.threads), [2, 2, 3])
+        self.assertEqual(s.columns[0].values.typecode, "i")
+        self.assertEqual(list(s.columns[0]), [65, 16, 0])
+        self.assertEqual(s.columns[0].missing, set([2]))
+        self.assertEqual(s.columns[1][0], 1.5)
+        self.assertTrue(math.isnan(s.columns[1][2]))
+        self.assertEqual(s.columns[1].missing, set([2]))
+
+    def test2(self):
+        # columns without a value in the list get a missing value
+        s = self.store
+        s.append(1, 1, 10.0, ["1"])
+        s.append(2, 1, 11.0, [])
+        self.assertEqual([len(c) for c in s.columns], [2, 2])
+        self.assertEqual(s.columns[0].missing, set([1]))
+        self.assertEqual(s.columns[1].missing, set([0, 1]))
+
+    def test3(self):
+        # a column added later is padded, its type is set by the first value
+        s = self.store
+        self.fill(2)
+        c = s.addColumn("b")
+        self.assertEqual(c.type, None)
+        self.assertEqual(len(c), 2)
+        s.append(3, 1, 13.0, ["3", "3.5", "true"], [None, None, "bool"])
+        self.assertEqual(c.type, "bool")
+        self.assertEqual(list(c), [0, 0, 1])
+        self.assertEqual(c.missing, set([0, 1]))
+
+    def test4(self):
+        # overflowing values are missing
+        s = SampleStore()
+        c = s.addColumn("c", "char")
+        s.append(1, 1, 1.0, ["300"])
+        self.assertEqual(list(c), [0])
+        self.assertEqual(c.missing, set([0]))
+
+    def test5(self):
+        # extend matches the columns by name and adds unknown ones
+        self.fill(3)
+        other = SampleStore()
+        other.addColumn("d", "double")
+        other.addColumn("x", "int")
+        other.append(4, 2, 14.0, ["4.25", None])
+        self.store.extend(other)
+        s = self.store
+        self.assertEqual([c.name for c in s.columns], ["i", "d", "x"])
+        self.assertEqual(list(s.hits), [1, 2, 3, 4])
+        self.assertEqual(s.columns[0].missing, set([3]))
+        self.assertEqual(s.columns[1][3], 4.25)
+        self.assertEqual(s.columns[2].missing, set([0, 1, 2, 3]))
+        self.assertEqual([len(c) for c in s.columns], [4, 4, 4])
+
+    def test6(self):
+        # discard drops the oldest samples and replaces the arrays
+        self.fill(5)
+        s = self.store
+        s.append(6, 1, 16.0, [None, "6.5"])
+        values = s.columns[0].values
+        s.discard(2)
+        self.assertFalse(s.columns[0].values is values)
+        self.assertEqual(list(s.hits), [3, 4, 5, 6])
+        self.assertEqual(list(s.columns[0]), [3, 4, 5, 0])
+        self.assertEqual(s.columns[0].missing, set([3]))
+
+    def test7(self):
+        # slices keep the types and the missing values of their rows
+        self.fill(5)
+        s = self.store
+        s.append(6, 1, 16.0, [None, "6.5"])
+        part = s[2:6]
+        self.assertEqual(list(part.hits), [3, 4, 5, 6])
+        self.assertEqual(list(part.times), [13.0, 14.0, 15.0, 16.0])
+        self.assertEqual(part.columns[0].type, "int")
+        self.assertEqual(list(part.columns[1]), [3.5, 4.5, 5.5, 6.5])
+        self.assertEqual(part.columns[0].missing, set([3]))
+        self.assertRaises(TypeError, lambda: s[0])
+
+    def test8(self):
+        self.fill(10)
+        s = self.store
+        self.assertEqual(s.rowsForHits(3, 5), (2, 5))
+        self.assertEqual(s.rowsForHits(0, 100), (0, 10))
+        self.assertEqual(s.rowsForHits(11, 12), (10, 10))
+        self.assertEqual(s.rowsForTime(12.5, 14.0), (2, 4))
+        self.assertEqual(s.rowsForTime(0.0, 10.0), (0, 0))
+
+    def test9(self):
+        # the values are kept when a column gets a (different) type
+        s = SampleStore()
+        c = s.addColumn("v")
+        s.append(1, 1, 1.0, [None])
+        s.append(2, 1, 2.0, ["2"], ["int"])
+        self.assertEqual(c.values.typecode, "i")
+        self.assertEqual(list(c), [0, 2])
+        self.assertEqual(c.missing, set([0]))
+        c.setType("double")
+        self.assertEqual(c.values.typecode, "d")
+        self.assertEqual(list(c), [0.0, 2.0])
+        s.append(3, 1, 3.0, ["2.5"])
+        self.assertEqual(list(c), [0.0, 2.0, 2.5])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -122,10 +122,18 @@ class StackModel(QAbstractTableModel):
         self.controller.removeStackMarkers()
 
     def update(self):
+        generation = self.connector.resultCache.generation
+        self.connector.getStackAsync(
+                lambda stack: self.__stackReceived(stack, generation))
+
+    def __stackReceived(self, stack, generation):
+        # the inferior may have continued or exited (and the markers been
+        # removed) since the stack was requested
+        if generation != self.connector.resultCache.generation:
+            return
+
         self.layoutAboutToBeChanged.emit()
-        self.stack = self.connector.getStack()
-        for s in self.stack:
-            s.level = int(s.level)
+        self.stack = stack
         self.layoutChanged.emit()
 
         self.sort(self.sortColumn, self.sortOrder)
@@ -61,8 +61,8 @@ class ThreadModel(QAbstractTableModel):
         self.__do = distributedObjects
         self.__threads = []
         self.__do.signalProxy.inferiorStoppedNormally.connect(self.update)
-        self.__do.signalProxy.threadCreated.connect(self.threadCreated)
-        self.__do.signalProxy.threadExited.connect(self.threadExited)
+        self.__do.signalProxy.threadsCreated.connect(self.threadsCreated)
+        self.__do.signalProxy.threadsExited.connect(self.threadsExited)
 
         self.__currentThread = None
 
@@ -70,20 +70,24 @@ class ThreadModel(QAbstractTableModel):
         self.threadStoppedPixmap = QPixmap(":/icons/images/16x16/stopped.png")
         self.currentTheadPixmap = QPixmap(":/icons/images/arrow-right.png")
 
-    def __addThread(self, id_):
-        self.beginInsertRows(QModelIndex(), len(self.__threads), len(self.__threads))
-        t = ThreadInfo(id_)
-        self.__threads.append(t)
+    def __addThreads(self, ids):
+        first = len(self.__threads)
+        self.beginInsertRows(QModelIndex(), first, first + len(ids) - 1)
+        self.__threads.extend(ThreadInfo(id_) for id_ in ids)
         self.endInsertRows()
 
-    def __removeThread(self, id_):
-        for i, t in enumerate(self.__threads):
-            if t.id == id_:
-                break
-
-        self.beginRemoveRows(QModelIndex(), i, i)
-        del self.__threads[i]
-        self.endRemoveRows()
+    def __removeThreads(self, ids):
+        rows = [i for i, t in enumerate(self.__threads) if t.id in ids]
+        # remove contiguous ranges of rows at once, starting at the end so
+        # that the remaining row numbers stay valid
+        while rows:
+            last = rows.pop()
+            first = last
+            while rows and rows[-1] == first - 1:
+                first = rows.pop()
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self.__threads[first:last + 1]
+            self.endRemoveRows()
 
     def update(self):
         res = self.__do.gdb_connector.threadInfo()
@@ -178,15 +182,15 @@ class ThreadModel(QAbstractTableModel):
         self.__threads.sort(key=attrgetter(key), reverse=rev)
         self.layoutChanged.emit()
 
-    def threadCreated(self, rec):
-        for r in rec.results:
-            if r.dest == "id":
-                self.__addThread(r.src)
+    def threadsCreated(self, recs):
+        ids = [r.src for rec in recs for r in rec.results if r.dest == "id"]
+        if ids:
+            self.__addThreads(ids)
 
-    def threadExited(self, rec):
-        for r in rec.results:
-            if r.dest == "id":
-                self.__removeThread(r.src)
+    def threadsExited(self, recs):
+        ids = set(r.src for rec in recs for r in rec.results if r.dest == "id")
+        if ids:
+            self.__removeThreads(ids)
 
     def threadIdForRow(self, row):
         return self.__threads[row].id
@@ -0,0 +1,212 @@
+# ricodebug - A GDB frontend which focuses on visually supported
+# debugging using data structure graphs and SystemC features.
+#
+# Copyright (C) 2011  The ricodebug project team at the
+# Upper Austrian University Of Applied Sciences Hagenberg,
+# Department Embedded Systems Design
+#
+# This file is part of ricodebug.
+#
+# ricodebug is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For further information see <http://syscdbg.hagenberg.servus.at/>.
+
+"""Trace files holding the samples of a tracepoint
+
+A trace file starts with MAGIC, followed by chunks of a 4 byte tag, the
+length of the payload (little endian uint32) and the payload:
+    COLS    JSON object with the byte order of the arrays and the list of
+            [name, type] of the traced variables; applies to the following
+            DATA chunks
+    DATA    a block of samples: the hits, threads and times arrays, then the
+            values and the indices of the missing values of every column
+Arrays are stored as their type code, item size, length in bytes and the raw
+items. TraceWriter appends the samples of a SampleStore as they are recorded,
+so a long run does not need to keep them in memory; TraceReader maps a file
+and reads any range of samples back into a SampleStore.
+"""
+
+from array import array
+from bisect import bisect_right
+import json
+import mmap
+import os
+import struct
+import sys
+from .samplestore import SampleStore, SampleColumn
+
+MAGIC = "RICOTRC1"
+_CHUNK = struct.Struct("<4sI")
+_ARRAY = struct.Struct("<cBI")
+_COUNT = struct.Struct("<I")
+
+# maximum number of samples in one DATA chunk
+CHUNK_SAMPLES = 65536
+
+
+def _packArray(a):
+    data = a.tostring()
+    return _ARRAY.pack(a.typecode, a.itemsize, len(data)) + data
+
+
+class TraceWriter(object):
+    """Appends the samples of a SampleStore to a trace file."""
+
+    def __init__(self, fileName):
+        """ Constructor
+        @param fileName    str, the file is created or truncated
+        """
+        self.fileName = fileName
+        self.f = open(fileName, "wb")
+        self.f.write(MAGIC)
+        # number of samples of the store in the file
+        self.written = 0
+        self.__layout = None
+
+    def write(self, store):
+        """Append the samples added to store since the last call."""
+        while self.written < len(store):
+            end = min(len(store), self.written + CHUNK_SAMPLES)
+            self.__writeChunk(store[self.written:end])
+            self.written = end
+        self.f.flush()
+
+    def trim(self, store, keep):
+        """Remove all but the keep newest samples from store once it holds
+        twice as many. Trimming copies the columns (and makes the waveform
+        pyramids start over), so it is done in steps of keep samples. Only
+        samples that were written to the file are removed."""
+        if len(store) < 2 * keep:
+            return
+        n = min(len(store) - keep, self.written)
+        if n > 0:
+            store.discard(n)
+            self.written -= n
+
+    def close(self):
+        self.f.close()
+
+    def __writeChunk(self, store):
+        layout = [[c.name, c.type] for c in store.columns]
+        if layout != self.__layout:
+            self.__write("COLS", json.dumps({"byteorder": sys.byteorder,
+                                             "columns": layout}))
+            self.__layout = layout
+
+        parts = [_COUNT.pack(len(store)), _packArray(store.hits),
+                 _packArray(store.threads), _packArray(store.times)]
+        for c in store.columns:
+            if c.values is not None:
+                values, missing = c.values, sorted(c.missing)
+            else:
+                # nothing was traced yet
+                values = array("d", [float("nan")]) * len(store)
+                missing = xrange(len(store))
+            parts.append(_packArray(values))
+            parts.append(_packArray(array("L", missing)))
+        self.__write("DATA", "".join(parts))
+
+    def __write(self, tag, payload):
+        self.f.write(_CHUNK.pack(tag, len(payload)))
+        self.f.write(payload)
+
+
+class TraceReader(object):
+    """Reads a trace file written by TraceWriter. The file is memory mapped
+    and only the chunks of the requested samples are decoded."""
+
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.f = open(fileName, "rb")
+        size = os.fstat(self.f.fileno()).st_size
+        if size < len(MAGIC):
+            raise IOError("%s is not a trace file" % fileName)
+        self.map = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            raise IOError("%s is not a trace file" % fileName)
+
+        # offsets of the DATA chunks, their first sample and their layout
+        self.chunks = []
+        self.firstRows = []
+        self.length = 0
+        self.__index(size)
+
+    def __len__(self):
+        return self.length
+
+    def __index(self, size):
+        layout = None
+        offset = len(MAGIC)
+        while offset + _CHUNK.size <= size:
+            tag, length = _CHUNK.unpack_from(self.map, offset)
+            offset += _CHUNK.size
+            if offset + length > size:
+                # the last chunk was not written completely
+                break
+            if tag == "COLS":
+                layout = json.loads(self.map[offset:offset + length])
+            elif tag == "DATA" and layout is not None:
+                count, = _COUNT.unpack_from(self.map, offset)
+                self.chunks.append((offset, layout))
+                self.firstRows.append(self.length)
+                self.length += count
+            offset += length
+
+    def __readArray(self, offset, byteorder):
+        code, itemsize, length = _ARRAY.unpack_from(self.map, offset)
+        offset += _ARRAY.size
+        a = array(code)
+        if a.itemsize != itemsize:
+            raise IOError("%s was written on an incompatible platform" % self.fileName)
+        a.fromstring(self.map[offset:offset + length])
+        if byteorder != sys.byteorder:
+            a.byteswap()
+        return a, offset + length
+
+    def __readChunk(self, offset, layout):
+        byteorder = layout["byteorder"]
+        store = SampleStore()
+        offset += _COUNT.size
+        store.hits, offset = self.__readArray(offset, byteorder)
+        store.threads, offset = self.__readArray(offset, byteorder)
+        store.times, offset = self.__readArray(offset, byteorder)
+        for name, type_ in layout["columns"]:
+            c = SampleColumn(str(name))
+            c.type = str(type_) if type_ is not None else None
+            c.values, offset = self.__readArray(offset, byteorder)
+            missing, offset = self.__readArray(offset, byteorder)
+            c.missing = set(missing)
+            store.columns.append(c)
+        return store
+
+    def read(self, start=0, end=None):
+        """Return a SampleStore with the samples start to end - 1."""
+        end = self.length if end is None else min(end, self.length)
+        store = SampleStore()
+        if start >= end:
+            return store
+        first = bisect_right(self.firstRows, start) - 1
+        for i in xrange(first, len(self.chunks)):
+            row = self.firstRows[i]
+            if row >= end:
+                break
+            chunk = self.__readChunk(*self.chunks[i])
+            if row < start or row + len(chunk) > end:
+                chunk = chunk[max(0, start - row):end - row]
+            store.extend(chunk)
+        return store
+
+    def close(self):
+        self.map.close()
+        self.f.close()
@@ -0,0 +1,132 @@
+import os
+import tempfile
+import unittest
+from StringIO import StringIO
+from models import tracefile
+from models.samplestore import SampleStore
+from models.tracefile import TraceWriter, TraceReader
+from models.vcdexport import writeVcd
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        fd, self.fileName = tempfile.mkstemp(suffix=".trace")
+        os.close(fd)
+        self.chunkSamples = tracefile.CHUNK_SAMPLES
+        # several chunks with few samples
+        tracefile.CHUNK_SAMPLES = 4
+
+    def tearDown(self):
+        tracefile.CHUNK_SAMPLES = self.chunkSamples
+        os.remove(self.fileName)
+
+    def store(self, n, start=0):
+        s = SampleStore()
+        s.addColumn("b")
+        s.addColumn("x")
+        for i in range(start, start + n):
+            s.append(i, 1, 100.0 + i, ["1" if i % 2 else "0",
+                                       str(i - 5) if i % 3 else None],
+                     ["bool", "int"])
+        return s
+
+    def read(self, start=0, end=None):
+        reader = TraceReader(self.fileName)
+        try:
+            return len(reader), reader.read(start, end)
+        finally:
+            reader.close()
+
+    def test1(self):
+        # extend appends samples and matches the columns by name
+        s = self.store(3)
+        other = self.store(2, 3)
+        other.addColumn("y", "double")
+        other.append(5, 2, 105.0, ["1", "0", "1.5"])
+        s.extend(other)
+        self.assertEqual(list(s.hits), range(6))
+        self.assertEqual([c.name for c in s.columns], ["b", "x", "y"])
+        self.assertEqual(list(s.columns[1]), [0, -4, -3, 0, -1, 0])
+        self.assertEqual(s.columns[1].missing, set([0, 3]))
+        self.assertEqual(len(s.columns[2]), 6)
+        self.assertEqual(s.columns[2].missing, set(range(5)))
+        self.assertEqual(s.columns[2][5], 1.5)
+
+    def test2(self):
+        # discard drops the oldest samples and replaces the arrays
+        s = self.store(7)
+        values = s.columns[1].values
+        s.discard(4)
+        self.assertEqual(list(s.hits), [4, 5, 6])
+        self.assertEqual(list(s.columns[1]), [-1, 0, 0])
+        self.assertEqual(s.columns[1].missing, set([2]))
+        self.assertFalse(s.columns[1].values is values)
+
+    def test3(self):
+        # samples survive a round trip through a trace file
+        s = self.store(10)
+        w = TraceWriter(self.fileName)
+        w.write(s)
+        s.append(10, 1, 110.0, ["1", "9"])
+        w.write(s)
+        w.close()
+        n, r = self.read()
+        self.assertEqual(n, 11)
+        self.assertEqual(list(r.hits), list(s.hits))
+        self.assertEqual(list(r.times), list(s.times))
+        for a, b in zip(r.columns, s.columns):
+            self.assertEqual((a.name, a.type), (b.name, b.type))
+            self.assertEqual(list(a), list(b))
+            self.assertEqual(a.missing, b.missing)
+
+    def test4(self):
+        # ranges across chunks and columns added while tracing
+        s = self.store(6)
+        w = TraceWriter(self.fileName)
+        w.write(s)
+        s.addColumn("late")
+        s.append(6, 1, 106.0, ["0", "1", "3.5"], ["bool", "int", "double"])
+        w.write(s)
+        w.close()
+        n, r = self.read(3, 7)
+        self.assertEqual(list(r.hits), [3, 4, 5, 6])
+        self.assertEqual(list(r.columns[1]), [0, -1, 0, 1])
+        self.assertEqual(r.columns[1].missing, set([0]))
+        self.assertEqual(r.columns[2].type, "double")
+        self.assertEqual(r.columns[2].missing, set([0, 1, 2]))
+        self.assertEqual(r.columns[2][3], 3.5)
+
+    def test5(self):
+        # trimming waits for twice the kept samples and keeps unwritten ones
+        s = self.store(6)
+        w = TraceWriter(self.fileName)
+        w.write(s)
+        w.trim(s, 4)
+        self.assertEqual(len(s), 6)
+        s.extend(self.store(2, 6))
+        w.trim(s, 1)
+        self.assertEqual(list(s.hits), [6, 7])
+        w.write(s)
+        w.close()
+        n, r = self.read()
+        self.assertEqual(list(r.hits), range(8))
+
+    def test6(self):
+        self.assertRaises(IOError, TraceReader, self.fileName)
+
+    def test7(self):
+        f = StringIO()
+        writeVcd(f, [("Point 0", self.store(4))])
+        vcd = f.getvalue()
+        header, changes = vcd.split("$enddefinitions $end\n")
+        self.assertTrue("$scope module Point_0 $end" in header)
+        self.assertTrue('$var wire 1 ! b $end' in header)
+        self.assertTrue('$var integer 32 " x $end' in header)
+        self.assertEqual(changes.split("\n"),
+                         ["#0", "0!", 'bx "',
+                          "#1000000", "1!", 'b11111111111111111111111111111100 "',
+                          "#2000000", "0!", 'b11111111111111111111111111111101 "',
+                          "#3000000", "1!", 'bx "', ""])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -25,34 +25,18 @@
 from PyQt4.QtCore import QAbstractTableModel, Qt, QModelIndex, QVariant
 from PyQt4.QtGui import QItemDelegate
 from operator import attrgetter
+import json
+import logging
+import os
+import tempfile
+import time
 from .breakpointmodel import ExtendedBreakpoint
+from .samplestore import SampleStore
+from .tracefile import TraceWriter, TraceReader
 from variables.variablelist import VariableList
 from variables.varwrapperfactory import VarWrapperFactory
 
 
-class ValueList():
-    """This class provides a name and a list of
-    Values
-    """
-    def __init__(self, name, type_):
-        self.name = name
-        self.values = []
-        self.type = type_
-
-    def addValue(self, type_, val):
-        if self.type != type_:
-            self.type = type_
-        if type_ == "int":
-            self.values.append(int(val))
-        elif type_ == "bool":
-            self.values.append(val == "true")
-        elif type_ == "float" or self.type == "double":
-            self.values.append(float(val))
-
-    def clear(self):
-        self.values = []
-
-
 class Tracepoint(ExtendedBreakpoint):
     """This class is used as a tracepoint in tracepointmodel.
     Basically Tracpoints are Breakpoint but they are extended
@@ -62,12 +46,14 @@ class Tracepoint(ExtendedBreakpoint):
     information of asked variables and then continue program
     """
 
-    def __init__(self, distObjects, sensitiveVariable, nr):
+    def __init__(self, distObjects, sensitiveVariable, nr, collecting=False):
         """Init Tracepoint
         @param sensitiveVariable: is the sensitive variable.
         Use extendedBreakpoints for this. If extBP occures
         then the variables and their values will be stored.
         @param nr: needed to initialize ExtendedBreakpoint class
+        @param collecting: (bool), True if the values are recorded inside gdb
+        without stopping the inferior (see helpers/gdbtracecollector.py)
         """
         ExtendedBreakpoint.__init__(self, sensitiveVariable, nr, distObjects.gdb_connector)
         """here are the traced variables stored with their values"""
@@ -79,22 +65,47 @@ class Tracepoint(ExtendedBreakpoint):
         self.hitted = False
         self.stop = False
         self.distObjects.signalProxy.dataForTracepointsReady.connect(self.readDataFromVarModel)
-        self.wave = []
+        # the traced values of all hits, see samplestore.SampleStore
+        self.samples = SampleStore()
         self.tracedVariables = []
+        self.collecting = collecting
+        # id of the thread that hit the tracepoint
+        self.thread = 0
+        # writes the samples to a trace file, see tracefile.TraceWriter
+        self.traceWriter = None
+
+    # the columns of the traced variables, each has a name, type and values
+    wave = property(lambda self: self.samples.columns)
 
     def addVar(self, variableToTrace):
         """ add a var to trace its value
         @param variableToTrace: variable name of the variable that should be traced"""
-        vw = self.variableList.addVarByName(variableToTrace)
-        newValueList = ValueList(variableToTrace, vw.type)
-        self.wave.append(newValueList)
-        self.tracedVariables.append(variableToTrace)
-
-    def tracePointOccurred(self, stop):
+        if self.collecting:
+            # the type is reported by gdb with the first value
+            self.samples.addColumn(variableToTrace)
+            self.tracedVariables.append(variableToTrace)
+            self.gdb_connector.setCollectedExpressions(self.number, self.tracedVariables)
+        else:
+            vw = self.variableList.addVarByName(variableToTrace)
+            self.samples.addColumn(variableToTrace, vw.type)
+            self.tracedVariables.append(variableToTrace)
+
+    def addCollectedValues(self, types, values, time_, thread):
+        """ store the values of one hit of a collecting tracepoint
+        @param types: list of the types of the traced variables
+        @param values: list of their values, None if not available
+        @param time_: (float), time of the hit
+        @param thread: (int), id of the thread that hit the tracepoint"""
+        self.counter = self.counter + 1
+        self.samples.append(self.counter, thread, time_, values, types)
+
+    def tracePointOccurred(self, stop, thread=0):
         """ set if stop is needed or not
         @param stop: (bool), gdb stops after tracing if True, gdb continues after tracing if False
+        @param thread: (int), id of the thread that hit the tracepoint
         """
         self.stop = stop
+        self.thread = thread
         self.hitted = True
 
     def readDataFromVarModel(self):
@@ -103,10 +114,14 @@ class Tracepoint(ExtendedBreakpoint):
             self.hitted = False
             self.counter = self.counter + 1
 
-            for varList in self.wave:
-                for v in self.variableList.list:
-                    if v.uniqueName == varList.name:
-                        varList.addValue(v.type, v.value)
+            traced = dict((v.uniqueName, v) for v in self.variableList.list)
+            values = []
+            types = []
+            for column in self.wave:
+                v = traced.get(column.name)
+                values.append(v.value if v is not None else None)
+                types.append(v.type if v is not None else None)
+            self.samples.append(self.counter, self.thread, time.time(), values, types)
 
         if not(self.stop):
             self.stop = True
@@ -125,6 +140,15 @@ class TracepointModel(QAbstractTableModel):
         self.tracepoints = []
         self.distObjects = distObjects
         self.connector = distObjects.gdb_connector
+        # insert tracepoints that collect values inside gdb
+        self.collectInGdb = False
+        # file the collected values are passed in, see pullCollectedData
+        self.__traceFile = os.path.join(tempfile.gettempdir(),
+                "ricodebug-trace-%d.json" % os.getpid())
+        # directory the samples are streamed to, None keeps them in memory
+        self.traceDirectory = None
+        # samples kept in memory per tracepoint while streaming to a file
+        self.samplesInMemory = 1000000
         #TODO:     self.emit(SIGNAL('refreshTracepointView'))
 
     def getModel(self):
@@ -147,11 +171,20 @@ class TracepointModel(QAbstractTableModel):
          @param file: (str) name of file where tracepoint should be inserted
          @param line: (int) line of file where tracepoint should be inserted
         """
-        res = self.connector.insertBreakpoint(file, line)
+        collecting = self.collectInGdb
+        if collecting and not self.connector.hasTraceCollector():
+            logging.warning("The tracepoint collector is not loaded in gdb, "
+                            "inserting a stopping tracepoint instead.")
+            collecting = False
+        if collecting:
+            bkpt = self.connector.insertCollectingTracepoint(file, line)
+        else:
+            bkpt = self.connector.insertBreakpoint(file, line).bkpt
         self.beginInsertRows(QModelIndex(), len(self.tracepoints),
                              len(self.tracepoints))
         "sensitiveVariable has to be a Extended Breakpoint"
-        tracepoint = Tracepoint(self.distObjects, res.bkpt, self.__getTpNumber(0))
+        tracepoint = Tracepoint(self.distObjects, bkpt, self.__getTpNumber(0), collecting)
+        self.__startTraceFile(tracepoint)
         self.tracepoints.append(tracepoint)
         self.endInsertRows()
 
@@ -165,6 +198,8 @@ class TracepointModel(QAbstractTableModel):
         for tp in self.tracepoints:
             if tp.fullname == file and int(tp.line) == line:
                 self.connector.deleteBreakpoint(tp.number)
+                if tp.traceWriter is not None:
+                    tp.traceWriter.close()
                 idx = self.tracepoints.index(tp)
                 self.beginRemoveRows(QModelIndex(), idx, idx)
                 self.tracepoints.remove(tp)
@@ -187,8 +222,66 @@ class TracepointModel(QAbstractTableModel):
     def clearTracepointData(self):
         ''' Clear traced data of tracepoints'''
         for tp in self.tracepoints:
-            for val in tp.wave:
-                val.clear()
+            tp.samples.clear()
+            self.__startTraceFile(tp)
+        if any(tp.collecting for tp in self.tracepoints):
+            self.connector.clearCollectedTraces()
+
+    def __startTraceFile(self, tp):
+        ''' Let tp write its samples to a new trace file in traceDirectory'''
+        if tp.traceWriter is not None:
+            tp.traceWriter.close()
+            tp.traceWriter = None
+        if self.traceDirectory:
+            fileName = os.path.join(self.traceDirectory, "tracepoint-%s-%s.trace" %
+                    (tp.number, time.strftime("%Y%m%d-%H%M%S")))
+            try:
+                tp.traceWriter = TraceWriter(fileName)
+            except IOError as e:
+                logging.error("Could not create trace file: %s", e)
+
+    def writeTraces(self):
+        ''' Append the new samples of the tracepoints to their trace files and
+        drop the oldest samples from memory once there are twice as many as
+        samplesInMemory'''
+        for tp in self.tracepoints:
+            if tp.traceWriter is not None:
+                tp.traceWriter.write(tp.samples)
+                tp.traceWriter.trim(tp.samples, self.samplesInMemory)
+
+    def readTrace(self, tp):
+        ''' Return all samples of tp, including those only in its trace file'''
+        if tp.traceWriter is None:
+            return tp.samples
+        tp.traceWriter.write(tp.samples)
+        reader = TraceReader(tp.traceWriter.fileName)
+        try:
+            return reader.read()
+        finally:
+            reader.close()
+
+    def pullCollectedData(self):
+        ''' Fetch the values the collecting tracepoints recorded inside gdb
+        since the last call, all at once'''
+        collecting = dict((int(tp.number), tp) for tp in self.tracepoints if tp.collecting)
+        if not collecting:
+            return
+
+        self.connector.flushCollectedTraces(self.__traceFile)
+        try:
+            with open(self.__traceFile) as f:
+                data = json.load(f)
+        finally:
+            os.remove(self.__traceFile)
+
+        if data["dropped"]:
+            logging.warning("%d tracepoint hits were not recorded, gdb's buffer was full",
+                    data["dropped"])
+        types = dict((int(number), t) for number, t in data["types"].items())
+        for number, time_, thread, values in data["hits"]:
+            tp = collecting.get(number)
+            if tp is not None:
+                tp.addCollectedValues(types.get(number, []), values, time_, thread)
 
     def toggleTracepoint(self, fullname, line):
         """toggles tracepoint in file fullname on line line
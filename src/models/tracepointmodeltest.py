@@ -0,0 +1,81 @@
+import json
+import os
+import unittest
+from models.tracepointmodel import TracepointModel
+
+
+class Connector:
+    """Writes a canned flush file like the collector inside gdb."""
+    def __init__(self, data):
+        self.data = data
+        self.flushed = []
+
+    def flushCollectedTraces(self, fileName):
+        self.flushed.append(fileName)
+        with open(fileName, "w") as f:
+            json.dump(self.data, f)
+
+
+class DistributedObjects:
+    def __init__(self, connector):
+        self.gdb_connector = connector
+
+
+class Tracepoint:
+    def __init__(self, number, collecting=True):
+        self.number = number
+        self.collecting = collecting
+        self.hits = []
+
+    def addCollectedValues(self, types, values, time_, thread):
+        self.hits.append((types, values, time_, thread))
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        # json turns the tracepoint numbers used as keys into strings
+        self.connector = Connector({
+                "types": {"1": ["int", "double"], "2": ["char *"]},
+                "hits": [[1, 10.0, 1, ["1", "0.5"]],
+                         [2, 10.5, 2, ["0x0 \"\""]],
+                         [1, 11.0, 1, ["2", None]],
+                         [3, 11.5, 1, ["7"]]],
+                "dropped": 0})
+        self.model = TracepointModel(DistributedObjects(self.connector))
+
+    def tearDown(self):
+        pass
+
+    def test1(self):
+        # the hits are handed to their tracepoints in order
+        tp1 = Tracepoint("1")
+        tp2 = Tracepoint("2")
+        self.model.tracepoints = [tp1, tp2]
+        self.model.pullCollectedData()
+
+        self.assertEqual(tp1.hits, [(["int", "double"], ["1", "0.5"], 10.0, 1),
+                                    (["int", "double"], ["2", None], 11.0, 1)])
+        self.assertEqual(tp2.hits, [(["char *"], ["0x0 \"\""], 10.5, 2)])
+        # the file is removed after reading
+        self.assertEqual(len(self.connector.flushed), 1)
+        self.assertFalse(os.path.exists(self.connector.flushed[0]))
+
+    def test2(self):
+        # nothing is flushed without collecting tracepoints
+        tp = Tracepoint("1", False)
+        self.model.tracepoints = [tp]
+        self.model.pullCollectedData()
+        self.assertEqual(self.connector.flushed, [])
+        self.assertEqual(tp.hits, [])
+
+    def test3(self):
+        # hits of a tracepoint without types get an empty type list
+        self.connector.data["types"] = {}
+        self.connector.data["dropped"] = 3
+        tp = Tracepoint("3")
+        self.model.tracepoints = [tp]
+        self.model.pullCollectedData()
+        self.assertEqual(tp.hits, [([], ["7"], 11.5, 1)])
+
+if __name__ == "__main__":
+    unittest.main()
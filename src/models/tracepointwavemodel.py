@@ -22,15 +22,18 @@
 #
 # For further information see <http://syscdbg.hagenberg.servus.at/>.
 
-from PyQt4.QtCore import Qt, QAbstractTableModel, QObject
+from PyQt4.QtCore import Qt, QAbstractTableModel, QObject, QTimer, pyqtSignal
 #from PyQt4 import QtGui
 from operator import attrgetter
 from helpers.svgdrawwaveforms import SvgDrawWaveform
+from helpers.wavepyramid import MinMaxPyramid
 from datagraph.svgimage import SVGImage
 from datagraph.svgvw import SVGDataGraphVW
 from StringIO import StringIO
 
-import logging
+# array.array type codes of the columns that can be drawn, see
+# models.samplestore.SampleColumn
+DRAWABLE_TYPECODES = "bBhHiIlLfd"
 
 
 class TracepointWaveDrawing(QObject):
@@ -51,8 +54,8 @@ class TracepointWaveDrawing(QObject):
                                        self.distributedObjects.
                                        datagraphController.addVar)
 
-    def refresh(self, no_waves):
-        self.svg.refresh(no_waves)
+    def refresh(self, no_waves, width):
+        self.svg.refreshWindow(no_waves, width)
 
     def display(self):
         self.f.seek(0)
@@ -69,10 +72,15 @@ class TracepointWaveModel(QAbstractTableModel):
     which represents a waveform.
     """
 
+    # the columns or the window changed
+    waveChanged = pyqtSignal()
+
+    # time (in ms) the picture in the data graph lags behind window changes
+    DRAWING_DELAY = 200
+
     def __init__(self, distributedObjects):
         QAbstractTableModel.__init__(self)
 
-        self.supportedTypes = ["bool", "int", "float", "double"]
         self.distributedObjects = distributedObjects
         self.waveform = TracepointWaveDrawing(distributedObjects)
 
@@ -80,50 +88,140 @@ class TracepointWaveModel(QAbstractTableModel):
         self.waveforms = []
 
         # factor for zoom in/out functions
-        self.zoomfactor = 1.05
+        self.zoomfactor = 2.0
+
+        # displayed samples as (start, end), None shows the whole trace
+        self.window = None
+
+        # width of the waves in px, a wave is drawn at this resolution
+        # regardless of the number of samples in the window
+        self.waveWidth = 800
 
-        # stepwidth
-        self.duration = 30
+        # min/max pyramids of the traced values, by SampleColumn
+        self.pyramids = {}
+
+        # columns shown by the last update
+        self.columns = []
 
         # const column of waveform
         self.wavecolumn = 1
 
+        # redraws the picture once panning and zooming have settled
+        self.__drawingTimer = QTimer(self)
+        self.__drawingTimer.setSingleShot(True)
+        self.__drawingTimer.setInterval(self.DRAWING_DELAY)
+        self.__drawingTimer.timeout.connect(self.__draw)
+
         self.distributedObjects.signalProxy.\
             cleanupModels.connect(self.cleanUp)
 
     def cleanUp(self):
-        pass
+        self.pyramids = {}
+        self.columns = []
+        self.window = None
+        self.waveChanged.emit()
 
     def updateTracepointWave(self, list_):
         ''' Repaint tracepoint waves
-            @param list_: list of ValueList objects
+            @param list_: list of samplestore.SampleColumn objects
         '''
         # TODO: write log message
         if len(list_) == 0:
             return 
 
-        self.waveform.refresh(len(list_))
-        
+        if list_ is not self.columns:
+            self.columns = list_
+            self.window = None
         for item in list_:
-            if item.type in self.supportedTypes:
+            if item.type is not None:
+                self.__getPyramid(item).update()
+        self.__drawingTimer.stop()
+        self.__draw()
+        self.waveChanged.emit()
+
+    def __getPyramid(self, column):
+        pyramid = self.pyramids.get(column)
+        if pyramid is None:
+            pyramid = self.pyramids[column] = MinMaxPyramid(column)
+        return pyramid
+
+    def sampleCount(self):
+        return max([len(c) for c in self.columns] or [0])
+
+    def visibleRange(self):
+        '''Return the displayed samples as (start, end).'''
+        count = self.sampleCount()
+        if self.window is None:
+            return 0, count
+        start, end = self.window
+        return max(0, start), min(end, count)
+
+    def setWindow(self, start, end):
+        '''Show the samples start to end - 1, the whole trace if the window
+        covers all of it.'''
+        if start <= 0 and end >= self.sampleCount():
+            self.window = None
+        else:
+            self.window = (max(0, start), max(start + 1, end))
+        self.waveChanged.emit()
+        self.__drawingTimer.start()
+
+    def moveWindow(self, start):
+        '''Show the samples from start on, keeping the size of the window.'''
+        first, end = self.visibleRange()
+        size = end - first
+        start = max(0, min(start, self.sampleCount() - size))
+        if start != first:
+            self.setWindow(start, start + size)
+
+    def fit(self):
+        '''Show the whole trace.'''
+        self.setWindow(0, self.sampleCount())
+
+    def __draw(self):
+        '''Draw the visible part of the columns. Only the samples in the
+        window are looked at if they are few enough to be drawn one by one,
+        otherwise each wave is drawn from the minima and maxima of its
+        pyramid at the resolution of the picture.'''
+        list_ = self.columns
+        if len(list_) == 0:
+            return
+        start, end = self.visibleRange()
+        svg = self.waveform.svg
+
+        self.waveform.refresh(len(list_), self.waveWidth)
+
+        for row, item in enumerate(list_):
+            if self.isDrawable(item):
                 i = self.__getTracepointWaveIndex(item.name, item.type)
 
-                for v in item.values:
-                    self.waveform.svg.drawWaveform(i, v, item.type, item.name)
-        
+                if svg.fitsPeriods(end - start, self.waveWidth):
+                    for k in xrange(start, min(end, len(item))):
+                        svg.drawWaveform(row, item[k], item.type, item.name)
+                else:
+                    ranges = self.pyramids[item].query(start, end,
+                                                       self.waveWidth)
+                    svg.drawRanges(row, ranges, item.type, item.name,
+                                   self.waveWidth)
+
                 if i is not None:
                     self.waveform.svg_image_wrapper.setDirty(True) # render immediatly
                 else:
                     self.waveform.action.commit()
                     self.waveforms.append({"name" : item.name,
                                            "type" : item.type})
-            else:
-                logging.error("Could not update tracepoint wave. Illegal variable type.")
-                    
+
         self.waveform.display()
 
 
 
+    def isDrawable(self, column):
+        '''Return True if the values of column can be drawn, ie. its type is
+        known and its values are stored in a numeric array. Values of types
+        that are no numbers (eg. pointers) are stored as missing.'''
+        return column.type is not None and column.values is not None and \
+                column.values.typecode in DRAWABLE_TYPECODES
+
     def __getTracepointWaveIndex(self, name, type_):
         for wf in self.waveforms:
             if wf["name"] == name and wf["type"] == type_:
@@ -132,11 +230,24 @@ class TracepointWaveModel(QAbstractTableModel):
 
     def zoomIn(self):
         '''Zoom wave horizontally'''
-        self.duration = self.duration * self.zoomfactor
+        self.zoomAt(None, 1 / self.zoomfactor)
 
     def zoomOut(self):
         '''Zoom wave horizontally'''
-        self.duration = self.duration / self.zoomfactor
+        self.zoomAt(None, self.zoomfactor)
+
+    def zoomAt(self, sample, factor):
+        '''Scale the window by factor, keeping sample (the center of the
+        window if None) at the same position.'''
+        start, end = self.visibleRange()
+        if sample is None:
+            sample = (start + end) / 2.0
+        size = max(1.0, (end - start) * factor)
+        left = sample - (sample - start) * size / max(1, end - start)
+        if left + size > self.sampleCount():
+            left = self.sampleCount() - size
+        left = max(0, int(left))
+        self.setWindow(left, left + int(size + 0.5))
 
     def data(self, index, role):
         ret = None
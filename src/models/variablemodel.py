@@ -287,6 +287,12 @@ class VariableModel(QAbstractItemModel):
             if index.column() == 2:
                 ret = item.value
 
+        elif role == Qt.ToolTipRole:
+            if index.column() == 2:
+                previous = getattr(item, "previousValue", None)
+                if previous is not None:
+                    ret = "Previous value: %s" % previous
+
         elif role == Qt.DecorationRole:
             if index.column() == 0:
                 if item.access in ['private', 'protected']:
@@ -0,0 +1,133 @@
+# ricodebug - A GDB frontend which focuses on visually supported
+# debugging using data structure graphs and SystemC features.
+#
+# Copyright (C) 2011  The ricodebug project team at the
+# Upper Austrian University Of Applied Sciences Hagenberg,
+# Department Embedded Systems Design
+#
+# This file is part of ricodebug.
+#
+# ricodebug is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For further information see <http://syscdbg.hagenberg.servus.at/>.
+
+"""Export of traced samples to Value Change Dump files (IEEE 1364), eg. for
+GTKWave"""
+
+from heapq import merge
+import re
+import time
+
+# time of a VCD tick in seconds, see TIMESCALE
+TICK = 1e-6
+TIMESCALE = "1 us"
+
+
+def _identifiers():
+    """Yield the short identifiers of VCD variables: !, ", ..., ~, !!, ..."""
+    n = 0
+    while True:
+        i = n
+        code = ""
+        while True:
+            code += chr(33 + i % 94)
+            i = i // 94 - 1
+            if i < 0:
+                break
+        yield code
+        n += 1
+
+
+def _name(name):
+    """Return name without the characters VCD does not allow in names."""
+    return re.sub(r"\s+", "_", name) or "_"
+
+
+class _Signal(object):
+    """A column of a store written as VCD variable"""
+
+    def __init__(self, column, code):
+        self.column = column
+        self.code = code
+        self.last = None
+        typecode = column.values.typecode if column.values is not None else "d"
+        if column.type == "bool":
+            self.kind, self.width = "wire", 1
+        elif typecode in "fd":
+            self.kind, self.width = "real", 64
+        else:
+            self.kind, self.width = "integer", column.values.itemsize * 8
+
+    def declaration(self):
+        return "$var %s %d %s %s $end\n" % (self.kind, self.width, self.code,
+                                           _name(self.column.name))
+
+    def change(self, row):
+        """Return the value change record for the sample row, None if the
+        value did not change."""
+        c = self.column
+        if c.values is None or row >= len(c) or row in c.missing:
+            if self.kind == "real":
+                return None
+            value = "x"
+        else:
+            value = c.values[row]
+        if value == self.last:
+            return None
+        self.last = value
+        if value == "x":
+            return ("x%s\n" if self.kind == "wire" else "bx %s\n") % self.code
+        if self.kind == "wire":
+            return "%d%s\n" % (1 if value else 0, self.code)
+        if self.kind == "real":
+            return "r%.16g %s\n" % (value, self.code)
+        return "b%s %s\n" % (bin(value & ((1 << self.width) - 1))[2:], self.code)
+
+
+def writeVcd(f, stores):
+    """Write samples to a VCD file. The samples of all stores are merged by
+    the time they were taken; every store becomes a scope.
+    @param f         file object to write to
+    @param stores    list of (name, samplestore.SampleStore) tuples
+    """
+    codes = _identifiers()
+    scopes = [(name, store, [_Signal(c, next(codes)) for c in store.columns])
+              for name, store in stores]
+    starts = [store.times[0] for _, store, _ in scopes if len(store)]
+    t0 = min(starts) if starts else 0
+
+    f.write("$date %s $end\n" % time.ctime(t0 or time.time()))
+    f.write("$version ricodebug $end\n")
+    f.write("$timescale %s $end\n" % TIMESCALE)
+    for name, store, signals in scopes:
+        f.write("$scope module %s $end\n" % _name(name))
+        for s in signals:
+            f.write(s.declaration())
+        f.write("$upscope $end\n")
+    f.write("$enddefinitions $end\n")
+
+    def samples(i, store):
+        for row in xrange(len(store)):
+            yield int(round((store.times[row] - t0) / TICK)), i, row
+
+    now = None
+    for tick, i, row in merge(*[samples(i, s) for i, (_, s, _) in enumerate(scopes)]):
+        changes = [s.change(row) for s in scopes[i][2]]
+        changes = [c for c in changes if c is not None]
+        if not changes:
+            continue
+        if tick != now:
+            f.write("#%d\n" % tick)
+            now = tick
+        f.write("".join(changes))
@@ -43,8 +43,11 @@ class AutoBPPlugin(QObject):
 
     def update(self):
         sources = self.signalproxy.distributedObjects.gdb_connector.getSources()
+        locations = []
         for s in sources:
             with open(s) as f:
                 for i, line in enumerate(f):
                     if '// bp' in line:
-                        self.signalproxy.distributedObjects.breakpointModel.insertBreakpoint(s, i + 1)
+                        locations.append((s, i + 1))
+        if locations:
+            self.signalproxy.distributedObjects.breakpointModel.insertBreakpoints(locations)
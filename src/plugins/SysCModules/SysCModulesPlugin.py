@@ -129,34 +129,36 @@ class SysCModulesPlugin():
         if elaboration_done == "true" and content is not None:
             self.loaded = True
             self.objects = []
-            for item in content:
-                name = self.signalproxy.gdbEvaluateExpression("(*((sc_core::sc_module**)" + item + "))->m_name")
-                parent = self.signalproxy.gdbEvaluateExpression("(*((sc_core::sc_module**)" + item + "))->m_parent")
-                if parent != "0x0":
-                    parent = self.signalproxy.gdbEvaluateExpression("(*((sc_core::sc_module**)" + item + "))->m_parent->m_name")
-                else:
-                    parent = None
-
-                kind = self.signalproxy.gdbEvaluateExpression("(*((sc_core::sc_module**)" + item + "))->kind()")
+            # evaluate the four expressions of all modules (and later of all
+            # children of a module) in one round trip to gdb
+            modules = self.__evaluateObjects(content, "sc_module")
+            for item, (name, parent, kind) in zip(content, modules):
                 if name is not None:
                     self.objects.append((str(name), str(parent), str(kind)))
 
                     children = self.signalproxy.getStlVectorContent("(*((sc_core::sc_module**)" + item + "))->m_child_objects")
                     if children is not None:
-                        for child in children:
-                            childKind = self.signalproxy.gdbEvaluateExpression("(*((sc_core::sc_object**)" + child + "))->kind()")
-                            childName = self.signalproxy.gdbEvaluateExpression("(*((sc_core::sc_object**)" + child + "))->m_name")
-                            childParent = self.signalproxy.gdbEvaluateExpression("(*((sc_core::sc_object**)" + child + "))->m_parent")
-                            if childParent != "0x0":
-                                childParent = self.signalproxy.gdbEvaluateExpression("(*((sc_core::sc_object**)" + child + "))->m_parent->m_name")
-                            else:
-                                childParent = None
-
+                        for childName, childParent, childKind in self.__evaluateObjects(children, "sc_object"):
                             if childName is not None and str(self.parseName(childKind)) != "sc_module":
                                 self.objects.append((str(childName), str(childParent), str(childKind)))
 
         self.updateGui()
 
+    def __evaluateObjects(self, items, type_):
+        """Return (name, parent name, kind) for each of the sc_object pointers
+        in items, using a single batch of evaluations."""
+        exps = []
+        for item in items:
+            obj = "(*((sc_core::" + type_ + "**)" + item + "))"
+            exps += [obj + "->m_name", obj + "->m_parent", obj + "->m_parent->m_name", obj + "->kind()"]
+        values = self.signalproxy.gdbEvaluateExpressions(exps)
+
+        objects = []
+        for i in range(0, len(values), 4):
+            name, parent, parentName, kind = values[i:i + 4]
+            objects.append((name, parentName if parent != "0x0" else None, kind))
+        return objects
+
     def updateGui(self):
         self.view.clear()
         self.treeItems = {}
@@ -0,0 +1,129 @@
+# ricodebug - A GDB frontend which focuses on visually supported
+# debugging using data structure graphs and SystemC features.
+#
+# Copyright (C) 2011  The ricodebug project team at the
+# Upper Austrian University Of Applied Sciences Hagenberg,
+# Department Embedded Systems Design
+#
+# This file is part of ricodebug.
+#
+# ricodebug is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For further information see <http://syscdbg.hagenberg.servus.at/>.
+
+""" Fast path for arrays of scalar types: instead of creating a varobj for
+every element, the whole array is read with one -data-read-memory-bytes and
+decoded into a typed buffer (a NumPy array if NumPy is available, otherwise
+an array.array).
+"""
+
+import array
+import binascii
+import re
+from helpers.gdboutput import GdbOutput
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# arrays larger than this are still shown element by element
+MAX_BYTES = 16 * 1024 * 1024
+
+# scalar types by name: kind of the value (i: signed, u: unsigned, f: float)
+SCALAR_TYPES = {
+    "short": "i", "short int": "i", "unsigned short": "u", "short unsigned int": "u",
+    "int": "i", "unsigned int": "u", "unsigned": "u",
+    "long": "i", "long int": "i", "unsigned long": "u", "long unsigned int": "u",
+    "long long": "i", "long long int": "i",
+    "unsigned long long": "u", "long long unsigned int": "u",
+    "float": "f", "double": "f",
+}
+
+_ARRAY = re.compile(r"^(?:const |volatile )*(.+?) \[(\d+)\]$")
+_VECTOR = re.compile(r"^(?:const )?std::vector<(.+?), std::allocator<\1 ?> ?>$")
+_ADDRESS = re.compile(r"0x[0-9a-fA-F]+")
+
+# array.array type codes by kind and size, used without NumPy
+_TYPECODES = {}
+for _code in "bBhHiIlLfd":
+    _kind = "f" if _code in "fd" else ("i" if _code.islower() else "u")
+    _TYPECODES.setdefault((_kind, array.array(_code).itemsize), _code)
+
+
+def scalarArrayType(type_):
+    """ return (element type, number of elements or None for vectors) if
+        type_ is an array or std::vector of a scalar type, None otherwise
+    """
+    m = _ARRAY.match(type_)
+    if m and m.group(1) in SCALAR_TYPES:
+        return m.group(1), int(m.group(2))
+    m = _VECTOR.match(type_)
+    if m and m.group(1) in SCALAR_TYPES:
+        return m.group(1), None
+    return None
+
+
+def readArray(connector, exp, arrayType):
+    """ read the elements of exp with a single memory access
+    @param connector    helpers.gdbconnector.GdbConnector
+    @param exp          string, the expression of the array or vector
+    @param arrayType    (element type, count), as returned by scalarArrayType
+    @return             the typed elements or None if they could not be read
+    """
+    elemType, count = arrayType
+
+    if count is not None:
+        exps = ["&(%s)[0]" % exp, "sizeof(%s)" % elemType]
+    else:
+        impl = "(%s)._M_impl" % exp
+        exps = [impl + "._M_start", "sizeof(%s)" % elemType,
+                "%s._M_finish - %s._M_start" % (impl, impl)]
+    values = connector.evaluateBatchCached(['"%s"' % e for e in exps])
+    if None in values:
+        return None
+
+    m = _ADDRESS.search(values[0])
+    if m is None:
+        return None
+    size = int(values[1])
+    if count is None:
+        count = int(values[2])
+    if count * size > MAX_BYTES:
+        return None
+    if count == 0:
+        return decode("", SCALAR_TYPES[elemType], size)
+
+    res = connector.executeCached("-data-read-memory-bytes %s %d" % (m.group(0), count * size))
+    if res.class_ == GdbOutput.ERROR:
+        return None
+    raw = binascii.unhexlify("".join(block.contents for block in res.memory))
+    if len(raw) != count * size:
+        return None
+    return decode(raw, SCALAR_TYPES[elemType], size)
+
+
+def decode(raw, kind, size):
+    """ decode the target's bytes raw (in host byte order) into a buffer of
+        elements of kind ('i', 'u' or 'f') with size bytes each
+    """
+    if numpy is not None:
+        return numpy.frombuffer(raw, dtype="%s%d" % (kind, size))
+
+    code = _TYPECODES.get((kind, size))
+    if code is None:
+        return None
+    data = array.array(code)
+    data.fromstring(raw)
+    return data
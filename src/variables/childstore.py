@@ -0,0 +1,179 @@
+# ricodebug - A GDB frontend which focuses on visually supported
+# debugging using data structure graphs and SystemC features.
+#
+# Copyright (C) 2011  The ricodebug project team at the
+# Upper Austrian University Of Applied Sciences Hagenberg,
+# Department Embedded Systems Design
+#
+# This file is part of ricodebug.
+#
+# ricodebug is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For further information see <http://syscdbg.hagenberg.servus.at/>.
+
+from collections import OrderedDict
+
+
+class ChildStore(object):
+    """ Sparse list of the children of a variable. <br>
+        The children are loaded from gdb in pages of PAGE_SIZE when they are
+        accessed; a neighbouring page is fetched with the same command. Only
+        MAX_PAGES pages are kept, when another page is needed the least
+        recently used one is dropped and its varobjs are deleted. This keeps
+        the memory used independent of the number of children.
+
+        Variables whose children contain access specifiers or base classes
+        (which are flattened into the list) cannot be paged by index, their
+        children are loaded at once.
+    """
+    PAGE_SIZE = 100
+    MAX_PAGES = 20
+
+    def __init__(self, variable):
+        """ Constructor
+        @param variable    variables.variable.Variable, the parent variable
+        """
+        self.__variable = variable
+        # True if access specifiers or base classes are flattened into the
+        # children, which then can only be loaded all at once
+        self.__flat = False
+        self.clear()
+
+    def clear(self):
+        """ forget all loaded children, they are reloaded when accessed """
+        # lists of children by page number, least recently used first
+        self.__pages = OrderedDict()
+        self.__pageSize = self.PAGE_SIZE
+        # number of children, None until the first page is loaded
+        self.__count = None
+
+    def loaded(self):
+        """ return the children that are currently loaded """
+        return [child for page in self.__pages.values() for child in page]
+
+    def range(self, start, end):
+        """ return the children start to end - 1, loading only the pages
+            that contain them
+        """
+        count = len(self)
+        start = max(0, start)
+        end = min(end, count)
+        children = []
+        while start < end:
+            page = self.__page(start // self.__pageSize)
+            offset = start % self.__pageSize
+            n = min(end - start, len(page) - offset)
+            children.extend(page[offset:offset + n])
+            start += n
+        return children
+
+    def firstRange(self):
+        """ return the (start, end) arguments the children are loaded with
+            when they are accessed the first time, see ChildPrefetcher
+        """
+        if self.__flat:
+            return None, None
+        return 0, 2 * self.PAGE_SIZE
+
+    def index(self, child):
+        for n, page in self.__pages.items():
+            for i, c in enumerate(page):
+                if c is child:
+                    return n * self.__pageSize + i
+        raise ValueError("child is not loaded")
+
+    def __page(self, n):
+        page = self.__pages.pop(n, None)
+        if page is None:
+            self.__load(n)
+            page = self.__pages.pop(n)
+        self.__pages[n] = page
+        return page
+
+    def __load(self, n):
+        if self.__flat:
+            children, flattened = self.__variable._loadChildren(None, None)
+            self.__setAll(children)
+            return
+
+        size = self.__pageSize
+        first, last = n, n
+        # prefetch the following page, or the previous one when scrolling up
+        if self.__count is None or (n + 1) * size < self.__count:
+            if n + 1 not in self.__pages:
+                last = n + 1
+        if last == n and n > 0 and n - 1 not in self.__pages:
+            first = n - 1
+
+        start = first * size
+        end = (last + 1) * size
+        if self.__count is not None:
+            end = min(end, self.__count)
+        children, flattened = self.__variable._loadChildren(start, end)
+
+        if flattened:
+            # the children cannot be addressed by index, load all of them
+            if start != 0 or end < self.__variable.numChild:
+                self.__variable._dropChildren(children)
+                children, flattened = self.__variable._loadChildren(None, None)
+            self.__flat = True
+            self.__setAll(children)
+            return
+
+        if self.__count is None:
+            self.__count = self.__variable.numChild
+        for i in range(first, last + 1):
+            offset = (i - first) * size
+            self.__pages[i] = children[offset:offset + size]
+
+        while len(self.__pages) > self.MAX_PAGES:
+            n_, page = self.__pages.popitem(last=False)
+            self.__variable._dropChildren(page)
+
+    def __setAll(self, children):
+        """ keep children as the only page """
+        self.__dropAll()
+        self.__pageSize = max(1, len(children))
+        self.__count = len(children)
+        self.__pages[0] = children
+
+    def __dropAll(self):
+        for page in self.__pages.values():
+            self.__variable._dropChildren(page)
+        self.__pages = OrderedDict()
+
+    def __len__(self):
+        if self.__count is None:
+            if self.__variable.numChild == 0:
+                return 0
+            self.__page(0)
+        return self.__count
+
+    def __nonzero__(self):
+        """ True if any children are loaded (does not load children) """
+        return bool(self.__pages)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            return self.range(start, stop)[::step]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("child index out of range")
+        return self.__page(key // self.__pageSize)[key % self.__pageSize]
+
+    def __iter__(self):
+        for i in xrange(len(self)):
+            yield self[i]
@@ -0,0 +1,143 @@
+# ricodebug - A GDB frontend which focuses on visually supported
+# debugging using data structure graphs and SystemC features.
+#
+# Copyright (C) 2011  The ricodebug project team at the
+# Upper Austrian University Of Applied Sciences Hagenberg,
+# Department Embedded Systems Design
+#
+# This file is part of ricodebug.
+#
+# ricodebug is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For further information see <http://syscdbg.hagenberg.servus.at/>.
+
+
+""" Background loading of the children of variables """
+
+from helpers.gdboutput import GdbOutput
+
+
+class ChildPrefetcher(object):
+    """ Lists the children of variables that are likely to be shown soon
+        (eg. of expanded tree items after a stop) in the command dispatcher's
+        thread. The results are kept until the variables' children are loaded
+        by the pool, which then does not need to wait for gdb. <br>
+        Results are dropped as soon as the inferior runs (see ResultCache) or
+        children are deleted in gdb (see invalidate()). Listing the children
+        created varobjs in gdb; the variables of dropped results are returned
+        by takeDropped(), so the pool can delete them.
+    """
+
+    # maximum number of variables whose children are listed per stop
+    MAX_PREFETCH = 32
+
+    def __init__(self, connector):
+        """ Constructor
+        @param connector    gdbconnector.GdbConnector, used to send the commands
+        """
+        self.connector = connector
+        self.__epoch = 0
+        self.__stamp = None
+        self.__results = {}
+        self.__requested = set()
+        # gdb names of the variables whose listed children were not used
+        self.__dropped = set()
+        self.resetCounters()
+
+    def resetCounters(self):
+        self.issued = 0
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        """ Drop all results, including the ones still being listed. """
+        self.__epoch += 1
+
+    def __currentStamp(self):
+        stamp = (self.connector.resultCache.generation, self.__epoch)
+        if stamp != self.__stamp:
+            self.__stamp = stamp
+            self.__dropped.update(key[0] for key in self.__results)
+            self.__results = {}
+            self.__requested = set()
+        return stamp
+
+    def prefetch(self, variables):
+        """ List the children of variables in the background, skipping the
+            ones whose children are already loaded or requested.
+        @param variables    Variable[], most wanted first
+        """
+        stamp = self.__currentStamp()
+        keys = []
+        for var in variables:
+            if len(self.__requested) >= self.MAX_PREFETCH:
+                break
+            # the children of pointers are root variables, not listed
+            if var is None or var.numChild == 0 or isinstance(var._childs, list) \
+                    or var._childs:
+                continue
+            key = (var._gdbName,) + var._childs.firstRange()
+            if key not in self.__requested:
+                self.__requested.add(key)
+                keys.append(key)
+        if not keys:
+            return
+
+        self.issued += len(keys)
+        cmds = [self.connector.var_list_children_cmd(*key) for key in keys]
+        self.connector.executeBatchAsync(cmds,
+                lambda results: self.__store(stamp, keys, results))
+
+    def __store(self, stamp, keys, results):
+        stale = stamp != self.__currentStamp()
+        for key, res in zip(keys, results):
+            if res.class_ == GdbOutput.ERROR:
+                continue
+            if stale:
+                self.__dropped.add(key[0])
+            else:
+                self.__results[key] = res
+
+    def take(self, name, start, end):
+        """ Return the prefetched -var-list-children result for the children
+            start to end - 1 (all if start is None) of the variable name and
+            forget it, None if the children were not prefetched.
+        """
+        self.__currentStamp()
+        res = self.__results.pop((name, start, end), None)
+        if res is None:
+            self.misses += 1
+            # other ranges of the variable's children will not be used
+            for key in [k for k in self.__results if k[0] == name]:
+                del self.__results[key]
+                self.__dropped.add(name)
+        else:
+            self.hits += 1
+        return res
+
+    def takeDropped(self):
+        """ Return the gdb names of the variables whose prefetched children
+            were dropped since the last call. """
+        self.__currentStamp()
+        dropped = self.__dropped
+        self.__dropped = set()
+        return dropped
+
+    def report(self):
+        """Return a summary of the counters."""
+        loads = self.hits + self.misses
+        used = 100.0 * self.hits / self.issued if self.issued else 0.0
+        served = 100.0 * self.hits / loads if loads else 0.0
+        return "%d prefetched, %d used (%.1f%%), %.1f%% of %d loads served" % \
+                (self.issued, self.hits, used, served, loads)
@@ -26,6 +26,7 @@ from variables.variable import Variable
 
 
 class PtrVariable(Variable):
+    __slots__ = ()
     _childFormat = "(*%(parent)s)"
 
     def dereference(self):
@@ -34,7 +35,9 @@ class PtrVariable(Variable):
         """
         # avoid null-pointer dereference
         if self.value != "0x0":
-            return self._vp.getVar(self._childFormat % {"parent": self.uniqueName})
+            # the target is kept up to date as long as the pointer exists and
+            # deleted by the pool once the pointer no longer holds it
+            return self._vp.getVar(self._childFormat % {"parent": self.uniqueName}, self)
         else:
             return None
 
@@ -42,6 +45,14 @@ class PtrVariable(Variable):
         if not self._childs:
             self._childs = [self.dereference()]
 
+    def getChildRange(self, start, end):
+        return self.childs[start:end]
+
+    def removeChildren(self):
+        for child in self._childs:
+            child.removeChildren()
+        self._childs = []
+
     def __getitem__(self, name):
         if name != "*":
             raise ValueError("PtrVariable needs to be dereferenced (index [\"*\"])")
@@ -26,4 +26,4 @@ from variables.variable import Variable
 
 
 class StdVariable(Variable):
-    pass
+    __slots__ = ()
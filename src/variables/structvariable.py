@@ -26,4 +26,5 @@ from variables.variable import Variable
 
 
 class StructVariable(Variable):
+    __slots__ = ()
     _childFormat = "%(parent)s.%(child)s"
@@ -0,0 +1,120 @@
+# ricodebug - A GDB frontend which focuses on visually supported
+# debugging using data structure graphs and SystemC features.
+#
+# Copyright (C) 2011  The ricodebug project team at the
+# Upper Austrian University Of Applied Sciences Hagenberg,
+# Department Embedded Systems Design
+#
+# This file is part of ricodebug.
+#
+# ricodebug is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For further information see <http://syscdbg.hagenberg.servus.at/>.
+
+""" Classification of gdb types, cached by the type string """
+
+import re
+from . import arraydata
+
+_ARRAY = re.compile(r"^([^[]+?) ?\[(\d*)\](.*)$")
+_QUALIFIERS = re.compile(r"(?: (?:const|volatile))+$")
+
+
+class TypeInfo(object):
+    """ What ricodebug needs to know about a type to create variables of it """
+    STD, POINTER, STRUCT, ARRAY = range(4)
+
+    def __init__(self, type_, kind, elementType=None, count=None):
+        """ Constructor
+        @param type_          string, the type as reported by gdb
+        @param kind           one of STD, POINTER, STRUCT and ARRAY
+        @param elementType    string, pointed to type or element type of an array
+        @param count          int, number of elements of an array
+        """
+        self.type = type_
+        self.kind = kind
+        self.elementType = elementType
+        self.count = count
+        # (element type, count) for arrays and vectors of scalars, see arraydata
+        self.scalarArray = arraydata.scalarArrayType(type_)
+        self.size = None
+
+    def getSize(self, connector):
+        """ return sizeof the type (asked from gdb once), None if unknown """
+        if self.size is None:
+            value = connector.evaluateCached("\"sizeof(%s)\"" % self.type)
+            if value is not None:
+                self.size = int(value)
+        return self.size
+
+
+class TypeInfoCache(object):
+    """ Maps gdb type strings to TypeInfos. <br>
+        Types are classified by their name: pointers end with '*', arrays with
+        '[N]'. Only for named types (eg. typedefs) the first varobj seen is
+        used to decide whether the type is a pointer (its value is an address)
+        or a structure (it has children).
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """ forget all types, eg. if the executable or the pretty printers change """
+        self.__types = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, type_, value, numChild):
+        """ return the TypeInfo for type_
+        @param type_       string, the type as reported by gdb
+        @param value       string, value of a varobj of the type
+        @param numChild    int, number of children of that varobj
+        """
+        info = self.__types.get(type_)
+        if info is not None:
+            self.hits += 1
+            return info
+
+        self.misses += 1
+        info = self.__classify(type_, value, numChild)
+        self.__types[type_] = info
+        return info
+
+    def __classify(self, type_, value, numChild):
+        t = _QUALIFIERS.sub("", type_)
+        if t.endswith("&"):                 # references behave like their target
+            t = _QUALIFIERS.sub("", t[:-1].rstrip())
+
+        if t.endswith("*"):
+            return TypeInfo(type_, TypeInfo.POINTER, t[:-1].rstrip())
+
+        if t.endswith(")"):                 # functions and function pointers
+            return TypeInfo(type_, TypeInfo.STD)
+
+        if "(*)" in t:                      # pointers to arrays
+            return TypeInfo(type_, TypeInfo.POINTER, t.replace("(*)", "").rstrip())
+
+        m = _ARRAY.match(t)
+        if m:
+            # the element type of a multidimensional array is an array
+            count = int(m.group(2)) if m.group(2) else None
+            return TypeInfo(type_, TypeInfo.ARRAY, (m.group(1) + " " + m.group(3)).strip(), count)
+
+        # the name does not tell, eg. for a typedef; look at the varobj
+        if value.startswith("0x"):
+            return TypeInfo(type_, TypeInfo.POINTER)
+        elif numChild > 0:
+            return TypeInfo(type_, TypeInfo.STRUCT)
+        return TypeInfo(type_, TypeInfo.STD)
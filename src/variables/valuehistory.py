@@ -0,0 +1,255 @@
+# ricodebug - A GDB frontend which focuses on visually supported
+# debugging using data structure graphs and SystemC features.
+#
+# Copyright (C) 2011  The ricodebug project team at the
+# Upper Austrian University Of Applied Sciences Hagenberg,
+# Department Embedded Systems Design
+#
+# This file is part of ricodebug.
+#
+# ricodebug is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For further information see <http://syscdbg.hagenberg.servus.at/>.
+
+
+""" History of the values of the variables of a VariablePool """
+
+from array import array
+import csv
+import struct
+import tempfile
+
+# number of records kept in memory; when it is exceeded, the older half is
+# moved to a temporary file
+MAX_RECORDS = 200000
+# stop index, variable id, length of the value and offset of the previous
+# spilled record of the same variable (-1 for none) of a spilled record
+_RECORD = struct.Struct("<IIIq")
+# variable id and length of the name of a variable that is not recorded
+# anymore
+_NAME = struct.Struct("<II")
+
+
+class ValueHistory(object):
+    """ Records the values variables changed to at the stops of the
+        inferior. <br>
+        Every record is a (stop index, variable id, value) triple. The stop
+        indices and ids are kept in arrays, equal values share one string.
+        Old records are spilled to disk, so the memory used is bounded no
+        matter how many stops are recorded. The records of every variable
+        are indexed, the spilled ones by a chain of offsets in the spill
+        file, so its history is found without a scan.
+    """
+
+    def __init__(self):
+        self.__spill = None
+        self.__retired = None
+        self.clear()
+
+    def clear(self):
+        """ Forget all records. """
+        self.stop = 0
+        self.stops = array("L")
+        self.ids = array("L")
+        self.values = []
+        # unique name of the variables by id; the names of the variables
+        # forgotten by forgetNames are moved to a temporary file
+        self.names = {}
+        self.__nextId = 0
+        self.__ids = {}
+        self.__strings = {}
+        # (value, previous value) of the last records by id
+        self.__last = {}
+        # indices of the records in memory of each variable by id
+        self.__records = {}
+        # offset of the last spilled record of each variable by id
+        self.__lastSpilled = {}
+        for f in (self.__spill, self.__retired):
+            if f is not None:
+                f.close()
+        self.__spill = None
+        self.__spilled = 0
+        self.__retired = None
+
+    def __len__(self):
+        return self.__spilled + len(self.stops)
+
+    def nextStop(self):
+        """ Start recording the values of the next stop. """
+        self.stop += 1
+
+    def forgetNames(self):
+        """ Assign new ids to the gdb names recorded from now on, eg. because
+            gdb reuses the names after the variables were deleted. The
+            records made so far are kept. """
+        if self.__ids and self.__retired is None:
+            self.__retired = tempfile.TemporaryFile(prefix="ricodebug-names")
+        for id_ in self.__ids.itervalues():
+            name = str(self.names.pop(id_))
+            self.__retired.write(_NAME.pack(id_, len(name)) + name)
+            self.__last.pop(id_, None)
+            self.__records.pop(id_, None)
+            self.__lastSpilled.pop(id_, None)
+        self.__ids = {}
+
+    def __id(self, gdbName, uniqueName):
+        id_ = self.__ids.get(gdbName)
+        if id_ is None:
+            id_ = self.__ids[gdbName] = self.__nextId
+            self.__nextId += 1
+            self.names[id_] = uniqueName
+        return id_
+
+    def initialValue(self, gdbName, uniqueName, value):
+        """ Set the value a variable had when it was created. It is not
+            recorded, but is the previous value of its first change.
+        @param gdbName       string, gdb's name of the variable
+        @param uniqueName    string, the expression shown for the variable
+        @param value         string, the value
+        """
+        id_ = self.__id(gdbName, uniqueName)
+        last = self.__last.get(id_)
+        if last is None:
+            self.__last[id_] = (value, None)
+        elif last[0] != value:
+            # eg. a child that was created again after a change
+            self.record(gdbName, uniqueName, value)
+
+    def record(self, gdbName, uniqueName, value):
+        """ Append the value of a variable at the current stop if it differs
+            from its last value.
+        @param gdbName       string, gdb's name of the variable
+        @param uniqueName    string, the expression shown for the variable
+        @param value         string, the value
+        """
+        id_ = self.__id(gdbName, uniqueName)
+        last = self.__last.get(id_)
+        if last is not None and last[0] == value:
+            return
+        value = self.__strings.setdefault(value, value)
+
+        self.__records.setdefault(id_, array("L")).append(len(self))
+        self.stops.append(self.stop)
+        self.ids.append(id_)
+        self.values.append(value)
+        self.__last[id_] = (value, last[0] if last is not None else None)
+
+        if len(self.stops) > MAX_RECORDS:
+            self.__spillRecords(MAX_RECORDS // 2)
+
+    def previous(self, gdbName):
+        """ Return the value the variable had before its last change, None if
+            it did not change yet. """
+        id_ = self.__ids.get(gdbName)
+        if id_ is None:
+            return None
+        return self.__last[id_][1]
+
+    def history(self, gdbName):
+        """ Return the recorded values of a variable as a list of (stop
+            index, value) tuples, including the spilled ones. """
+        id_ = self.__ids.get(gdbName)
+        if id_ is None:
+            return []
+        history = []
+        offset = self.__lastSpilled.get(id_, -1)
+        while offset != -1:
+            stop, _, value, offset = self.__readSpilled(offset)
+            history.append((stop, value))
+        history.reverse()
+        if self.__spill is not None:
+            self.__spill.seek(0, 2)
+        for i in self.__records.get(id_, ()):
+            i -= self.__spilled
+            history.append((self.stops[i], self.values[i]))
+        return history
+
+    def __readSpilled(self, offset):
+        f = self.__spill
+        f.seek(offset)
+        stop, id_, length, previous = _RECORD.unpack(f.read(_RECORD.size))
+        return stop, id_, f.read(length), previous
+
+    def records(self):
+        """ Iterate over all (stop index, variable id, value) records, the
+            spilled ones first. """
+        if self.__spill is not None:
+            f = self.__spill
+            f.seek(0)
+            for _ in xrange(self.__spilled):
+                stop, id_, length, _ = _RECORD.unpack(f.read(_RECORD.size))
+                yield stop, id_, f.read(length)
+            f.seek(0, 2)
+        for record in zip(self.stops, self.ids, self.values):
+            yield record
+
+    def __names(self):
+        """ Return the names of all variables ever recorded by id. """
+        names = {}
+        f = self.__retired
+        if f is not None:
+            f.seek(0)
+            header = f.read(_NAME.size)
+            while header:
+                id_, length = _NAME.unpack(header)
+                names[id_] = f.read(length)
+                header = f.read(_NAME.size)
+            f.seek(0, 2)
+        names.update(self.names)
+        return names
+
+    def export(self, f):
+        """ Write all records as CSV (stop, expression, value) to the file
+            object f. """
+        writer = csv.writer(f)
+        writer.writerow(["stop", "expression", "value"])
+        names = self.__names()
+        for stop, id_, value in self.records():
+            writer.writerow([stop, names[id_], value])
+
+    def __spillRecords(self, n):
+        """ Move the n oldest records to the spill file. """
+        if self.__spill is None:
+            self.__spill = tempfile.TemporaryFile(prefix="ricodebug-history")
+        pack = _RECORD.pack
+        chunks = []
+        # number of spilled records by id
+        spilled = {}
+        self.__spill.seek(0, 2)
+        offset = self.__spill.tell()
+        for stop, id_, value in zip(self.stops[:n], self.ids[:n], self.values[:n]):
+            value = str(value)
+            chunks.append(pack(stop, id_, len(value),
+                               self.__lastSpilled.get(id_, -1)))
+            chunks.append(value)
+            # only the chains of the variables that are still recorded are
+            # needed, see history()
+            if id_ in self.names:
+                self.__lastSpilled[id_] = offset
+            spilled[id_] = spilled.get(id_, 0) + 1
+            offset += _RECORD.size + len(value)
+        self.__spill.write("".join(chunks))
+        self.__spilled += n
+
+        del self.stops[:n]
+        del self.ids[:n]
+        del self.values[:n]
+        for id_, count in spilled.iteritems():
+            records = self.__records.get(id_)
+            if records is not None:
+                del records[:count]
+                if not records:
+                    del self.__records[id_]
+        # only keep the strings that are still referenced
+        self.__strings = dict((v, v) for v in self.values)
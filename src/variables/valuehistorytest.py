@@ -0,0 +1,90 @@
+import csv
+import unittest
+from StringIO import StringIO
+from variables import valuehistory
+from variables.valuehistory import ValueHistory
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.maxRecords = valuehistory.MAX_RECORDS
+        # spill after a few records
+        valuehistory.MAX_RECORDS = 8
+        self.history = ValueHistory()
+
+    def tearDown(self):
+        valuehistory.MAX_RECORDS = self.maxRecords
+        self.history.clear()
+
+    def recordStops(self, n):
+        """ Record n stops; a changes at every stop, b at every third. """
+        h = self.history
+        h.initialValue("var1", "a", "0")
+        h.initialValue("var2", "b", "0")
+        for stop in range(1, n + 1):
+            h.nextStop()
+            h.record("var1", "a", str(stop))
+            h.record("var2", "b", str(stop // 3))
+
+    def test1(self):
+        # unchanged values are not recorded
+        self.recordStops(2)
+        self.assertEqual(len(self.history), 2)
+        self.assertEqual(self.history.history("var1"), [(1, "1"), (2, "2")])
+        self.assertEqual(self.history.history("var2"), [])
+        self.assertEqual(self.history.previous("var1"), "1")
+        self.assertEqual(self.history.previous("var2"), None)
+        self.assertEqual(self.history.previous("var3"), None)
+
+    def test2(self):
+        # history and previous across the spill boundary
+        self.recordStops(30)
+        self.assertEqual(len(self.history), 40)
+        self.assertTrue(len(self.history.stops) <= valuehistory.MAX_RECORDS)
+        self.assertEqual(self.history.history("var1"),
+                         [(i, str(i)) for i in range(1, 31)])
+        self.assertEqual(self.history.history("var2"),
+                         [(i, str(i // 3)) for i in range(3, 31, 3)])
+        self.assertEqual(self.history.previous("var1"), "29")
+        self.assertEqual(self.history.previous("var2"), "9")
+
+        # recording continues after reading the spill file
+        self.history.nextStop()
+        self.history.record("var1", "a", "x")
+        self.assertEqual(self.history.history("var1")[-2:], [(30, "30"), (31, "x")])
+
+    def test3(self):
+        # the export contains the spilled records first, in order
+        self.recordStops(30)
+        f = StringIO()
+        self.history.export(f)
+        rows = list(csv.reader(StringIO(f.getvalue())))
+        self.assertEqual(rows[0], ["stop", "expression", "value"])
+        expected = []
+        for stop in range(1, 31):
+            expected.append([str(stop), "a", str(stop)])
+            if stop % 3 == 0:
+                expected.append([str(stop), "b", str(stop // 3)])
+        self.assertEqual(rows[1:], expected)
+
+    def test4(self):
+        # forgotten names get new ids, their records are still exported
+        self.recordStops(10)
+        self.history.forgetNames()
+        self.assertEqual(self.history.history("var1"), [])
+        self.assertEqual(self.history.previous("var1"), None)
+        self.assertEqual(self.history.names, {})
+
+        self.history.nextStop()
+        self.history.record("var1", "c", "y")
+        self.assertEqual(self.history.history("var1"), [(11, "y")])
+        f = StringIO()
+        self.history.export(f)
+        rows = list(csv.reader(StringIO(f.getvalue())))
+        self.assertEqual(len(rows), 1 + 14)
+        self.assertEqual(rows[1], ["1", "a", "1"])
+        self.assertEqual(rows[4], ["3", "b", "1"])
+        self.assertEqual(rows[-1], ["11", "c", "y"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -22,48 +22,120 @@
 #
 # For further information see <http://syscdbg.hagenberg.servus.at/>.
 
-from PyQt4.QtCore import QObject, pyqtSignal
+from .childstore import ChildStore
+from .variabletable import IN_SCOPE
+from . import arraydata
 
 
 MIME_TYPE = "application/x-variableexpresssion"
 
 
-class Variable(QObject):
+def _column(name):
+    """ Return a property reading and writing the column name of the row of
+        the variable. """
+    def get(self):
+        return getattr(self._t, name)[self._row]
+
+    def set_(self, value):
+        getattr(self._t, name)[self._row] = value
+    return property(get, set_)
+
+
+class _ChangedSignal(object):
+    """ Stands in for the changed signal of a variable; connections are kept
+        by the ChangeDispatcher of the pool. """
+    __slots__ = ("variable",)
+
+    def __init__(self, variable):
+        self.variable = variable
+
+    def connect(self, slot):
+        self.variable._vp.dispatcher.connect(self.variable, slot)
+
+    def disconnect(self, slot=None):
+        self.variable._vp.dispatcher.disconnect(self.variable, slot)
+
+    def emit(self, value=None):
+        self.variable._vp.dispatcher.notify(self.variable)
+
+
+class Variable(object):
     """ Class holding a Variable. <br>
         This is the Parent of all Variable-Classes and the Core of all VariableWrappers.
         It holds the most basic Elements of a Variable-Object, that are useful for all (or at least the most) purposes.
+        The state of the variable is stored in a row of the pool's
+        VariableTable, the object itself only keeps references to it.
     """
-    childFormat = None
+    __slots__ = ("_t", "_row", "_vp", "_childs", "typeInfo", "__arrayData",
+                 "__weakref__")
 
-    changed = pyqtSignal(str)
+    # expression of a child, set by the subclasses that have children
+    _childFormat = None
+
+    exp = _column("exp")
+    type = _column("type")
+    value = _column("value")
+    access = _column("access")
+    uniqueName = _column("uniqueName")
+    numChild = _column("numChild")
+    _gdbName = _column("gdbName")
 
     def __init__(self, variablepool, exp, gdbName,
             uniqueName, type_, value, inScope,
-            numChild, access):
-        QObject.__init__(self)
-        self.exp = exp
-        self.type = type_
-        self.inScope = inScope
-        self.access = access
-        self.uniqueName = uniqueName
-        self.value = value
-        self.numChild = numChild
+            numChild, access, parent=None):
+        """ Constructor
+        @param parent    Variable, the variable this one is a child of
+        """
+        table = variablepool.table
+        self._t = table
+        self._row = table.add(gdbName, exp, uniqueName, type_, value, access,
+                numChild, parent._row if parent is not None else -1,
+                IN_SCOPE if inScope else 0)
+        table.views[self._row] = self
 
         self._vp = variablepool
-        self._gdbName = gdbName
-        self._childs = []
-    
-        self.hasChildren = property(lambda self: self.numChild > 0)
+        self._childs = ChildStore(self)
+        # variables.typeinfo.TypeInfo, set by the pool
+        self.typeInfo = None
+        # (stop generation, elements) of the last getData call
+        self.__arrayData = (None, None)
+
+    def __getInScope(self):
+        return bool(self._t.flags[self._row] & IN_SCOPE)
+
+    def __setInScope(self, inScope):
+        if inScope:
+            self._t.flags[self._row] |= IN_SCOPE
+        else:
+            self._t.flags[self._row] &= ~IN_SCOPE
+    inScope = property(__getInScope, __setInScope)
+
+    hasChildren = property(lambda self: self.numChild > 0)
+
+    changed = property(_ChangedSignal)
 
     def _getChildrenFromGdb(self):
         """Load the children from GDB, if there are any."""
         if not self.hasChildren:
-            raise AttributeError("No children available.")
+            # the ChildStore stays empty, gdb is not asked
+            return
         if not self._childFormat:
             raise AttributeError("No child format set.")
 
-        if not self._childs:
-            self._vp.getChildren(self._gdbName, self._childs, self.access, self.uniqueName, self._childFormat)
+    def _loadChildren(self, start, end):
+        """ Load the children start to end - 1 (all if start is None) from gdb.
+            Called by the ChildStore.
+        @return    (Variable[], bool), the children and whether access
+                   specifiers or base classes were flattened into them
+        """
+        children = []
+        flattened = self._vp.getChildren(self._gdbName, children, self.access,
+                self.uniqueName, self._childFormat, start, end, self)
+        return children, flattened
+
+    def _dropChildren(self, children):
+        """ Delete children that the ChildStore no longer keeps. """
+        self._vp.removeChildren(children)
 
     def __getChilds(self):
         """Return the lazily loaded list of children."""
@@ -71,6 +143,37 @@ class Variable(QObject):
         return self._childs
     childs = property(__getChilds)
 
+    def isScalarArray(self):
+        """Return True if the variable is an array or std::vector of a scalar
+        type, whose elements can be read with getData."""
+        return self.typeInfo is not None and self.typeInfo.scalarArray is not None
+
+    def getData(self):
+        """Return the elements of an array (or std::vector) of a scalar type
+        as a typed buffer, read from the inferior's memory at once. The
+        buffer is reused until the inferior runs again. Returns None for
+        other variables or if the memory could not be read."""
+        if not self.isScalarArray():
+            return None
+        generation = self._vp.connector.resultCache.generation
+        if self.__arrayData[0] != generation:
+            self.__arrayData = (generation, arraydata.readArray(
+                    self._vp.connector, self.uniqueName, self.typeInfo.scalarArray))
+        return self.__arrayData[1]
+
+    previousValue = property(lambda self: self._vp.history.previous(self._gdbName),
+            doc="the value before the last change, None if it did not change")
+
+    def getHistory(self):
+        """Return the recorded values of the variable as (stop index, value)
+        tuples, see variables.valuehistory.ValueHistory."""
+        return self._vp.history.history(self._gdbName)
+
+    def getChildRange(self, start, end):
+        """Return the children start to end - 1; only their pages are loaded."""
+        self._getChildrenFromGdb()
+        return self._childs.range(start, end)
+
     def getChildrenNames(self):
         """Return the names of all children."""
         return [i.exp for i in self.childs]
@@ -97,15 +200,15 @@ class Variable(QObject):
                 str(len(self._childs)) if self._childs else ""]))
 
     def emitChanged(self):
-        self.changed.emit(self.value)
+        self._vp.dispatcher.notify(self)
 
     def makeWrapper(self, factory):
         return factory.makeWrapper(self)
     
     def removeChildren(self):
-        for child in self._childs:
+        for child in self._childs.loaded():
             child.removeChildren()
-        del self._childs[:]
+        self._childs.clear()
 
-    def die(self):
-        self._vp.removeVar(self)
+    def die(self, subscriber=None):
+        self._vp.removeVar(self, subscriber)
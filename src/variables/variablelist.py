@@ -37,16 +37,17 @@ class VariableList(QObject):
         @param distributedObjects    distributedobjects.DistributedObjects, the DistributedObjects-Instance """
         QObject.__init__(self)
         self.varPool = distributedObjects.variablePool
+        self.varPool.registerList(self)
         self.factory = factory
         self.list = []
+        # the variables of an inactive list are not updated by the pool
+        self.active = True
 
     def addVarByName(self, varName):
         """ adds new VariableWrapper for given varName and returns this newly added VariableWrapper
         @param varName    string, the name of the Variable to add  """
-        var = self.varPool.getVar(str(varName))
-        vw = var.makeWrapper(self.factory)
-        self.list.append(vw)
-        return vw
+        var = self.varPool.getVar(str(varName), self)
+        return self.__addWrapper(var)
 
     def addVar(self, varWrapper):
         """ adds VariableWrapper varWrapper to the list
@@ -55,26 +56,44 @@ class VariableList(QObject):
     
     def reloadLocals(self):
         self.clear()
-        for var in self.varPool.reloadLocals():
-            vw = var.makeWrapper(self.factory)
-            self.list.append(vw)
+        for var in self.varPool.reloadLocals(self):
+            self.__addWrapper(var)
             
     def addLocals(self):
-        for var in self.varPool.addLocals():
-            vw = var.makeWrapper(self.factory)
-            self.list.append(vw)
+        for var in self.varPool.addLocals(self):
+            self.__addWrapper(var)
         
+    def __addWrapper(self, var):
+        if not self.active:
+            self.varPool.unsubscribe([var], self)
+        vw = var.makeWrapper(self.factory)
+        self.list.append(vw)
+        return vw
+
+    def setActive(self, active):
+        """ (un)subscribe all variables of the list at the variable pool, eg.
+            when the view showing them is hidden or shown again
+        @param active    bool, True if the variables should be kept up to date """
+        if active == self.active:
+            return
+        self.active = active
+        variables = [vw._v for vw in self.list]
+        if active:
+            self.varPool.subscribe(variables, self)
+        else:
+            self.varPool.unsubscribe(variables, self)
+
     def removeVar(self, varWrapper):
         """ removes VariableWrapper varWrapper from the list
         @param varWrapper    variables.variablewrapper.VariableWrapper, VariableWrapper to remove from the list """
         if varWrapper in self.list:
             self.list.remove(varWrapper)
-            varWrapper.die()
+            varWrapper.die(self)
 
     def clear(self):
         """ Clears the whole VariableList. """
         for vw in self.list:
-            vw.die()
+            vw.die(self)
         self.list = []
 
     def getVariableWrapper(self, var):
@@ -22,20 +22,32 @@
 #
 # For further information see <http://syscdbg.hagenberg.servus.at/>.
 
-from PyQt4.QtCore import QObject
+from PyQt4.QtCore import QObject, QTimer, pyqtSignal
 from helpers.gdboutput import GdbOutput
 from .stdvariable import StdVariable
 from .ptrvariable import PtrVariable
 from .structvariable import StructVariable
 from .arrayvariable import ArrayVariable
+from .typeinfo import TypeInfo, TypeInfoCache
+from .variabletable import VariableTable, ChangeDispatcher
+from .valuehistory import ValueHistory
+from .prefetcher import ChildPrefetcher
 import logging
-import re
+import weakref
 from helpers.excep import VariableNotFoundException
 
+# time (in ms) without variable updates after which unreachable varobjs are
+# deleted in gdb
+GC_DELAY = 1000
+
 
 class VariablePool(QObject):
     """ Variablepool holding all variables created once from a view """
 
+    # number of varobjs in gdb, number of variables in the pool and number
+    # of leaked root variables found so far, see collect()
+    varobjCountsChanged = pyqtSignal(int, int, int)
+
     def __init__(self, distributedObjects):
         """ Constructor
         @param distributedObjects    distributedobjects.DistributedObjects, the DistributedObjects-Instance
@@ -47,12 +59,47 @@ class VariablePool(QObject):
         self.connector = distributedObjects.gdb_connector
         #self.list = {}
         self.variables = {}
+        # state of all variables, see Variable
+        self.table = VariableTable()
+        # delivers the changed signals of the variables
+        self.dispatcher = ChangeDispatcher(self)
+        # values of the variables at the previous stops
+        self.history = ValueHistory()
+        # lists children in the background, see prefetchChildren
+        self.prefetcher = ChildPrefetcher(self.connector)
+        # classification of the types of the variables
+        self.types = TypeInfoCache()
+        # subscribers of the root variables by gdb name; only variables with
+        # at least one subscriber are updated when the inferior stops
+        # subscribers are held weakly, so lists that are dropped without
+        # being cleared do not keep their variables alive
+        self.subscriptions = {}
+        # gdb names of the variables that are frozen in gdb
+        self.frozen = set()
+        # root variables by (expression, frame key), shared by all users
+        self.index = {}
+        # (result cache generation, key) of the selected frame, see frameKey
+        self.__frameKey = (None, None)
+        # number of getVar calls that returned a root variable, by gdb name
+        self.refCounts = {}
+        # VariableLists, the variables they hold are reachable (see collect)
+        self.lists = weakref.WeakSet()
+        # gdb names of removed root varobjs, deleted in gdb by collect()
+        self.garbage = []
+        # number of unreachable root variables deleted so far
+        self.leaked = 0
+        self.__gcTimer = QTimer(self)
+        self.__gcTimer.setSingleShot(True)
+        self.__gcTimer.setInterval(GC_DELAY)
+        self.__gcTimer.timeout.connect(self.collect)
 
         # signalproxy
         self.signalProxy = distributedObjects.signalProxy
         self.distributedObjects.signalProxy.tracepointOccurred.connect(self.justUpdateValues)
         self.distributedObjects.signalProxy.inferiorStoppedNormally.connect(self.updateVars)
         self.distributedObjects.signalProxy.cleanupModels.connect(self.clearVars)
+        # varobjs are only collected while the inferior is stopped
+        self.distributedObjects.signalProxy.inferiorIsRunning.connect(self.__gcTimer.stop)
 
     def clearVars(self):
         """ delete all variables stored in pool
@@ -60,25 +107,196 @@ class VariablePool(QObject):
         """
 
         self.variables = {}
-        
-    def reloadLocals(self):
+        # variables still held by views keep the old table
+        self.table = VariableTable()
+        self.dispatcher.listeners.clear()
+        # gdb reuses the names of deleted variables
+        self.history.forgetNames()
+        self.subscriptions = {}
+        self.frozen = set()
+        self.index = {}
+        self.refCounts = {}
+        self.garbage = []
+        self.prefetcher.invalidate()
+        # pretty printers or the executable might have changed
+        self.types.clear()
+        self.__emitCounts()
+
+    def registerList(self, varList):
+        """ make the variables of a VariableList reachable for collect()
+        @param varList    variables.variablelist.VariableList, the list
+        """
+        self.lists.add(varList)
+
+    def collect(self):
+        """ delete unreachable variables and the removed ones in gdb <br>
+            root variables are reachable if they are held by a registered
+            VariableList, were returned by getVar without a subscriber or are
+            the targets of reachable pointers; all others (eg. of tool tips
+            that were dropped without clearing their list) are leaked and
+            removed. The varobjs are deleted with a single batch.
+            this function is called once no variables were updated for
+            GC_DELAY ms
+        """
+        stack = [vw._v for varList in self.lists for vw in varList.list]
+        stack += [self.variables[name]
+                  for name, subscribers in self.subscriptions.items()
+                  if self in subscribers and name in self.variables]
+        reachable = set()
+        while stack:
+            var = stack.pop()
+            if var is None or var in reachable:
+                continue
+            reachable.add(var)
+            if isinstance(var._childs, list):
+                stack.extend(var._childs)
+            else:
+                stack.extend(var._childs.loaded())
+
+        leaked = [var for var in set(self.index.values()) if var not in reachable]
+        if leaked:
+            logging.info("Deleting %d unreachable variables: %s", len(leaked),
+                    " ".join(var.uniqueName for var in leaked))
+            self.leaked += len(leaked)
+            self.__discard(leaked)
+
+        # variables whose subscribers were dropped are no longer updated
+        unsubscribed = [name for name, subscribers in self.subscriptions.items()
+                        if not subscribers]
+        for name in unsubscribed:
+            del self.subscriptions[name]
+        self.setFrozen([self.variables[name] for name in unsubscribed
+                        if name in self.variables], True)
+
+        if self.garbage:
+            self.connector.var_delete_batch(self.garbage)
+            self.garbage = []
+        self.__deleteDroppedChildren()
+        self.__emitCounts()
+
+    def __deleteDroppedChildren(self):
+        """ delete the varobjs created by prefetched lists of children that
+            were not used; variables whose children were loaded since keep
+            them, gdb reuses the varobjs of listed children """
+        names = [name for name in self.prefetcher.takeDropped()
+                 if name in self.variables and not self.variables[name]._childs]
+        if names:
+            self.connector.var_delete_children_batch(names)
+
+    def __emitCounts(self):
+        self.varobjCountsChanged.emit(len(self.variables) + len(self.garbage),
+                len(self.variables), self.leaked)
+
+    def __discard(self, variables):
+        """ remove root variables and their children from the pool, the
+            varobjs are deleted in gdb by the next collect()
+        @param variables    Variable[], root variables
+        """
+        for variable in variables:
+            name = variable._gdbName
+            self.refCounts.pop(name, None)
+            self.subscriptions.pop(name, None)
+            self.garbage.append(name)
+        doomed = set(variables)
+        for key, var in self.index.items():
+            if var in doomed:
+                del self.index[key]
+
+        # gdb deletes the children together with the variable; pointers only
+        # hold other root variables
+        stack = list(variables)
+        removed = []
+        while stack:
+            var = stack.pop()
+            removed.append(var)
+            self.variables.pop(var._gdbName, None)
+            self.frozen.discard(var._gdbName)
+            if not isinstance(var._childs, list):
+                stack.extend(var._childs.loaded())
+        self.dispatcher.forget(removed)
+        self.table.release(removed)
+        prefixes = tuple(var._gdbName + "." for var in variables)
+        self.frozen = set(n for n in self.frozen if not n.startswith(prefixes))
+        self.__gcTimer.start()
+
+    def subscribe(self, variables, subscriber):
+        """ register interest of subscriber in the root variables variables
+            variables that were frozen because nobody was interested in them
+            are thawed and updated
+        @param variables     Variable[], variables returned by getVar
+        @param subscriber    any hashable object, eg. the view showing the variables
+        """
+        thawed = []
+        for variable in variables:
+            name = variable._gdbName
+            subscribers = self.subscriptions.get(name)
+            if subscribers is None:
+                subscribers = self.subscriptions[name] = weakref.WeakSet()
+            subscribers.add(subscriber)
+            if len(subscribers) == 1 and name in self.frozen:
+                thawed.append(variable)
+        self.setFrozen(thawed, False)
+
+    def unsubscribe(self, variables, subscriber):
+        """ remove the interest of subscriber in variables
+            variables without subscribers are frozen in gdb and no longer
+            updated when the inferior stops
+        @param variables     Variable[], variables returned by getVar
+        @param subscriber    the object passed to subscribe
+        """
+        frozen = []
+        for variable in variables:
+            name = variable._gdbName
+            subscribers = self.subscriptions.get(name)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.subscriptions[name]
+                if name in self.variables:
+                    frozen.append(variable)
+        self.setFrozen(frozen, True)
+
+    def setFrozen(self, variables, frozen):
+        """ freeze or thaw variables in gdb
+            frozen variables (and their children) are skipped by gdb when
+            their parents are updated; thawed variables are updated at once
+        @param variables    Variable[], variables to (un)freeze
+        @param frozen       bool, True to freeze the variables
+        """
+        names = [v._gdbName for v in variables
+                 if (v._gdbName in self.frozen) != frozen]
+        if not names:
+            return
+
+        self.connector.var_set_frozen_batch(names, frozen)
+        if frozen:
+            self.frozen.update(names)
+        else:
+            self.frozen.difference_update(names)
+            self.__updateVars(False, names)
+
+    def reloadLocals(self, subscriber=None):
         """ function deletes all variables created within gdb and stored within ricodebug
             after that the locals are read again
             function is important for beautify (en/disable)
             reason :: calling 'disable pretty-printer' disables access to vars with a saved
             format like var4.4 -> after disable -> var24.private._M_dataplus
+        @param subscriber    subscriber of the new variables, see getVar
         """
-        for var in self.variables:
-            self.connector.var_delete(var)
-         
-        self.clearVars()    
-        ret = self.addLocals()
+        # gdb deletes the children together with their root
+        roots = set(self.index.values())
+        self.connector.var_delete_batch([v._gdbName for v in roots] + self.garbage)
+
+        self.clearVars()
+        ret = self.addLocals(subscriber)
         return ret
     
     def justUpdateValues(self):
         """ just update variables for tracepoints, dont signal changes to connected views
         this function is connected to the signal SignalProxy::tracepointOccured()
         """
+        self.history.nextStop()
         self.__updateVars(True)
         # signal TracepointController about finished update
         self.distributedObjects.signalProxy.emitDataForTracepointsReady()
@@ -87,52 +305,97 @@ class VariablePool(QObject):
         """ update variables if inferiorStoppedNormally
         this function is connected to the signal SignalProxy::inferiorStoppedNormally(PyQt_PyObject)
         """
+        self.history.nextStop()
         self.__updateVars(False)
 
-    def __updateVars(self, isTracePoint=None):
+    def __updateVars(self, isTracePoint=None, names=None):
         """ get updates for variables from gdb
         @param isTracePoint   bool, if method is called from Tracepoint<br>
                               changed signal is not emitted
+        @param names          string[], gdb names of the variables to update,
+                              defaults to all subscribed variables
         """
-
-        res = self.connector.var_update("*")
-        if not hasattr(res, "changelist"):
+        if names is None:
+            names = list(self.subscriptions)
+        if not names:
             return
-        res = res.changelist
+
+        self.__deleteDroppedChildren()
+        changelist = []
+        for res in self.connector.var_update_batch(names):
+            if hasattr(res, "changelist"):
+                changelist += res.changelist
 
         # update the variable
         # dont use setter method to apply changes because this will cause update to gdb
         # just update value in pool
-        for changed in res:
-            var = self.variables[changed.name]
-            var.inScope = (changed.in_scope == "true")
-            if hasattr(changed, "new_num_children"):
-                var.removeChildren()
-                var.numChild = changed.new_num_children
-                self.getChildren(var._gdbName, var._childs, var.access, var.uniqueName, var._childFormat)
-            if hasattr(changed, "value"):
-                var.value = changed.value
-            if not isTracePoint:
-                var.emitChanged()
+        # the listeners are notified once all variables are updated
+        self.dispatcher.begin()
+        try:
+            for changed in changelist:
+                var = self.variables.get(changed.name)
+                if var is None:
+                    # eg. listed by the prefetcher, but not loaded by the pool
+                    continue
+                var.inScope = (changed.in_scope == "true")
+                if hasattr(changed, "new_num_children"):
+                    # the children are reloaded when they are accessed again
+                    var.removeChildren()
+                    var.numChild = int(changed.new_num_children)
+                if hasattr(changed, "value"):
+                    var.value = changed.value
+                    self.history.record(changed.name, var.uniqueName, changed.value)
+                if not isTracePoint:
+                    var.emitChanged()
+        finally:
+            self.dispatcher.end()
 
+        self.__gcTimer.start()
         self.signalProxy.emitVariableUpdateCompleted()
 
-    def addLocals(self):
+    def addLocals(self, subscriber=None):
         """ get locals from gdb and add to pool if variable is not existing
+        @param subscriber    subscriber of the new variables, see getVar
         """
         ret = []
         res = self.connector.getLocals()
 
         for x in reversed(res):
-            var = self.getVar(x.name)
+            var = self.getVar(x.name, subscriber)
             ret.append(var)
         return ret
 
-    def getVar(self, exp):
+    def frameKey(self):
+        """ return the key of the selected frame (see
+            GdbConnector.getFrameKey); it is only asked from gdb once per
+            generation of the result cache, ie. once after every stop or
+            frame selection """
+        generation = self.connector.resultCache.generation
+        if self.__frameKey[0] != generation:
+            self.__frameKey = (generation, self.connector.getFrameKey())
+        return self.__frameKey[1]
+
+    def getVar(self, exp, subscriber=None):
         """ return variable from pool if already existing <br>
             if variable is not existing in pool, create new GDB variable and add to pool
-        @param exp       string, expression from variable to return
+            every call must be matched by a call of the variable's die()
+        @param exp           string, expression from variable to return
+        @param subscriber    object that is subscribed to the variable (see
+                             subscribe); if None, the variable is subscribed by
+                             the pool itself and updated as long as it exists
         """
+        if subscriber is None:
+            subscriber = self
+
+        key = (str(exp), self.frameKey())
+        var = self.index.get(key)
+        if var is not None and var.inScope:
+            self.refCounts[var._gdbName] += 1
+            self.subscribe([var], subscriber)
+            logging.debug("Sharing internal variable %s for expression %s",
+                    var._gdbName, exp)
+            return var
+
         # get variable from gdb (fixed)
         gdbVar = self.connector.var_create(str(exp))
 
@@ -144,22 +407,33 @@ class VariablePool(QObject):
         varReturn = self.__createVariable(gdbVar, None, exp, None)
 
         self.variables[varReturn._gdbName] = varReturn
+        self.index[key] = varReturn
+        self.refCounts[varReturn._gdbName] = 1
+        self.subscribe([varReturn], subscriber)
 
         logging.debug("Returning internal variable %s for expression %s",
                 varReturn._gdbName, exp)
 
         return varReturn
 
-    def removeVar(self, variable):
+    def removeVar(self, variable, subscriber=None):
         """ remove variable from variable pool
-        @param variable Variable type instance
+            a variable returned by several getVar calls is only deleted when
+            the last user removes it
+        @param variable      Variable type instance
+        @param subscriber    subscriber passed to getVar
         """
         if variable._gdbName in self.variables:
-            self.variables.pop(variable._gdbName)
-            self.connector.var_delete(variable._gdbName)
-            del variable
+            name = variable._gdbName
+            refCount = self.refCounts.get(name, 1) - 1
+            if refCount > 0:
+                self.refCounts[name] = refCount
+                self.unsubscribe([variable], subscriber if subscriber is not None else self)
+                return
+
+            self.__discard([variable])
 
-    def getChildren(self, name, childList, access, parentName, childformat):
+    def getChildren(self, name, childList, access, parentName, childformat, start=None, end=None, parent=None):
         """
         Appends the children of the variable with name to childList (and to internal list).
         These children are Variables.
@@ -168,21 +442,64 @@ class VariablePool(QObject):
         @param access       string, variable is private, protected or public (read from gdb)
         @param parentName   unique name for parent item of children (e.g mystruct.value)
         @param childformat  string, template for forming a child's expression
+        @param start        int, index of the first child to get, None for all children
+        @param end          int, index after the last child to get
+        @param parent       Variable, the variable the children belong to
+        @return             bool, True if access specifiers or base classes
+                            were flattened into childList
         """
-        gdbChildren = self.connector.var_list_children(name)
+        flattened = False
+        gdbChildren = self.prefetcher.take(name, start, end)
+        if gdbChildren is None:
+            gdbChildren = self.connector.var_list_children(name, start, end)
         if hasattr(gdbChildren, "children"):
             for child in gdbChildren.children:
                 assert (child.dest == "child")
 
                 if not hasattr(child.src, "type"):  # public, private, protected
                     access = child.src.exp
-                    self.getChildren(child.src.name, childList, access, parentName, "%(parent)s.%(child)s")
+                    self.getChildren(child.src.name, childList, access, parentName, "%(parent)s.%(child)s", parent=parent)
+                    flattened = True
                 elif child.src.exp == child.src.type:   # base classes
-                    self.getChildren(child.src.name, childList, access, parentName, "%(parent)s.%(child)s")
+                    self.getChildren(child.src.name, childList, access, parentName, "%(parent)s.%(child)s", parent=parent)
+                    flattened = True
                 else:
-                    var = self.__createVariable(child.src, parentName, None, access, childformat)
+                    var = self.__createVariable(child.src, parentName, None, access, childformat, parent)
                     self.variables[var._gdbName] = var
                     childList.append(var)
+        return flattened
+
+    def prefetchChildren(self, variables):
+        """ list the children of variables (and of their loaded children) in
+            the background, so they are available at once when they are shown
+        @param variables    Variable[], eg. the variables of expanded tree items
+        """
+        variables = [v for v in variables if v._gdbName in self.variables]
+        below = [c for v in variables if not isinstance(v._childs, list)
+                 for c in v._childs.loaded() if c.numChild > 0]
+        self.prefetcher.prefetch(variables + below)
+
+    def removeChildren(self, children):
+        """ delete child variables in gdb and remove them (and their
+            children) from the pool
+        @param children    Variable[], children of one or more variables
+        """
+        if not children:
+            return
+        # prefetched lists of the deleted varobjs are no longer valid
+        self.prefetcher.invalidate()
+        self.connector.var_delete_batch([c._gdbName for c in children])
+        stack = list(children)
+        removed = []
+        while stack:
+            var = stack.pop()
+            removed.append(var)
+            self.variables.pop(var._gdbName, None)
+            self.frozen.discard(var._gdbName)
+            if not isinstance(var._childs, list):
+                stack.extend(var._childs.loaded())
+        self.dispatcher.forget(removed)
+        self.table.release(removed)
 
     def assignValue(self, gdbName, value):
         """
@@ -196,14 +513,36 @@ class VariablePool(QObject):
 
         # update _all_ vars; other expressions in the variable pool might depend
         # on what we just changed!
-        self.updateVars()
+        self.__updateVars(False)
 
-    def __createVariable(self, gdbVar, parentName=None, exp=None, access=None, childformat=None):
+    def exportHistory(self, filename):
+        """
+        Writes the recorded values of all variables to a CSV file
+        @param filename    string, name of the file to write
+        """
+        with open(filename, "wb") as f:
+            self.history.export(f)
+
+    def assignExpression(self, exp, value):
+        """
+        Assigns the value to an expression that has no varobj, eg. an
+        element of an array read with Variable.getData
+        @param exp         string, the expression to assign to
+        @param value       new value for the expression
+        """
+        res = self.connector.assign(exp, str(value))
+        if res.class_ == GdbOutput.ERROR:
+            logging.error("Error when assigning variable: %s", res.raw)
+
+        self.__updateVars(False)
+
+    def __createVariable(self, gdbVar, parentName=None, exp=None, access=None, childformat=None, parent=None):
         """ create Variable with value from gdb variable
         @param gdbVar        variable read from gdb
         @param parentName    string, name of the parent item
         @param exp           expression of the variable
         @param access        string, accessor of variable (private, protected, public)
+        @param parent        Variable, the parent variable of a child
         """
         # variable to create
         varReturn = None
@@ -222,26 +561,23 @@ class VariablePool(QObject):
         numChild = int(gdbVar.numchild)
         access = access
 
-        # We use some heuristics to find out whether a type is a pointer, an
-        # array, or a structure:
-        # * Pointers will have addresses as their values, ie. their value will
-        # start with "0x"
-        # * Arrays will have their size as their value as reported by gdb.
-        # Therefore, if the value looks like a size, treat it as an array.
-        # * Everything else with children is a structure.
-        # * Again, everything else is a normal variable.
-        if value.startswith('0x'):
+        # the kind of variable to create only depends on the type, which is
+        # classified once (see TypeInfoCache)
+        info = self.types.get(type_, value, numChild)
+        if info.kind == TypeInfo.POINTER:
             logging.debug("Creating a pointer variable for '%s'", exp)
-            varReturn = PtrVariable(self, exp, gdbName, uniqueName, type_, value, inScope, numChild, access)
-        elif numChild > 0:
-            logging.debug("Creating a struct variable for '%s'", exp)
-            varReturn = StructVariable(self, exp, gdbName, uniqueName, type_, value, inScope, numChild, access)
-        elif re.match("{...}", value):
+            varReturn = PtrVariable(self, exp, gdbName, uniqueName, type_, value, inScope, numChild, access, parent)
+        elif info.kind == TypeInfo.ARRAY:
             logging.debug("Creating an array variable for '%s'", exp)
-            varReturn = ArrayVariable(self, exp, gdbName, uniqueName, type_, value, inScope, numChild, access)
+            varReturn = ArrayVariable(self, exp, gdbName, uniqueName, type_, value, inScope, numChild, access, parent)
+        elif info.kind == TypeInfo.STRUCT or numChild > 0:
+            logging.debug("Creating a struct variable for '%s'", exp)
+            varReturn = StructVariable(self, exp, gdbName, uniqueName, type_, value, inScope, numChild, access, parent)
         else:
             logging.debug("Creating a normal variable for '%s'", exp)
-            varReturn = StdVariable(self, exp, gdbName, uniqueName, type_, value, inScope, numChild, access)
+            varReturn = StdVariable(self, exp, gdbName, uniqueName, type_, value, inScope, numChild, access, parent)
+        varReturn.typeInfo = info
+        self.history.initialValue(gdbName, uniqueName, value)
 
         return varReturn
 
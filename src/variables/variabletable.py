@@ -0,0 +1,208 @@
+# ricodebug - A GDB frontend which focuses on visually supported
+# debugging using data structure graphs and SystemC features.
+#
+# Copyright (C) 2011  The ricodebug project team at the
+# Upper Austrian University Of Applied Sciences Hagenberg,
+# Department Embedded Systems Design
+#
+# This file is part of ricodebug.
+#
+# ricodebug is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For further information see <http://syscdbg.hagenberg.servus.at/>.
+
+
+""" Compact storage of the state of all variables of a VariablePool """
+
+from PyQt4.QtCore import QObject, pyqtSignal
+from array import array
+import inspect
+
+
+# bits of the flags column
+IN_SCOPE = 1
+
+
+class VariableTable(object):
+    """ Column-wise table holding the state of variables. <br>
+        Every variable is a row; a Variable object is only a view on its row
+        (see variables.variable.Variable). Rows of removed variables are
+        reused for new ones.
+    """
+    __slots__ = ("gdbName", "exp", "uniqueName", "type", "value", "access",
+                 "numChild", "parent", "flags", "views", "__free")
+
+    def __init__(self):
+        self.gdbName = []
+        self.exp = []
+        self.uniqueName = []
+        self.type = []
+        self.value = []
+        self.access = []
+        self.numChild = array("l")
+        # row of the parent variable, -1 for root variables
+        self.parent = array("l")
+        self.flags = array("B")
+        # the Variable viewing each row, None for free rows
+        self.views = []
+        self.__free = []
+
+    def __len__(self):
+        """ Return the number of rows in use. """
+        return len(self.views) - len(self.__free)
+
+    def add(self, gdbName, exp, uniqueName, type_, value, access,
+            numChild, parent=-1, flags=IN_SCOPE):
+        """ Store a new variable and return its row. """
+        if self.__free:
+            row = self.__free.pop()
+            self.gdbName[row] = gdbName
+            self.exp[row] = exp
+            self.uniqueName[row] = uniqueName
+            self.type[row] = type_
+            self.value[row] = value
+            self.access[row] = access
+            self.numChild[row] = numChild
+            self.parent[row] = parent
+            self.flags[row] = flags
+        else:
+            row = len(self.views)
+            self.gdbName.append(gdbName)
+            self.exp.append(exp)
+            self.uniqueName.append(uniqueName)
+            self.type.append(type_)
+            self.value.append(value)
+            self.access.append(access)
+            self.numChild.append(numChild)
+            self.parent.append(parent)
+            self.flags.append(flags)
+            self.views.append(None)
+        return row
+
+    def release(self, variables):
+        """ Free the rows of variables. <br>
+            The variables keep their last state in a table of their own, so
+            views still holding them (eg. until a model is reset) do not see
+            the variables that reuse the rows.
+        @param variables    Variable[], variables viewing rows of this table
+        """
+        detached = VariableTable()
+        for var in variables:
+            row = var._row
+            if self.views[row] is not var:
+                continue
+            newRow = detached.add(self.gdbName[row], self.exp[row],
+                    self.uniqueName[row], self.type[row], self.value[row],
+                    self.access[row], self.numChild[row], -1, self.flags[row])
+            detached.views[newRow] = var
+            var._t = detached
+            var._row = newRow
+            self.views[row] = None
+            self.gdbName[row] = self.exp[row] = self.uniqueName[row] = None
+            self.type[row] = self.value[row] = self.access[row] = None
+            self.__free.append(row)
+
+
+class ChangeDispatcher(QObject):
+    """ Delivers the change notifications of the variables of a pool. <br>
+        Instead of a Qt signal per variable, listeners of one variable are
+        plain callables kept here. Changes made between begin() and end() are
+        delivered together when the outermost end() is called, followed by a
+        single variablesChanged signal carrying all changed variables.
+    """
+    variablesChanged = pyqtSignal('PyQt_PyObject')
+
+    def __init__(self, parent=None):
+        QObject.__init__(self, parent)
+        # list of (slot, takes the value) by Variable
+        self.listeners = {}
+        self.__pending = []
+        self.__depth = 0
+
+    def connect(self, variable, slot):
+        """ Call slot when variable changes; slot is called with the new value
+            if it takes an argument, like a Qt signal would do. """
+        self.listeners.setdefault(variable, []).append(
+                (slot, _takesArgument(slot)))
+
+    def disconnect(self, variable, slot=None):
+        """ Remove slot (or all slots if None) from the listeners of variable.
+            Slots that are not connected (eg. after forget()) are ignored. """
+        if slot is None:
+            self.listeners.pop(variable, None)
+            return
+        slots = self.listeners.get(variable)
+        if not slots:
+            return
+        for i, (s, _) in enumerate(slots):
+            if s == slot:
+                del slots[i]
+                break
+        if not slots:
+            del self.listeners[variable]
+
+    def forget(self, variables):
+        """ Drop all listeners of variables, eg. when they are removed. """
+        listeners = self.listeners
+        for var in variables:
+            listeners.pop(var, None)
+
+    def begin(self):
+        """ Start a batch of changes. Batches may be nested. """
+        self.__depth += 1
+
+    def end(self):
+        """ Finish a batch; the changes are delivered when the outermost batch
+            is finished. """
+        self.__depth -= 1
+        if self.__depth == 0:
+            self.flush()
+
+    def notify(self, variable):
+        """ Mark variable as changed. """
+        self.__pending.append(variable)
+        if self.__depth == 0:
+            self.flush()
+
+    def flush(self):
+        pending, self.__pending = self.__pending, []
+        if not pending:
+            return
+        listeners = self.listeners
+        for var in pending:
+            slots = listeners.get(var)
+            if slots:
+                value = var.value
+                # a slot might disconnect itself
+                for slot, withValue in list(slots):
+                    if withValue:
+                        slot(value)
+                    else:
+                        slot()
+        self.variablesChanged.emit(pending)
+
+
+def _takesArgument(slot):
+    """ Return True if slot can be called with one positional argument. """
+    func = getattr(slot, "im_func", slot)
+    try:
+        args, varargs, _, _ = inspect.getargspec(func)
+    except TypeError:
+        # builtins and other callables, eg. bound Qt signals
+        return True
+    if varargs:
+        return True
+    if getattr(slot, "im_self", None) is not None:
+        args = args[1:]
+    return len(args) >= 1
@@ -41,6 +41,12 @@ class VariableWrapper(QObject):
 
         self.filter = filters.Empty
 
+    def setVariable(self, variable):
+        """ wrap another variable, eg. when the wrapped one was reloaded """
+        self._v.changed.disconnect(self.varChanged)
+        self._v = variable
+        self._v.changed.connect(self.varChanged)
+
     def varChanged(self):
         self.dataChanged.emit()
 
@@ -55,15 +61,20 @@ class VariableWrapper(QObject):
                     "access",
                     "uniqueName",
                     "assignValue",
-                    "childs"]:
+                    "childs",
+                    "getData",
+                    "previousValue",
+                    "getHistory"]:
             return getattr(self._v, name)
         else:
             raise AttributeError("%s instance has no attribute '%s'" %
                                  (self.__class__.__name__, name))
 
-    def die(self):
-        self._v.changed.disconnect()
-        self._v.die()
+    def die(self, subscriber=None):
+        # the variable might be shared with other wrappers, only disconnect
+        # this one
+        self._v.changed.disconnect(self.varChanged)
+        self._v.die(subscriber)
 
     value = property(lambda self: self.filter.toDisplay(self.unfilteredValue))
     unfilteredValue = property(lambda self: self._v.value)
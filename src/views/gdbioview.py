@@ -60,8 +60,8 @@ class GdbIoView(QWidget):
         self.debugController = do.debugController
         self.gdbInputEdit.lineEdit().returnPressed.connect(self.gdbSendButton.click)
         self.gdbSendButton.clicked.connect(self.executeCliCommand)
-        self.debugController.connector.reader.consoleRecordReceived.connect(
-                self.handleConsoleRecord, Qt.QueuedConnection)
+        self.debugController.connector.reader.consoleRecordsReceived.connect(
+                self.handleConsoleRecords, Qt.QueuedConnection)
 
     def executeCliCommand(self):
         cmd = str(self.gdbInputEdit.lineEdit().text())
@@ -76,10 +76,11 @@ class GdbIoView(QWidget):
         self.gdbIoEdit.insertHtml(s)
         self.gdbIoEdit.moveCursor(QTextCursor.End)
 
-    def handleConsoleRecord(self, rec):
-        if rec.type_ == GdbOutput.CONSOLE_STREAM:
+    def handleConsoleRecords(self, recs):
+        s = "".join(unBackslashify(rec.string) for rec in recs
+                    if rec.type_ == GdbOutput.CONSOLE_STREAM)
+        if s:
             self.gdbIoEdit.moveCursor(QTextCursor.End)
-            s = unBackslashify(rec.string)
             self.gdbIoEdit.insertPlainText(s)
             self.gdbIoEdit.moveCursor(QTextCursor.End)
 
@@ -123,6 +123,12 @@ class MainWindow(QMainWindow):
         self.ui.statusIcon = QLabel()
         self.ui.statusIcon.setPixmap(QPixmap(":/icons/images/22x22/not_running.png"))
         self.ui.statusbar.addPermanentWidget(self.ui.statusIcon)
+        self.ui.varobjLabel = QLabel()
+        self.ui.statusbar.addPermanentWidget(self.ui.varobjLabel)
+        self.distributedObjects.variablePool.varobjCountsChanged.connect(self.showVarobjCounts)
+
+    def showVarobjCounts(self, inGdb, inPool, leaked):
+        self.ui.varobjLabel.setText("Variables: %d in gdb, %d in pool, %d leaked" % (inGdb, inPool, leaked))
 
     def __initActions(self):
         self.disableButtons()
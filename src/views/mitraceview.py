@@ -32,12 +32,13 @@ class MiTraceView(QTextEdit):
         self.setReadOnly(True)
 
         do.gdb_connector.commandExecuted.connect(self.appendCommand)
-        do.gdb_connector.reader.asyncRecordReceived.connect(self.appendAsync)
+        do.gdb_connector.reader.asyncRecordsReceived.connect(self.appendAsync)
 
     def appendCommand(self, cmd, rec):
         self.append("<b>" + cmd + "</b>")
         color = 'color="#ff3333"' if rec.class_ == GdbOutput.ERROR else ""
         self.append("<font %s>%s</font>" % (color, rec.raw))
 
-    def appendAsync(self, rec):
-        self.append('<font color="#777777">%s</font>' % rec.raw)
+    def appendAsync(self, recs):
+        self.append('<font color="#777777">%s</font>' %
+                    "<br>".join(rec.raw for rec in recs))
@@ -23,7 +23,7 @@
 # For further information see <http://syscdbg.hagenberg.servus.at/>.
 
 from .treeitemview import TreeItemView
-from PyQt4.QtCore import Qt, QTimer, QModelIndex
+from PyQt4.QtCore import Qt, QTimer, QModelIndex, pyqtSignal
 from PyQt4.QtGui import QWidget, QPushButton, QIcon, QHBoxLayout, QVBoxLayout, \
         QSizeGrip, QSpacerItem, QSizePolicy, QStylePainter, QStyleOptionFrame, QStyle, QToolTip
 
@@ -31,6 +31,8 @@ from PyQt4.QtGui import QWidget, QPushButton, QIcon, QHBoxLayout, QVBoxLayout, \
 class ToolTipView(QWidget):
     ICON_SIZE = 22
 
+    hidden = pyqtSignal()
+
     def __init__(self, distributedObjects, parent=None):
         QWidget.__init__(self, parent, Qt.Tool | Qt.FramelessWindowHint)
         self.setPalette(QToolTip.palette())
@@ -77,6 +79,7 @@ class ToolTipView(QWidget):
     def hide(self):
         if self.__allowHide:
             QWidget.hide(self)
+            self.hidden.emit()
 
     def __setDisallowHide(self, x):
         self.__allowHide = not x
@@ -22,36 +22,262 @@
 #
 # For further information see <http://syscdbg.hagenberg.servus.at/>.
 
-from PyQt4.QtCore import Qt
+from PyQt4.QtCore import Qt, QLineF, QRectF, pyqtSignal
 from PyQt4 import QtGui
 
 
-class TracepointWaveView(QtGui.QTableView):
-    ''' TableView for TracepointWaveModel '''
-    def __init__(self):
-        QtGui.QTableView.__init__(self)
-        self.horizontalHeader().setStretchLastSection(True)
-        self.verticalHeader().setMinimumSectionSize(30)
-        self.verticalHeader().setDefaultSectionSize(30)
-        self.setShowGrid(False)
-        self.widget = QtGui.QWidget()
+class WaveCanvas(QtGui.QWidget):
+    ''' Paints the waves of the window of a TracepointWaveModel one below the
+    other. The waves are painted from the min/max pyramids of the model, so
+    painting takes about the same time for any number of samples. '''
+
+    cursorMoved = pyqtSignal()
+
+    ROW_HEIGHT = 40
+    NAME_WIDTH = 120
+    # values are written into the wave if a sample is at least this wide
+    LABEL_WIDTH = 40
+
+    def __init__(self, model, parent=None):
+        QtGui.QWidget.__init__(self, parent)
+        self.model = model
+        # sample marked by the cursor, None if there is no cursor
+        self.cursor = None
+        self.__dragX = None
+        self.__dragStart = 0
+
+    def columns(self):
+        return [c for c in self.model.columns if self.model.isDrawable(c)]
+
+    def waveWidth(self):
+        return max(1, self.width() - self.NAME_WIDTH)
+
+    def sampleAt(self, x):
+        ''' Return the sample at position x, None if no sample is shown. '''
+        start, end = self.model.visibleRange()
+        if end <= start:
+            return None
+        k = start + int((x - self.NAME_WIDTH) * (end - start) /
+                        float(self.waveWidth()))
+        return max(start, min(end - 1, k))
+
+    def valueAt(self, column, k):
+        if k is None or k >= len(column) or k in column.missing:
+            return "?"
+        return str(column[k])
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        palette = self.palette()
+        painter.fillRect(event.rect(), palette.base())
+        start, end = self.model.visibleRange()
+
+        for row, column in enumerate(self.columns()):
+            top = row * self.ROW_HEIGHT
+            if top > event.rect().bottom():
+                break
+            if top + self.ROW_HEIGHT < event.rect().top():
+                continue
+            painter.setPen(palette.color(QtGui.QPalette.Mid))
+            painter.drawLine(0, top + self.ROW_HEIGHT - 1,
+                             self.width(), top + self.ROW_HEIGHT - 1)
+            painter.setPen(palette.color(QtGui.QPalette.Text))
+            text = column.name
+            if self.cursor is not None:
+                text += "\n= " + self.valueAt(column, self.cursor)
+            painter.drawText(QRectF(4, top, self.NAME_WIDTH - 8, self.ROW_HEIGHT),
+                             Qt.AlignLeft | Qt.AlignVCenter, text)
+            if end > start:
+                painter.setPen(Qt.darkGreen)
+                self.__paintWave(painter, column, top, start, end)
+
+        if self.cursor is not None and start <= self.cursor < end:
+            step = self.waveWidth() / float(end - start)
+            x = self.NAME_WIDTH + (self.cursor - start + 0.5) * step
+            painter.setPen(Qt.red)
+            painter.drawLine(QLineF(x, 0, x, self.height()))
+        painter.end()
+
+    def __paintWave(self, painter, column, top, start, end):
+        pyramid = self.model.pyramids.get(column)
+        if pyramid is None:
+            return
+        width = self.waveWidth()
+        ranges = pyramid.query(start, end, width)
+        valid = [r for r in ranges if r[0] == r[0]]
+        if not valid:
+            return
+
+        if column.type == "bool":
+            lo, hi = 0, 1
+        else:
+            lo = min(r[0] for r in valid)
+            hi = max(r[1] for r in valid)
+        margin = 4
+        height = self.ROW_HEIGHT - 2 * margin
+        if hi == lo:
+            y = lambda v: top + self.ROW_HEIGHT / 2
+        else:
+            scale = height / float(hi - lo)
+            y = lambda v: top + margin + height - (v - lo) * scale
+
+        step = float(width) / len(ranges)
+        lines = []
+        x = self.NAME_WIDTH
+        last = None
+        for mn, mx in ranges:
+            if mn != mn:
+                # no valid value in this part
+                last = None
+            else:
+                y0, y1 = y(mn), y(mx)
+                if last is not None and last != y0:
+                    lines.append(QLineF(x, last, x, y0))
+                if y0 != y1:
+                    lines.append(QLineF(x, y0, x, y1))
+                lines.append(QLineF(x, y1, x + step, y1))
+                last = y1
+            x += step
+        painter.drawLines(lines)
+
+        if column.type != "bool" and step >= self.LABEL_WIDTH:
+            # one range per sample, write the values where they change
+            previous = None
+            for i in xrange(len(ranges)):
+                value = self.valueAt(column, start + i)
+                if value != previous:
+                    painter.drawText(QRectF(self.NAME_WIDTH + i * step + 2, top,
+                                            step - 2, self.ROW_HEIGHT),
+                                     Qt.AlignLeft | Qt.AlignVCenter, value)
+                previous = value
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.cursor = self.sampleAt(event.x())
+            self.__dragX = event.x()
+            self.__dragStart = self.model.visibleRange()[0]
+            self.update()
+            self.cursorMoved.emit()
+
+    def mouseMoveEvent(self, event):
+        if self.__dragX is not None and event.buttons() & Qt.LeftButton:
+            start, end = self.model.visibleRange()
+            samples = (self.__dragX - event.x()) * (end - start) / \
+                    float(self.waveWidth())
+            self.model.moveWindow(self.__dragStart + int(samples))
+
+    def mouseReleaseEvent(self, event):
+        self.__dragX = None
+
+    def wheelEvent(self, event):
+        if event.modifiers() & Qt.ControlModifier:
+            factor = self.model.zoomfactor
+            if event.delta() > 0:
+                factor = 1 / factor
+            self.model.zoomAt(self.sampleAt(event.x()), factor)
+        else:
+            start, end = self.model.visibleRange()
+            shift = max(1, (end - start) / 8)
+            if event.delta() > 0:
+                shift = -shift
+            self.model.moveWindow(start + shift)
+        event.accept()
+
+
+class TracepointWaveView(QtGui.QWidget):
+    ''' Dock showing the waves of the selected tracepoint, see WaveCanvas.
+    Drag or scroll to pan, ctrl+wheel to zoom and click to place the cursor. '''
+    def __init__(self, do, parent=None):
+        QtGui.QWidget.__init__(self, parent)
+        self.model = do.tracepointwaveModel
+        self.tracepointController = do.tracepointController
+
         self.iconlayout = QtGui.QHBoxLayout()
         self.iconlayout.setAlignment(Qt.AlignLeft)
         self.zoomInButton = QtGui.QPushButton(QtGui.QIcon(":/icons/images/zoom-in.png"), "")
         self.zoomInButton.setToolTip("Zoom in")
         self.zoomOutButton = QtGui.QPushButton(QtGui.QIcon(":/icons/images/zoom-out.png"), "")
         self.zoomOutButton.setToolTip("Zoom out")
+        self.fitButton = QtGui.QPushButton(QtGui.QIcon(":/icons/images/viewmagfit.png"), "")
+        self.fitButton.setToolTip("Show the whole trace")
+        self.openButton = QtGui.QPushButton(QtGui.QIcon(":/icons/images/open.png"), "")
+        self.openButton.setToolTip("Open trace file")
+        self.exportButton = QtGui.QPushButton(QtGui.QIcon(":/icons/images/save-as.png"), "")
+        self.exportButton.setToolTip("Export traces to VCD")
+        self.positionLabel = QtGui.QLabel()
         self.iconlayout.addWidget(self.zoomInButton)
         self.iconlayout.addWidget(self.zoomOutButton)
+        self.iconlayout.addWidget(self.fitButton)
+        self.iconlayout.addWidget(self.openButton)
+        self.iconlayout.addWidget(self.exportButton)
+        self.iconlayout.addWidget(self.positionLabel)
+
+        self.canvas = WaveCanvas(self.model)
+        self.scrollArea = QtGui.QScrollArea()
+        self.scrollArea.setWidgetResizable(True)
+        self.scrollArea.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.scrollArea.setWidget(self.canvas)
+        self.scrollBar = QtGui.QScrollBar(Qt.Horizontal)
+
         self.layout = QtGui.QVBoxLayout()
-        self.setHorizontalScrollMode(QtGui.QAbstractItemView.ScrollPerPixel)
-        self.setAutoScroll(True)
-        self.layout.addWidget(self)
+        self.layout.setMargin(0)
         self.layout.addItem(self.iconlayout)
-        self.widget.setLayout(self.layout)
+        self.layout.addWidget(self.scrollArea)
+        self.layout.addWidget(self.scrollBar)
+        self.setLayout(self.layout)
+
+        self.zoomInButton.clicked.connect(self.model.zoomIn)
+        self.zoomOutButton.clicked.connect(self.model.zoomOut)
+        self.fitButton.clicked.connect(self.model.fit)
+        self.openButton.clicked.connect(self.openTrace)
+        self.exportButton.clicked.connect(self.exportVcd)
+        self.scrollBar.valueChanged.connect(self.model.moveWindow)
+        self.model.waveChanged.connect(self.updateWaves)
+        self.canvas.cursorMoved.connect(self.updatePosition)
 
     def getZoomInButton(self):
         return self.zoomInButton
 
     def getZoomOutButton(self):
         return self.zoomOutButton
+
+    def openTrace(self):
+        filename = str(QtGui.QFileDialog.getOpenFileName(None, "Open Trace", "", "*.trace"))
+        if filename != "":
+            try:
+                self.tracepointController.openTrace(filename)
+            except IOError as e:
+                QtGui.QMessageBox.warning(self, "Open Trace", str(e))
+
+    def exportVcd(self):
+        filename = str(QtGui.QFileDialog.getSaveFileName(None, "Export Traces", "", "*.vcd"))
+        if filename != "":
+            try:
+                self.tracepointController.exportVcd(filename)
+            except IOError as e:
+                QtGui.QMessageBox.warning(self, "Export Traces", str(e))
+
+    def updateWaves(self):
+        start, end = self.model.visibleRange()
+        count = self.model.sampleCount()
+
+        self.scrollBar.blockSignals(True)
+        self.scrollBar.setRange(0, max(0, count - (end - start)))
+        self.scrollBar.setPageStep(max(1, end - start))
+        self.scrollBar.setSingleStep(max(1, (end - start) / 8))
+        self.scrollBar.setValue(start)
+        self.scrollBar.blockSignals(False)
+
+        if self.canvas.cursor is not None and self.canvas.cursor >= count:
+            self.canvas.cursor = None
+        self.updatePosition()
+        self.canvas.setMinimumHeight(len(self.canvas.columns()) * WaveCanvas.ROW_HEIGHT)
+        self.canvas.update()
+
+    def updatePosition(self):
+        start, end = self.model.visibleRange()
+        text = "Samples %d - %d of %d" % (start, max(start, end - 1),
+                                         self.model.sampleCount())
+        if self.canvas.cursor is not None:
+            text += ", cursor at sample %d" % self.canvas.cursor
+        self.positionLabel.setText(text)